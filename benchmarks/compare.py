@@ -0,0 +1,68 @@
+"""Compares two results of `benchmarks.suite`, e.g. before and after a change.
+
+Usage:
+```
+git checkout main && python -m benchmarks.suite --output before.json
+git checkout my-branch && python -m benchmarks.suite --output after.json
+python -m benchmarks.compare before.json after.json [--threshold 0.1]
+```
+
+Exits with status 1 if any case is slower than `threshold` (relative to the first result).
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Tuple
+
+_Key = Tuple[Tuple[str, Any], ...]
+
+
+def _load(path: str) -> Dict[_Key, Dict[str, Any]]:
+    with open(path) as f:
+        data = json.load(f)
+    res = {}
+    for result in data["results"]:
+        key = tuple(
+            (k, v)
+            for k, v in result.items()
+            if k not in ("seconds", "us_per_task") and not isinstance(v, float)
+        )
+        res[key] = result
+    return res
+
+
+def main(before: str, after: str, threshold: float) -> int:
+    old, new = _load(before), _load(after)
+    regressions = 0
+    print("{:<40} {:>14} {:>14} {:>8}".format("case", "before (us)", "after (us)", "change"))
+    for key, result in new.items():
+        name = " ".join(str(v) if k == "name" else "{}={}".format(k, v) for k, v in key)
+        if key not in old:
+            print("{:<40} {:>14} {:>14.2f} {:>8}".format(name, "-", result["us_per_task"], "new"))
+            continue
+        previous = old[key]["us_per_task"]
+        change = result["us_per_task"] / previous - 1 if previous > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = " <- slower"
+            regressions += 1
+        print(
+            "{:<40} {:>14.2f} {:>14.2f} {:>+8.1%}{}".format(
+                name, previous, result["us_per_task"], change, flag
+            )
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Relative slowdown reported as regression"
+    )
+    options = parser.parse_args()
+    sys.exit(main(options.before, options.after, options.threshold))
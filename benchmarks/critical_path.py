@@ -0,0 +1,92 @@
+"""Compares FIFO and critical-path ordering of ready tasks, by simulating `Orchestrator` runs.
+
+Usage:
+```
+python -m benchmarks.critical_path [--workers 8] [--runs 20]
+```
+
+Graphs are wide and uneven: many short independent tasks, plus a few long chains of tasks. Tasks are not
+executed: their durations (`cost` hints) are simulated, so the makespans only depend on the ordering.
+"""
+
+import argparse
+import heapq
+import random
+from typing import List, Tuple
+
+from simpletasks.graph import Tasks, TaskGraph, _TKey, _TTask
+from simpletasks.task import Task
+
+
+class NoopTask(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+def uneven_graph(seed: int, leaves: int = 200, chains: int = 4, chain_length: int = 10) -> Tasks:
+    """Generates `leaves` short independent tasks followed by `chains` chains of long tasks.
+
+    Leaves come first in the map, so they are the first ones to be picked in FIFO order.
+    """
+    rng = random.Random(seed)
+    tasks: Tasks = {}
+    for i in range(leaves):
+        task = type("Leaf{}".format(i), (NoopTask,), {})
+        tasks[task] = ([], {}, {"cost": rng.uniform(0.5, 2)})
+    for i in range(chains):
+        previous: List[_TTask] = []
+        for j in range(chain_length):
+            task = type("Chain{}_{}".format(i, j), (NoopTask,), {})
+            tasks[task] = (previous, {}, {"cost": rng.uniform(5, 15)})
+            previous = [task]
+    return tasks
+
+
+def simulate(tasks: Tasks, workers: int, priority: bool) -> float:
+    """Simulates a run of `Orchestrator` with `workers` threads, and returns its makespan."""
+    graph = TaskGraph(tasks, priority=priority)
+    now = 0.0
+    running: List[Tuple[float, int, _TKey]] = []
+    counter = 0
+    while True:
+        while len(running) < workers:
+            task = graph.popReady()
+            if task is None:
+                break
+            counter += 1
+            heapq.heappush(running, (now + graph.hints[task]["cost"], counter, task))
+        if not running:
+            return now
+        now, _, task = heapq.heappop(running)
+        graph.complete(task)
+
+
+def lower_bound(tasks: Tasks, workers: int) -> float:
+    graph = TaskGraph(tasks, priority=True)
+    total = sum(x["cost"] for x in graph.hints.values())
+    return max(max(graph.rank.values()), total / workers)
+
+
+def main(workers: int, runs: int) -> None:
+    print("{:>4} {:>10} {:>14} {:>12}".format("run", "fifo", "critical_path", "lower_bound"))
+    totals = [0.0, 0.0, 0.0]
+    for seed in range(runs):
+        tasks = uneven_graph(seed)
+        results = [
+            simulate(tasks, workers, False),
+            simulate(tasks, workers, True),
+            lower_bound(tasks, workers),
+        ]
+        print("{:>4} {:>10.1f} {:>14.1f} {:>12.1f}".format(seed, *results))
+        totals = [x + y for x, y in zip(totals, results)]
+    print("{:>4} {:>10.1f} {:>14.1f} {:>12.1f}".format("avg", *[x / runs for x in totals]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=20)
+    options = parser.parse_args()
+    main(options.workers, options.runs)
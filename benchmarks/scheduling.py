@@ -0,0 +1,91 @@
+"""Measures the scheduling overhead of `Orchestrator` as the number of tasks grows.
+
+Usage:
+```
+python -m benchmarks.scheduling [--sizes 10,100,1000,10000,100000] [--threads 4]
+```
+
+For each size, a random layered graph of no-op tasks is generated and the time spent per task is reported:
+- `graph`: building a `TaskGraph` and walking it (pure scheduling cost)
+- `orchestrator`: running the graph through an `Orchestrator` (scheduling, queuing and task construction)
+
+Both columns should stay flat as the graph grows.
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import List, Tuple
+
+from simpletasks.graph import Tasks, TaskGraph, _TTask
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.task import Task
+
+
+class NoopTask(Task):
+    def do(self) -> None:
+        pass
+
+
+def layered_graph(
+    size: int, width: int = 100, max_predecessors: int = 3, seed: int = 0, base: _TTask = NoopTask
+) -> Tasks:
+    """Generates a random layered graph of `size` tasks (subclasses of `base`).
+
+    Each task depends on up to `max_predecessors` tasks from the previous layer.
+    """
+    rng = random.Random(seed)
+    tasks: Tasks = {}
+    previous: List[_TTask] = []
+    current: List[_TTask] = []
+    for i in range(size):
+        task = type("{}{}".format(base.__name__, i), (base,), {})
+        predecessors = rng.sample(previous, min(len(previous), rng.randint(0, max_predecessors)))
+        tasks[task] = (predecessors, {})
+        current.append(task)
+        if len(current) == width:
+            previous, current = current, []
+    return tasks
+
+
+def bench_graph(tasks: Tasks) -> float:
+    start = time.perf_counter()
+    graph = TaskGraph(tasks)
+    while True:
+        task = graph.popReady()
+        if task is None:
+            break
+        graph.complete(task)
+    assert len(graph) == 0
+    return time.perf_counter() - start
+
+
+def bench_orchestrator(tasks: Tasks, threads: int) -> float:
+    orchestrator = type("Bench", (Orchestrator,), {"tasks": tasks, "num_threads": threads})
+    start = time.perf_counter()
+    orchestrator().run()
+    return time.perf_counter() - start
+
+
+def main(sizes: List[int], threads: int) -> List[Tuple[int, float, float]]:
+    logging.getLogger().setLevel(logging.WARNING)
+    results = []
+    print("{:>8} {:>14} {:>20}".format("tasks", "graph (us/task)", "orchestrator (us/task)"))
+    for size in sizes:
+        tasks = layered_graph(size)
+        graph = bench_graph(tasks) / size * 1e6
+        orchestrator = bench_orchestrator(tasks, threads) / size * 1e6
+        print("{:>8} {:>14.2f} {:>20.2f}".format(size, graph, orchestrator))
+        results.append((size, graph, orchestrator))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000")
+    parser.add_argument("--threads", type=int, default=4)
+    options = parser.parse_args()
+    main([int(x) for x in options.sizes.split(",")], options.threads)
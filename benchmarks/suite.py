@@ -0,0 +1,258 @@
+"""Benchmark suite for the overhead of task construction and scheduling, producing JSON results that can be
+compared across commits (see `benchmarks.compare`).
+
+Usage:
+```
+python -m benchmarks.suite [--output results.json] [--threads 1,2,4,8,16,32,64] [--size 1000] [--repeat 3]
+python -m benchmarks.suite --quick
+```
+
+Cases:
+- `task_init`: constructing a `Task` with typical options
+- `task_access`: constructing a `Task` and reading its logger, date and dryrun option (resolved lazily)
+- `orchestrator_init`: constructing an `Orchestrator` (copy of `tasks` and options, building the graph)
+- `build_args`: building the options of a subtask before queuing it
+- `run`: running a graph through an `Orchestrator`, for each graph shape, kind of task and number of threads.
+  `lock_wait` is the time spent by workers waiting for the lock of the orchestrator.
+
+Graphs are synthetic and seeded: chains, fan-out/fan-in, chains of diamonds and random layered graphs. Tasks
+either do nothing (`noop`, measures pure overhead) or sleep (`sleep`, measures how well threads are used).
+
+Each case is repeated and the fastest run is kept.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from simpletasks.graph import Tasks, _TTask, buildArgs
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.task import Task
+
+from .scheduling import layered_graph
+
+SLEEP = 0.001  # Duration of `sleep` tasks, in seconds
+
+
+class NoopTask(Task):
+    def do(self) -> None:
+        pass
+
+
+class SleepTask(Task):
+    def do(self) -> None:
+        time.sleep(SLEEP)
+
+
+TASKS: Dict[str, _TTask] = {"noop": NoopTask, "sleep": SleepTask}
+
+
+def _task(base: _TTask, i: int) -> _TTask:
+    return type("{}{}".format(base.__name__, i), (base,), {})
+
+
+def chain(size: int, base: _TTask) -> Tasks:
+    """Each task depends on the previous one: no parallelism at all."""
+    tasks: Tasks = {}
+    previous: List[_TTask] = []
+    for i in range(size):
+        task = _task(base, i)
+        tasks[task] = (previous, {})
+        previous = [task]
+    return tasks
+
+
+def fan_out(size: int, base: _TTask) -> Tasks:
+    """A root task, `size - 2` independent tasks depending on it, and a task depending on all of them."""
+    root, sink = _task(base, 0), _task(base, size - 1)
+    tasks: Tasks = {root: ([], {})}
+    middle = [_task(base, i) for i in range(1, size - 1)]
+    for task in middle:
+        tasks[task] = ([root], {})
+    tasks[sink] = (middle, {})
+    return tasks
+
+
+def diamonds(size: int, base: _TTask) -> Tasks:
+    """Chain of diamonds: each diamond is a task, 2 tasks depending on it, and a task depending on both."""
+    tasks: Tasks = {}
+    previous: List[_TTask] = []
+    for i in range(0, size - 3, 3):
+        top, left, right = _task(base, i), _task(base, i + 1), _task(base, i + 2)
+        tasks[top] = (previous, {})
+        tasks[left] = ([top], {})
+        tasks[right] = ([top], {})
+        previous = [left, right]
+    bottom = _task(base, size)
+    tasks[bottom] = (previous, {})
+    return tasks
+
+
+def layered(size: int, base: _TTask) -> Tasks:
+    """Random layered graph, see `benchmarks.scheduling.layered_graph()`."""
+    return layered_graph(size, width=64, base=base)
+
+
+GRAPHS: Dict[str, Callable[[int, _TTask], Tasks]] = {
+    "chain": chain,
+    "fan_out": fan_out,
+    "diamonds": diamonds,
+    "layered": layered,
+}
+
+
+class _TimedLock:
+    """Lock measuring the time spent waiting to acquire it."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.wait = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        start = time.perf_counter()
+        res = self._lock.acquire(blocking, timeout)
+        if res:
+            # Only updated while holding the lock
+            self.wait += time.perf_counter() - start
+        return res
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def __enter__(self) -> None:
+        self.acquire()
+
+    def __exit__(self, *args: Any) -> None:
+        self.release()
+
+
+def _best(func: Callable[[], Dict[str, float]], repeat: int) -> Dict[str, float]:
+    return min((func() for _ in range(repeat)), key=lambda x: x["seconds"])
+
+
+def bench_task_init(count: int) -> Dict[str, float]:
+    options = {"dryrun": False, "progress": False, "date": datetime.date(2020, 1, 1), "verbose": True}
+    start = time.perf_counter()
+    for _ in range(count):
+        NoopTask(**options)
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_task_access(count: int) -> Dict[str, float]:
+    options = {"dryrun": False, "progress": False, "date": datetime.date(2020, 1, 1), "verbose": True}
+    start = time.perf_counter()
+    for _ in range(count):
+        task = NoopTask(**options)
+        task.logger, task.date, task.dryrun
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_orchestrator_init(tasks: Tasks) -> Dict[str, float]:
+    orchestrator = type("Bench", (Orchestrator,), {"tasks": tasks, "num_threads": 1})
+    start = time.perf_counter()
+    orchestrator(dryrun=False, progress=False, date=datetime.date(2020, 1, 1))
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_build_args(count: int) -> Dict[str, float]:
+    args = {"dryrun": False, "progress": False, "date": datetime.date(2020, 1, 1), "ids": list(range(100))}
+    start = time.perf_counter()
+    for i in range(count):
+        buildArgs(args, {"index": i}, "simpletasks.Bench.Task")
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_run(tasks: Tasks, threads: int) -> Dict[str, float]:
+    orchestrator = type("Bench", (Orchestrator,), {"tasks": tasks, "num_threads": threads})()
+    lock = _TimedLock()
+    orchestrator.lock = lock  # type: ignore
+    orchestrator._slots = threading.Condition(lock)  # type: ignore
+    start = time.perf_counter()
+    orchestrator.run()
+    return {"seconds": time.perf_counter() - start, "lock_wait": lock.wait}
+
+
+def _gitCommit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+        )
+    except Exception:
+        return None
+
+
+def main(threads: List[int], size: int, repeat: int, output: Optional[str]) -> List[Dict[str, Any]]:
+    logging.getLogger().setLevel(logging.WARNING)
+    results: List[Dict[str, Any]] = []
+
+    def _add(name: str, count: int, measures: Dict[str, float], **params: Any) -> None:
+        result = dict(name=name, **params)
+        result.update(measures)
+        result["us_per_task"] = measures["seconds"] / count * 1e6
+        results.append(result)
+        print(
+            "{:<40} {:>10.3f} s {:>12.2f} us/task".format(
+                " ".join([name] + ["{}={}".format(k, v) for k, v in params.items()]),
+                result["seconds"],
+                result["us_per_task"],
+            )
+        )
+
+    _add("task_init", size, _best(lambda: bench_task_init(size), repeat))
+    _add("task_access", size, _best(lambda: bench_task_access(size), repeat))
+    _add("build_args", size, _best(lambda: bench_build_args(size), repeat))
+    for graph, generate in GRAPHS.items():
+        tasks = generate(size, NoopTask)
+        _add(
+            "orchestrator_init",
+            len(tasks),
+            _best(lambda: bench_orchestrator_init(tasks), repeat),
+            graph=graph,
+        )
+
+    for kind, base in TASKS.items():
+        # Sleeping tasks are slower: use smaller graphs
+        count = size if kind == "noop" else max(size // 10, 10)
+        for graph, generate in GRAPHS.items():
+            tasks = generate(count, base)
+            for n in threads:
+                measures = _best(lambda: bench_run(tasks, n), repeat)
+                _add("run", len(tasks), measures, graph=graph, task=kind, threads=n)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(
+                {
+                    "commit": _gitCommit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "time": datetime.datetime.now().isoformat(),
+                    "size": size,
+                    "repeat": repeat,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--output", default=None, help="JSON file to write results to")
+    parser.add_argument("--threads", default="1,2,4,8,16,32,64")
+    parser.add_argument("--size", type=int, default=1000, help="Number of tasks per graph")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Small graphs and few threads, for a smoke test")
+    options = parser.parse_args()
+    if options.quick:
+        options.threads, options.size, options.repeat = "1,4", 100, 1
+    main([int(x) for x in options.threads.split(",")], options.size, options.repeat, options.output)
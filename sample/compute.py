@@ -12,6 +12,7 @@ def cli():
 
 @Cli(cli, params=[click.argument("n", type=int), CliParams.progress()])
 class FibonacciTask(Task):
+    @Task.memoize
     def compute(self, n: int) -> int:
         self.logger.debug(f"Called with n={n}")
         f1, f2 = 0, 1
@@ -1,13 +1,32 @@
 try:
-    from .cli import Cli, CliParams
+    from .cli import Cli, CliParams, LazyGroup
 except ImportError:
     # See https://github.com/python/mypy/issues/1297 for why we use type:ignore
     Cli = None  # type:ignore
     CliParams = None  # type:ignore
+    LazyGroup = None  # type:ignore
 
+from .asyncorchestrator import AsyncOrchestrator
+from .asynctask import AsyncTask
 from .helpers import addTestLogger
 from .orchestrator import Orchestrator, Tasks
+from .partitions import DatePartitions
 from .pipeline import Pipeline
+from .streamingpipeline import StreamAborted, StreamingPipeline
 from .task import Task
 
-__all__ = ["Cli", "CliParams", "addTestLogger", "Orchestrator", "Tasks", "Pipeline", "Task"]
+__all__ = [
+    "Cli",
+    "CliParams",
+    "LazyGroup",
+    "AsyncOrchestrator",
+    "AsyncTask",
+    "addTestLogger",
+    "Orchestrator",
+    "DatePartitions",
+    "Tasks",
+    "Pipeline",
+    "StreamAborted",
+    "StreamingPipeline",
+    "Task",
+]
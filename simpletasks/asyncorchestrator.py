@@ -0,0 +1,201 @@
+import abc
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import time
+import types
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from .asynctask import AsyncTask
+from .costs import CostHistory
+from .graph import ORCHESTRATOR_OPTIONS, Tasks, TaskGraph, _Args, _TKey, buildArgs, taskClass
+from .orchestrator import _runTask
+
+
+class AsyncOrchestrator(AsyncTask):
+    """Task to execute multiple tasks concurrently in a single event loop (experimental).
+
+    Definition:
+    ```
+    class MySubTask1(AsyncTask):
+        ...
+    class MySubTask2(Task):
+        ...
+
+    class MyTask(AsyncOrchestrator):
+        tasks = {
+            MySubTask1: ([], {}),
+            MySubTask2: ([MySubTask1], {}),
+        }
+        max_concurrency = 100
+    ```
+
+    `AsyncTask` subtasks are awaited in the event loop, while synchronous `Task` subtasks are offloaded to a
+    pool of `num_threads` threads.
+    """
+
+    scheduling = "critical_path"  # Either "critical_path" or "fifo" - see `Orchestrator`
+    profiled = False  # Only subtasks are profiled
+    cost_history: Optional[str] = None  # Path of the JSON file storing durations of previous runs
+    num_threads: Optional[int] = None  # Threads used to run synchronous tasks (defaults to `max_concurrency`)
+
+    @property
+    @abc.abstractmethod
+    def tasks(self) -> Tasks:
+        """Map of tasks to execute - see `Orchestrator.tasks`.
+
+        Returns:
+        - Tasks: Map of tasks.
+        """
+        pass  # pragma: no cover
+
+    @property
+    @abc.abstractmethod
+    def max_concurrency(self) -> int:
+        """Defines the maximum number of tasks running concurrently
+
+        Returns:
+        - int: Maximum number of tasks running concurrently
+        """
+        pass  # pragma: no cover
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        if self.scheduling not in ("critical_path", "fifo"):
+            raise ValueError("Unknown scheduling: {}".format(self.scheduling))
+        self._history = CostHistory(self.cost_history) if self.cost_history else None
+        self._queue = TaskGraph(
+            self.tasks,
+            priority=self.scheduling == "critical_path",
+            costs=self._history.costs(self.tasks.keys()) if self._history else None,
+        )
+        # Shared by all subtasks (see `buildArgs()`)
+        self._args: Mapping[str, Any] = types.MappingProxyType(
+            {k: v for k, v in kwargs.items() if k not in ORCHESTRATOR_OPTIONS}
+        )
+        self.fail_on_exception = self.options.get("fail_on_exception", True)
+        self.keep_going = self.options.get("keep_going", False)
+
+        self.exceptions: List[Tuple[_TKey, Exception]] = []
+        self.completed: Set[_TKey] = set()
+        self.failed: Set[_TKey] = set()
+        self.skipped: Set[_TKey] = set()
+        self._running: Set["asyncio.Future[None]"] = set()
+        self._active = 0  # Tasks started, at most `max_concurrency`
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def _findNextTasks(self) -> None:
+        if self.fail_on_exception and not self.keep_going and len(self.exceptions) > 0:
+            self.logger.debug("Failure - not picking up any new tasks")
+            return
+
+        # Only start as many tasks as allowed to run, so the next ones are picked by priority
+        while self._active < self.max_concurrency:
+            task = self._queue.popReady()
+            if task is None:
+                break
+
+            args = buildArgs(self._args, self._queue.args[task], self.loggernamespace + "." + task.__name__)
+
+            self.logger.info("Adding task {} into queue".format(task.__name__))
+            self._active += 1
+            queued_at = self._queue.readyAt.pop(task, time.time())
+            self._running.add(
+                asyncio.ensure_future(self._worker(task, args, self._queue.takeInputs(task), queued_at))
+            )
+
+    def _onCompleted(self, task: _TKey, result: Any, failure: Optional[Exception]) -> None:
+        if failure is None:
+            self.completed.add(task)
+            self._queue.storeResult(task, result)
+            self._queue.complete(task)
+            return
+
+        self.exceptions.append((task, failure))
+        self.failed.add(task)
+        if self.fail_on_exception and self.keep_going:
+            skipped = self._queue.skip(task)
+            if skipped:
+                self.logger.warning(
+                    "Skipping tasks depending on {}: {}".format(
+                        task.__name__, ";".join([x.__name__ for x in skipped])
+                    )
+                )
+                self.skipped.update(skipped)
+        else:
+            self._queue.complete(task)
+
+    async def _execute(self, task: _TKey, args: _Args, inputs: Dict[_TKey, Any], queued_at: float) -> Any:
+        if issubclass(taskClass(task), AsyncTask):
+            t = task(**args)
+            t.inputs = inputs
+            t.queued_at = queued_at
+            return await t.run()
+        else:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(_runTask, task, args, inputs, queued_at)
+            )
+
+    async def _worker(self, task: _TKey, args: _Args, inputs: Dict[_TKey, Any], queued_at: float) -> None:
+        self.logger.info("Starting task {}".format(task.__name__))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Starting task {} using arguments: {}".format(task.__name__, args))
+
+        res = None
+        failure: Optional[Exception] = None
+        start = time.monotonic()
+        try:
+            res = await self._execute(task, args, inputs, queued_at)
+            self.logger.info("Completed task {}: {}".format(task.__name__, res))
+        except Exception as e:
+            self.logger.info("Failed task {}: {}".format(task.__name__, e))
+            failure = e
+        if self._history is not None:
+            self._history.record(task, time.monotonic() - start)
+
+        self._active -= 1
+        self._onCompleted(task, res, failure)
+        self._findNextTasks()
+        self.logger.debug("{} tasks running".format(len(self._running)))
+
+    async def do(self) -> None:
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.num_threads or self.max_concurrency
+        )
+
+        try:
+            self._findNextTasks()
+            while self._running:
+                done, _ = await asyncio.wait(list(self._running), return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    self._running.discard(future)
+                    future.result()
+        finally:
+            self._executor.shutdown()
+            self._executor = None
+
+        if self._history is not None:
+            self._history.save()
+
+        if len(self._queue) > 0:
+            self.logger.critical(
+                "Done but some tasks remaining: {}".format(
+                    ";".join([x.__name__ for x in self._queue.remaining])
+                )
+            )
+
+        self.logger.info(
+            "Completed {} tasks, {} failed, {} skipped".format(
+                len(self.completed), len(self.failed), len(self.skipped)
+            )
+        )
+
+        if self.exceptions:
+            for task, exception in self.exceptions:
+                self.logger.critical(
+                    "Could not run {}: {} {}".format(task.__name__, exception.__class__.__name__, exception)
+                )
+            raise RuntimeError("Task failed")
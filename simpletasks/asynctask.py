@@ -0,0 +1,202 @@
+import abc
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+from .batch import AsyncBatch
+from .limits import CircuitBreaker, RateLimiter
+from .retry import RetryPolicy
+from .task import Task
+
+X = TypeVar("X")
+Y = TypeVar("Y")
+
+
+class AsyncTask(Task):
+    """Task doing its work in a coroutine.
+
+    Definition:
+    ```
+    class MyTask(AsyncTask):
+        async def do(self) -> int:
+            self.logger.info("That's where I await stuff!")
+            await asyncio.sleep(1)
+            return 42
+    ```
+
+    Usage: either awaited from a coroutine, or run in a new event loop from synchronous code:
+    ```
+    res = await MyTask().run()
+    res = MyTask().runSync()
+    ```
+    """
+
+    async def executeAsync(
+        self,
+        func: Callable[..., Awaitable[X]],
+        stubbedValue: Optional[X] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> Optional[X]:
+        """Awaits the coroutine returned by `func` if not in dryrun mode and returns the value.
+        If in dryrun mode, function is not called and `stubbedValue` is returned.
+
+        Usage:
+        ```
+        await self.executeAsync(lambda: session.post(url))
+        ```
+
+        Args:
+        - func (Callable[..., Awaitable[X]]): Function to call
+        - stubbedValue (X, optional): Value to return in dryrun mode. Defaults to None.
+        - limiter (RateLimiter, optional): Rate limiter to wait for before calling. Defaults to None.
+        - breaker (CircuitBreaker, optional): Circuit breaker to call through. Defaults to None.
+
+        Raises:
+        - CircuitOpen: If the circuit breaker is open
+
+        Returns:
+        - Optional[X]: Returned value from the coroutine
+        """
+        if self.dryrun:
+            self.logger.info("Stubbed")
+            return stubbedValue
+
+        async def _call() -> X:
+            if limiter is not None:
+                await limiter.acquireAsync()
+            return await func()
+
+        return await (breaker.callAsync(_call) if breaker is not None else _call())
+
+    async def executeOrRetryAsync(
+        self,
+        func: Callable[..., Awaitable[X]],
+        maxretries: int = 5,
+        initialdelay: float = 30,
+        stubbedValue: Optional[X] = None,
+        policy: Optional[RetryPolicy] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> Optional[X]:
+        """Awaits the coroutine returned by `func` if not in dryrun mode and returns the value, retrying with
+        exponential backoff if it fails (see `Task.executeOrRetry()`). Waits between retries do not block the
+        event loop.
+
+        Args:
+        - func (Callable[..., Awaitable[X]]): Function to call
+        - maxretries (int, optional): Maximum number of times to retry. Defaults to 5.
+        - initialdelay (float, optional): Initial delay to wait between retries (in seconds). Defaults to 30.
+        - stubbedValue (X, optional): Value to return in dryrun mode. Defaults to None.
+        - policy (RetryPolicy, optional): Policy to use instead of `maxretries` and `initialdelay`. Defaults to None.
+        - limiter (RateLimiter, optional): Rate limiter to wait for before each call. Defaults to None.
+        - breaker (CircuitBreaker, optional): Circuit breaker to call through. Defaults to None.
+
+        Raises:
+        - e: Last exception raised if maximum retries is reached
+
+        Returns:
+        - Optional[X]: Returned value from the coroutine
+        """
+        if policy is None:
+            policy = RetryPolicy(maxretries=maxretries, initialdelay=initialdelay, jitter=False)
+        return await policy.callAsync(
+            lambda: self.executeAsync(func, stubbedValue, limiter, breaker), logger=self.logger
+        )
+
+    def batchAsync(
+        self,
+        flush: Callable[[List[X]], Awaitable[Y]],
+        size: int = 100,
+        interval: Optional[float] = None,
+        stubbedValue: Optional[Y] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> "AsyncBatch[X, Y]":
+        """Returns a batch collecting items and awaiting the coroutine returned by `flush` with groups of items
+        (through `executeAsync()`), see `Task.batch()`.
+
+        Usage:
+        ```
+        async with self.batchAsync(lambda rows: session.post(url, json=rows), size=500) as batch:
+            for row in rows:
+                await batch.add(row)
+        ```
+
+        Args:
+        - flush (Callable[[List[X]], Awaitable[Y]]): Function to call with each group of items
+        - size (int, optional): Maximum number of items per group. Defaults to 100.
+        - interval (float, optional): Age of the first item of a group after which the group is flushed, checked when an item is added or by `flushDue()` (in seconds). Defaults to no limit.
+        - stubbedValue (Y, optional): Value to record for each group in dryrun mode. Defaults to None.
+        - limiter (RateLimiter, optional): Rate limiter to wait for before each flush. Defaults to None.
+        - breaker (CircuitBreaker, optional): Circuit breaker to call through. Defaults to None.
+
+        Returns:
+        - AsyncBatch[X, Y]: Batch, with the returned values of `flush` in `results`
+        """
+        return AsyncBatch(self, flush, size, interval, stubbedValue, limiter, breaker)
+
+    @abc.abstractmethod
+    async def do(self) -> Any:
+        """Coroutine to implement and does the work.
+
+        Returns:
+        - Any: Any value to return
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    async def run(self) -> Any:
+        """Executes the task.
+
+        If an exception is raised during execution, its stack will be printed in the logger and the exception
+        will be re-raised.
+
+        If the task is `cacheable`, a previous result is returned without awaiting `do()` if found in the cache.
+
+        The run is measured in `Task.METRICS` (CPU time includes other coroutines running in the same loop).
+
+        Raises:
+        - e: Any exception raised by `do()`
+
+        Returns:
+        - Any: Any value returned by `do()`
+        """
+        start = time.time()
+        try:
+            with Task.METRICS.measure(self):
+                cache, key = self._cache()
+                if cache is None or key is None:
+                    return await self._runUncachedAsync()
+
+                found, res = cache.get(key)
+                if found:
+                    self.logger.info("Using cached result")
+                    return res
+
+                res = await self._runUncachedAsync()
+                cache.set(key, res)
+                return res
+        finally:
+            self._reportMetrics(start)
+
+    async def _runUncachedAsync(self) -> Any:
+        if Task.DEBUGGING:
+            return await self.do()
+        else:
+            try:
+                return await self.do()
+            except Exception as e:
+                self.logger.critical("Got exception: {} {}".format(e.__class__.__name__, e), exc_info=e)
+                raise e
+
+    def runSync(self) -> Any:
+        """Executes the task in a new event loop, to be used from synchronous code.
+
+        Returns:
+        - Any: Any value returned by `do()`
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run())
+        finally:
+            loop.close()
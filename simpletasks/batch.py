@@ -0,0 +1,250 @@
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Generic, Iterable, List, Optional, TypeVar
+
+from .limits import CircuitBreaker, RateLimiter
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .asynctask import AsyncTask
+    from .task import Task
+
+X = TypeVar("X")
+Y = TypeVar("Y")
+
+
+class _BaseBatch(Generic[X, Y]):
+    def __init__(
+        self,
+        task: "Task",
+        size: int,
+        interval: Optional[float],
+        stubbedValue: Optional[Y],
+        limiter: Optional[RateLimiter],
+        breaker: Optional[CircuitBreaker],
+    ) -> None:
+        if size < 1:
+            raise ValueError("Size of batches must be positive: {}".format(size))
+        self.task = task
+        self.size = size
+        self.interval = interval
+        self.stubbedValue = stubbedValue
+        self.limiter = limiter
+        self.breaker = breaker
+
+        self.results: List[Optional[Y]] = []  # Returned values of the flushes
+        self.flushed = 0  # Number of items flushed
+        self._pending: List[X] = []
+        self._started: Optional[float] = None  # Time (monotonic) at which the first pending item was added
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _due(self) -> bool:
+        """Not thread-safe, must be guarded"""
+        if len(self._pending) >= self.size:
+            return True
+        return (
+            self.interval is not None
+            and self._started is not None
+            and time.monotonic() - self._started >= self.interval
+        )
+
+    def _append(self, item: X) -> bool:
+        """Not thread-safe, must be guarded"""
+        if not self._pending:
+            self._started = time.monotonic()
+        self._pending.append(item)
+        return self._due()
+
+    def _take(self) -> List[X]:
+        """Not thread-safe, must be guarded"""
+        items, self._pending = self._pending[: self.size], self._pending[self.size :]
+        self._started = time.monotonic() if self._pending else None
+        if items:
+            self.task.logger.debug("Flushing {} items".format(len(items)))
+        return items
+
+    def _done(self, items: List[X], res: Optional[Y]) -> None:
+        self.results.append(res)
+        self.flushed += len(items)
+
+    def _restore(self, items: List[X]) -> None:
+        """Not thread-safe, must be guarded"""
+        # Items of a failed flush are flushed again first
+        self._pending = items + self._pending
+        if self._started is None:
+            self._started = time.monotonic()
+
+    def _discard(self) -> None:
+        if self._pending:
+            self.task.logger.warning("Not flushing {} items after failure".format(len(self._pending)))
+            self._pending, self._started = [], None
+
+
+class Batch(_BaseBatch[X, Y]):
+    """Collects items and passes them in groups to a flush function (e.g. a bulk insert), to pay one round
+    trip per group instead of one per item. Created by `Task.batch()`.
+
+    A group is flushed when it has `size` items, or when an item is added more than `interval` seconds after
+    the first item of the group. The window is only checked when an item is added or when `flushDue()` is
+    called (e.g. while waiting for the next item), flushes never run in the background. Remaining items are
+    flushed when leaving the `with` block (or by calling `flush()`).
+
+    If a flush fails, its items are kept pending (so `flush()` can be called again). Pending items are
+    discarded with a warning if the `with` block or the last flush raises an exception.
+
+    Items can be added from several threads (e.g. from `Task.map()`): flushes are called one at a time, in
+    the order of the items.
+    """
+
+    def __init__(
+        self,
+        task: "Task",
+        flush: Callable[[List[X]], Y],
+        size: int = 100,
+        interval: Optional[float] = None,
+        stubbedValue: Optional[Y] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        super().__init__(task, size, interval, stubbedValue, limiter, breaker)
+        self.func = flush
+        self.lock = threading.Lock()
+        self._flushing = threading.Lock()
+
+    def add(self, item: X) -> None:
+        """Adds an item, flushing the group if it is full or its time window elapsed.
+
+        Args:
+        - item (X): Item
+        """
+        with self.lock:
+            due = self._append(item)
+        if due:
+            self._flush(untilDue=True)
+
+    def extend(self, items: Iterable[X]) -> None:
+        """Adds items (see `add()`).
+
+        Args:
+        - items (Iterable[X]): Items
+        """
+        for item in items:
+            self.add(item)
+
+    def _flush(self, untilDue: bool) -> None:
+        with self._flushing:
+            while True:
+                with self.lock:
+                    if untilDue and not self._due():
+                        return
+                    items = self._take()
+                if not items:
+                    return
+                try:
+                    res = self.task.execute(
+                        lambda: self.func(items), self.stubbedValue, self.limiter, self.breaker
+                    )
+                except Exception:
+                    with self.lock:
+                        self._restore(items)
+                    raise
+                self._done(items, res)
+
+    def flushDue(self) -> None:
+        """Flushes the pending items if the group is full or its time window elapsed."""
+        self._flush(untilDue=True)
+
+    def flush(self) -> None:
+        """Passes the pending items to the flush function, in groups of at most `size` items. Calls are made
+        through `Task.execute()`, so the function is not called in dryrun mode.
+        """
+        self._flush(untilDue=False)
+
+    def __enter__(self) -> "Batch[X, Y]":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            with self.lock:
+                self._discard()
+
+
+class AsyncBatch(_BaseBatch[X, Y]):
+    """Collects items and passes them in groups to a coroutine function, see `Batch`. Created by
+    `AsyncTask.batchAsync()`.
+    """
+
+    def __init__(
+        self,
+        task: "AsyncTask",
+        flush: Callable[[List[X]], Awaitable[Y]],
+        size: int = 100,
+        interval: Optional[float] = None,
+        stubbedValue: Optional[Y] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        super().__init__(task, size, interval, stubbedValue, limiter, breaker)
+        self.func = flush
+        self._flushing: Optional[asyncio.Lock] = None  # Created in the running loop
+
+    async def add(self, item: X) -> None:
+        """Adds an item, flushing the group if it is full or its time window elapsed.
+
+        Args:
+        - item (X): Item
+        """
+        if self._append(item):
+            await self._flush(untilDue=True)
+
+    async def extend(self, items: Iterable[X]) -> None:
+        """Adds items (see `add()`).
+
+        Args:
+        - items (Iterable[X]): Items
+        """
+        for item in items:
+            await self.add(item)
+
+    async def _flush(self, untilDue: bool) -> None:
+        if self._flushing is None:
+            self._flushing = asyncio.Lock()
+        task: "AsyncTask" = self.task  # type: ignore
+        async with self._flushing:
+            while not untilDue or self._due():
+                items = self._take()
+                if not items:
+                    return
+                try:
+                    res = await task.executeAsync(
+                        lambda: self.func(items), self.stubbedValue, self.limiter, self.breaker
+                    )
+                except Exception:
+                    self._restore(items)
+                    raise
+                self._done(items, res)
+
+    async def flushDue(self) -> None:
+        """Flushes the pending items if the group is full or its time window elapsed."""
+        await self._flush(untilDue=True)
+
+    async def flush(self) -> None:
+        """Awaits the flush function with the pending items, in groups of at most `size` items. Calls are made
+        through `AsyncTask.executeAsync()`, so the function is not called in dryrun mode.
+        """
+        await self._flush(untilDue=False)
+
+    async def __aenter__(self) -> "AsyncBatch[X, Y]":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        try:
+            if exc_type is None:
+                await self.flush()
+        finally:
+            self._discard()
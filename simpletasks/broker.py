@@ -0,0 +1,284 @@
+import abc
+import argparse
+import contextlib
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Iterator, Optional, Tuple
+
+from .orchestrator import _runTaskInProcess
+
+logger = logging.getLogger(__name__)
+
+
+class Broker(metaclass=abc.ABCMeta):
+    """Queue of jobs between an `Orchestrator` (with `executor = "broker"`) and `BrokerWorker` processes,
+    possibly on other hosts.
+
+    Jobs and results are opaque bytes: the orchestrator publishes the pickled task class, options and inputs,
+    a worker claims the job, runs the task and completes the job with the pickled result or exception.
+    """
+
+    POLL_INTERVAL = 0.2  # Delay between checks for results, in seconds
+
+    @abc.abstractmethod
+    def publish(self, payload: bytes) -> str:
+        """Adds a job to the queue.
+
+        Args:
+        - payload (bytes): Job
+
+        Returns:
+        - str: Identifier of the job
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def claim(self, worker: str) -> Optional[Tuple[str, bytes]]:
+        """Takes the oldest job waiting in the queue, so no other worker runs it.
+
+        Args:
+        - worker (str): Name of the worker
+
+        Returns:
+        - Optional[Tuple[str, bytes]]: Identifier and payload of the job, or None if there is none
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def complete(self, job: str, result: bytes) -> None:
+        """Stores the result of a claimed job.
+
+        Args:
+        - job (str): Identifier of the job
+        - result (bytes): Result
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def result(self, job: str) -> Optional[bytes]:
+        """Returns the result of a job and removes the job from the queue, if it is completed.
+
+        Args:
+        - job (str): Identifier of the job
+
+        Returns:
+        - Optional[bytes]: Result, or None if the job is not completed yet
+        """
+        pass  # pragma: no cover
+
+    @abc.abstractmethod
+    def cancel(self, job: str) -> None:
+        """Removes a job from the queue, whether it is claimed or not (its result will be ignored).
+
+        Args:
+        - job (str): Identifier of the job
+        """
+        pass  # pragma: no cover
+
+    def wait(self, job: str, timeout: Optional[float] = None) -> bytes:
+        """Waits for the result of a job (see `result()`).
+
+        Args:
+        - job (str): Identifier of the job
+        - timeout (float, optional): Maximum duration to wait (in seconds), e.g. in case the worker running
+        the job died. The job is then cancelled. Defaults to no limit.
+
+        Raises:
+        - TimeoutError: If the job is not completed in time
+
+        Returns:
+        - bytes: Result
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            res = self.result(job)
+            if res is not None:
+                return res
+            if deadline is not None and time.monotonic() >= deadline:
+                self.cancel(job)
+                raise TimeoutError("Job {} not completed after {} seconds".format(job, timeout))
+            time.sleep(self.POLL_INTERVAL)
+
+
+class SQLiteBroker(Broker):
+    """Broker storing jobs in a SQLite database, so no other service is needed.
+
+    The database can be shared by processes of a host, or of several hosts through a network filesystem
+    supporting file locks.
+
+    Usage:
+    ```
+    class MyTask(Orchestrator):
+        executor = "broker"
+        broker = SQLiteBroker("/shared/jobs.db")
+        ...
+    ```
+    and on each worker host: `python -m simpletasks.broker /shared/jobs.db`
+    """
+
+    def __init__(self, path: str, lease: Optional[float] = None) -> None:
+        """Opens the database (created if needed).
+
+        Args:
+        - path (str): Path of the database
+        - lease (float, optional): Duration after which a claimed job not completed can be claimed again (e.g.
+        if its worker died), in seconds. Must be longer than the longest task. Defaults to never.
+        """
+        self.path = path
+        self.lease = lease
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, payload BLOB NOT NULL, status TEXT NOT NULL, "
+                "worker TEXT, result BLOB, created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per call, as connections cannot be shared by threads
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def publish(self, payload: bytes) -> str:
+        job = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, status, created, updated) VALUES (?, ?, 'pending', ?, ?)",
+                (job, payload, now, now),
+            )
+        return job
+
+    def claim(self, worker: str) -> Optional[Tuple[str, bytes]]:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'pending' OR (status = 'claimed' AND updated < ?) "
+                    "ORDER BY created LIMIT 1",
+                    (now - self.lease if self.lease is not None else 0,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'claimed', worker = ?, updated = ? WHERE id = ?",
+                        (worker, now, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return (row[0], row[1]) if row is not None else None
+
+    def complete(self, job: str, result: bytes) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated = ? WHERE id = ?",
+                (result, time.time(), job),
+            )
+
+    def result(self, job: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job,))
+            return row[0]
+
+    def cancel(self, job: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job,))
+
+
+class BrokerWorker:
+    """Worker process running the jobs published to a broker by `Orchestrator`.
+
+    Tasks are imported by their module path, so the code of the tasks must be importable by the worker.
+
+    Usage: `python -m simpletasks.broker PATH` (see `--help`), or:
+    ```
+    BrokerWorker(SQLiteBroker(path)).run()
+    ```
+    """
+
+    POLL_INTERVAL = 0.5  # Delay between checks for jobs when the queue is empty, in seconds
+
+    def __init__(self, broker: Broker, name: Optional[str] = None) -> None:
+        self.broker = broker
+        self.name = name or "{}-{}".format(socket.gethostname(), os.getpid())
+
+    def _execute(self, payload: bytes) -> bytes:
+        try:
+            task, args, inputs, queued_at = pickle.loads(payload)
+        except Exception as e:
+            return pickle.dumps((None, RuntimeError("Could not load job: {}".format(e)), []))
+
+        logger.info("{} running task {}".format(self.name, task.__name__))
+        res, failure, records = _runTaskInProcess(task, args, inputs, queued_at)
+        try:
+            return pickle.dumps((res, failure, records))
+        except Exception as e:
+            # Result or exception cannot be sent back
+            return pickle.dumps(
+                (None, RuntimeError("Could not send result of task {}: {}".format(task.__name__, e)), records)
+            )
+
+    def runOne(self) -> bool:
+        """Runs the next job of the queue, if any.
+
+        Returns:
+        - bool: Whether a job was run
+        """
+        claimed = self.broker.claim(self.name)
+        if claimed is None:
+            return False
+        job, payload = claimed
+        self.broker.complete(job, self._execute(payload))
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, idle_timeout: Optional[float] = None) -> int:
+        """Runs jobs until stopped.
+
+        Args:
+        - max_jobs (int, optional): Stops after this number of jobs. Defaults to no limit.
+        - idle_timeout (float, optional): Stops after waiting this duration for a job (in seconds). Defaults to no limit.
+
+        Returns:
+        - int: Number of jobs run
+        """
+        count = 0
+        idle = time.monotonic()
+        while max_jobs is None or count < max_jobs:
+            if self.runOne():
+                count += 1
+                idle = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - idle >= idle_timeout:
+                break
+            else:
+                time.sleep(self.POLL_INTERVAL)
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Runs tasks published by an Orchestrator to a SQLite broker."
+    )
+    parser.add_argument("path", help="Path of the SQLite database of the broker")
+    parser.add_argument("--name", default=None, help="Name of the worker (defaults to host and process id)")
+    parser.add_argument("--lease", type=float, default=None, help="See SQLiteBroker")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Stop after this number of jobs")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Stop after waiting for jobs (s)")
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s - %(levelname)s - %(message)s")
+    BrokerWorker(SQLiteBroker(options.path, options.lease), options.name).run(
+        options.max_jobs, options.idle_timeout
+    )
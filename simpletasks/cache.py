@@ -0,0 +1,201 @@
+import datetime
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .task import Task
+
+logger = logging.getLogger(__name__)
+
+# Options not having any effect on the result of a task
+IGNORED_OPTIONS = {
+    "loggernamespace",
+    "progress",
+    "showprogress",
+    "verbose",
+    "fail_on_exception",
+    "keep_going",
+    "cache_dir",
+    "journal_dir",
+    "resume",
+    "metrics",
+    "trace",
+    "profile",
+    "profile_mode",
+}
+
+
+class ResultCache:
+    """Content-addressed cache of results of tasks, stored on local disk.
+
+    Results are pickled in `directory`, in a file named after a hash of:
+    - the class of the task
+    - the source code of the class (and of its parents), so results are invalidated when the code changes
+    - the options of the task (except the ones in `IGNORED_OPTIONS`), including its date
+
+    Entries not used for more than `max_age` are evicted, then the least recently used entries are evicted
+    until the cache is smaller than `max_size`.
+
+    Usage: see `Task.cacheable`.
+    """
+
+    MAX_SIZE = 1024**3  # Default maximum size of the cache, in bytes
+    MAX_AGE: Optional[float] = 7 * 24 * 3600  # Default maximum age of entries, in seconds
+
+    def __init__(
+        self, directory: str, max_size: Optional[int] = None, max_age: Optional[float] = None
+    ) -> None:
+        """Initializes the cache.
+
+        Args:
+        - directory (str): Directory where results are stored (created if needed)
+        - max_size (int, optional): Maximum size of the cache, in bytes. Defaults to `MAX_SIZE`.
+        - max_age (float, optional): Maximum age of entries, in seconds. Defaults to `MAX_AGE`.
+        """
+        self.directory = directory
+        self.max_size = max_size if max_size is not None else self.MAX_SIZE
+        self.max_age = max_age if max_age is not None else self.MAX_AGE
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(cls: type) -> str:
+        """Computes a fingerprint of the code of a task class and its parents (except `simpletasks` ones)."""
+        h = hashlib.sha256()
+        for klass in inspect.getmro(cls):
+            if klass is object or klass.__module__.startswith("simpletasks."):
+                continue
+            h.update("{}.{}".format(klass.__module__, klass.__qualname__).encode())
+            try:
+                h.update(inspect.getsource(klass).encode())
+            except (OSError, TypeError):
+                # Source not available (e.g. dynamically created class), use bytecode instead
+                for value in vars(klass).values():
+                    code = getattr(value, "__code__", None)
+                    if code is not None:
+                        h.update(code.co_code)
+        return h.hexdigest()
+
+    def key(self, task: "Task") -> Optional[str]:
+        """Computes the key of a task, from its class, its code, its options and its inputs (results of its
+        predecessors).
+
+        Args:
+        - task (Task): Task
+
+        Returns:
+        - Optional[str]: Key, or None if the inputs cannot be pickled (the task cannot be cached)
+        """
+        options = {k: v for k, v in task.options.items() if k not in IGNORED_OPTIONS}
+        options["date"] = task.date
+        options["timestamp"] = task.timestamp
+
+        def _default(o: Any) -> str:
+            if isinstance(o, (datetime.date, datetime.datetime)):
+                return o.isoformat()
+            return repr(o)
+
+        h = hashlib.sha256()
+        h.update(self.fingerprint(task.__class__).encode())
+        h.update(json.dumps(options, sort_keys=True, default=_default).encode())
+        if task.inputs:
+            try:
+                h.update(pickle.dumps(sorted(task.inputs.items(), key=lambda x: repr(x[0]))))
+            except Exception as e:
+                logger.warning("Could not hash inputs, not using the cache: {}".format(e))
+                return None
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pickle")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Gets a result from the cache.
+
+        Args:
+        - key (str): Key, see `key()`
+
+        Returns:
+        - Tuple[bool, Any]: Whether the result was found, and the result
+        """
+        path = self._path(key)
+        try:
+            if self.max_age is not None and os.path.getmtime(path) < time.time() - self.max_age:
+                return False, None
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logger.warning("Could not read cache entry {}: {}".format(path, e))
+            return False, None
+
+        # Mark as recently used
+        os.utime(path)
+        return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores a result in the cache, then evicts entries if needed.
+
+        Results that cannot be pickled are not stored.
+
+        Args:
+        - key (str): Key, see `key()`
+        - value (Any): Result
+        """
+        try:
+            data = pickle.dumps(value)
+        except Exception as e:
+            logger.warning("Could not cache result: {}".format(e))
+            return
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        """Removes a result from the cache, if present.
+
+        Args:
+        - key (str): Key, see `key()`
+        """
+        self._remove(self._path(key))
+
+    def evict(self) -> None:
+        """Evicts entries too old, then the least recently used ones until the cache is small enough."""
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pickle"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if self.max_age is not None and stat.st_mtime < now - self.max_age:
+                self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(x[1] for x in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            self._remove(path)
+            size -= entry_size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Already evicted by another task
+            pass
@@ -1,8 +1,12 @@
 import datetime
-from typing import Any, Callable, List, Optional, Type, TypeVar
+import importlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
 import click
 
+from .asynctask import AsyncTask
+from .partitions import DatePartitions, parseDateRange
 from .task import Task
 
 _F = TypeVar("_F")
@@ -64,6 +68,49 @@ class CliParams:
         """
         return click.option("--date", default=None, help="Date YYYY-MM-DD", callback=CliParams._validate_date)
 
+    @staticmethod
+    def _validate_date_range(ctx, param, value: str) -> Optional[Tuple[datetime.date, datetime.date]]:
+        if not value:
+            return None
+
+        try:
+            return parseDateRange(value)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+
+    @staticmethod
+    def date_range() -> _click_parameter:
+        """Adds a date-range option, to run the task once per date of the range (see `DatePartitions`).
+
+        Each run gets its own `self.date`. Use with `CliParams.parallel()` to run several dates concurrently,
+        and with `CliParams.journal_dir()`/`CliParams.resume()` to only run again the dates that failed.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--date-range",
+            default=None,
+            metavar="START:END",
+            help="Run for each date YYYY-MM-DD:YYYY-MM-DD",
+            callback=CliParams._validate_date_range,
+        )
+
+    @staticmethod
+    def parallel() -> _click_parameter:
+        """Adds a parallel option (defaults to 1): number of dates of `CliParams.date_range()` run concurrently.
+        Can only be used with `CliParams.date_range()`.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--parallel",
+            type=click.IntRange(min=1),
+            default=None,
+            help="Dates run concurrently with --date-range",
+        )
+
     @staticmethod
     def timestamp_deprecated() -> _click_parameter:
         return click.option("--timestamp", default=None, help="Date YYYY-MM-DD")
@@ -143,6 +190,125 @@ class CliParams:
             help="Fail and exit task on exception",
         )
 
+    @staticmethod
+    def keep_going() -> _click_parameter:
+        """Adds a keep-going/no-keep-going option (defaults to `False`).
+
+        This is useful only for `Orchestrator`: when a task fails, only the tasks depending on it are skipped,
+        and all other tasks keep being processed.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--keep-going/--no-keep-going",
+            "-k/ ",
+            is_flag=True,
+            default=False,
+            help="Keep running tasks not depending on a failed task",
+        )
+
+    @staticmethod
+    def cache_dir() -> _click_parameter:
+        """Adds a cache-dir option (defaults to no cache).
+
+        When provided, results of tasks having `cacheable = True` are stored in this directory, and reused when
+        running these tasks again with the same options.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--cache-dir", default=None, type=click.Path(file_okay=False), help="Directory to cache results"
+        )
+
+    @staticmethod
+    def journal_dir() -> _click_parameter:
+        """Adds a journal-dir option (defaults to no journal).
+
+        This is useful only for `Orchestrator`: when provided, finished tasks are recorded in a journal in this
+        directory, so the run can be resumed if interrupted (see `CliParams.resume()`).
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--journal-dir", default=None, type=click.Path(file_okay=False), help="Directory of run journals"
+        )
+
+    @staticmethod
+    def resume() -> _click_parameter:
+        """Adds a resume option (defaults to `None`).
+
+        This is useful only for `Orchestrator`: resumes an interrupted run from its journal, only running the
+        tasks that did not complete. Requires `CliParams.journal_dir()`.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option("--resume", default=None, metavar="RUN_ID", help="Resume an interrupted run")
+
+    @staticmethod
+    def metrics() -> _click_parameter:
+        """Adds a metrics option (defaults to `None`).
+
+        When provided, a summary of the durations and resources used by the task and its subtasks is logged at
+        the end of the run, and the measures are written in JSON to this file (see `MetricsRegistry`).
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--metrics", default=None, type=click.Path(dir_okay=False), help="File to write measures of tasks"
+        )
+
+    @staticmethod
+    def trace() -> _click_parameter:
+        """Adds a trace option (defaults to `None`).
+
+        This is useful only for `Orchestrator`: when provided, a timeline of the run is written to this file in
+        Chrome Trace Event format (see `TraceRecorder`), and the utilization of the threads is logged.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--trace", default=None, type=click.Path(dir_okay=False), help="File to write a timeline"
+        )
+
+    @staticmethod
+    def profile() -> _click_parameter:
+        """Adds a profile option (defaults to `None`).
+
+        When provided, the task is profiled and its profile is written to this directory, in a file named after
+        the logger namespace of the task. Tasks of `Pipeline` and `Orchestrator` are profiled separately (not
+        the `Pipeline` or `Orchestrator` itself), except coroutines of `AsyncTask`. See
+        `CliParams.profile_mode()`.
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--profile", default=None, type=click.Path(file_okay=False), help="Directory to write profiles"
+        )
+
+    @staticmethod
+    def profile_mode() -> _click_parameter:
+        """Adds a profile-mode option (defaults to "cprofile").
+
+        - "cprofile": deterministic profiling with cProfile, written to `.prof` files (e.g. for snakeviz)
+        - "sampling": low-overhead sampling of stacks, written to `.collapsed` files (e.g. for flamegraph.pl)
+
+        Returns:
+        - _click_parameter: parameter
+        """
+        return click.option(
+            "--profile-mode",
+            type=click.Choice(["cprofile", "sampling"]),
+            default="cprofile",
+            help="Profiler used with --profile",
+        )
+
 
 class Cli(object):
     """Decorator to automatically create a Click command from a `Task` object.
@@ -204,7 +370,20 @@ class Cli(object):
         @self.task_options
         def func(**kwargs):
             # print("I am the '{}' command, ran with arguments: {}".format(c, kwargs))
-            return cls(**kwargs).run()
+            date_range = kwargs.pop("date_range", None)
+            parallel = kwargs.pop("parallel", None)
+            if parallel is not None and not date_range:
+                raise click.UsageError("--parallel can only be used with --date-range")
+            if date_range:
+                if kwargs.get("date", None):
+                    raise click.UsageError("--date and --date-range cannot be used together")
+                task = DatePartitions.of(cls)(date_range=date_range, parallel=parallel, **kwargs)
+            else:
+                task = cls(**kwargs)
+            if isinstance(task, AsyncTask):
+                return task.runSync()
+            else:
+                return task.run()
 
         func.__name__ = name
         return func
@@ -217,5 +396,174 @@ class Cli(object):
             name = cls.__name__.replace("Task", "").lower()
 
         f = self.bind_function("_f", name, cls)
-        _f = self.group.command(name=name, **self.args)(f)  # noqa: F841
+        _f = self.group.command(name=name, **self.args)(f)
+        _f.task = cls  # type: ignore  # See LazyGroup.writeManifest()
         return cls
+
+
+class _LazyCommand(click.Command):
+    """Command of a `LazyGroup` whose help is read from the manifest: its task is only imported when the command
+    is run, not when its help is shown."""
+
+    def __init__(self, group: "LazyGroup", name: str, spec: Dict[str, Any]) -> None:
+        super().__init__(name, help=spec.get("description", ""), short_help=spec.get("help", ""))
+        self.group = group
+        self.spec_name = name
+        self.spec = spec
+
+    def format_usage(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        formatter.write_usage(ctx.command_path, self.spec.get("usage", ""))
+
+    def format_options(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        rows = [(term, description) for term, description in self.spec["params"]]
+        if rows:
+            with formatter.section("Options"):
+                formatter.write_dl(rows)
+
+    def make_context(
+        self, info_name: Optional[str], args: List[str], parent: Optional[click.Context] = None, **extra: Any
+    ) -> click.Context:
+        help_options = parent.help_option_names if parent is not None else ["--help"]
+        options = args[: args.index("--")] if "--" in args else args
+        if any(arg in help_options for arg in options):
+            ctx = click.Context(self, info_name=info_name, parent=parent)
+            click.echo(self.get_help(ctx), color=ctx.color)
+            ctx.exit()
+        command = self.group._loadCommand(self.spec_name)
+        return command.make_context(info_name, args, parent=parent, **extra)
+
+
+class LazyGroup(click.Group):
+    """Click group whose commands are only imported when invoked, so startup time does not depend on the
+    number of tasks (and on their dependencies).
+
+    Commands are declared by the dotted path of their task (`module:Class`), along with their short help:
+    ```
+    cli = LazyGroup(manifest="commands.json")
+    cli.addLazyCommand("mytask", "mymodule.tasks:MyTask", help="Does stuff")
+    ```
+
+    Tasks should be decorated with `@Cli(cli, ...)` on this group: the command is registered when its module is
+    imported. Otherwise, a command with the default parameters of `Cli` is created.
+
+    The manifest can be generated from a group whose tasks are all imported (e.g. at build time), see
+    `writeManifest()`. It also stores the usage, the description and the options of the commands, so their
+    help (`mytool mytask --help`) is shown without importing their task:
+    ```
+    {"mytask": {"task": "mymodule.tasks:MyTask", "help": "Does stuff", "usage": "[OPTIONS] NAME",
+                "description": "Does stuff.", "params": [["--dryrun", "Dry run"], ...]}}
+    ```
+    """
+
+    def __init__(self, name: Optional[str] = None, manifest: Optional[str] = None, **attrs: Any) -> None:
+        """Creates the group.
+
+        Args:
+        - name (str, optional): Name of the group
+        - manifest (str, optional): Path of a JSON manifest of lazy commands
+        - attrs: Other parameters to pass to `click.Group`
+        """
+        super().__init__(name, **attrs)
+        self.lazy_commands: Dict[str, Dict[str, Any]] = {}
+        if manifest:
+            with open(manifest) as f:
+                for command, value in json.load(f).items():
+                    self.addLazyCommand(
+                        command,
+                        value["task"],
+                        value.get("help", ""),
+                        value.get("params", None),
+                        value.get("usage", ""),
+                        value.get("description", ""),
+                    )
+
+    def addLazyCommand(
+        self,
+        name: str,
+        path: str,
+        help: str = "",
+        params: Optional[List[List[str]]] = None,
+        usage: str = "",
+        description: str = "",
+    ) -> None:
+        """Declares a command without importing its task.
+
+        Args:
+        - name (str): Name of the command
+        - path (str): Dotted path of the task, e.g. `mymodule.tasks:MyTask`
+        - help (str, optional): Short help of the command, shown in the help of the group. Defaults to "".
+        - params (List[List[str]], optional): Options and their help, shown in the help of the command without importing its task. Defaults to importing the task to show its help.
+        - usage (str, optional): Usage of the command (e.g. `[OPTIONS] NAME`), with `params`. Defaults to "".
+        - description (str, optional): Help of the command, with `params`. Defaults to "".
+        """
+        self.lazy_commands[name] = {"task": path, "help": help}
+        if params is not None:
+            self.lazy_commands[name].update({"params": params, "usage": usage, "description": description})
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def _loadCommand(self, cmd_name: str) -> click.Command:
+        """Imports the task of a lazy command, and returns its command."""
+        if cmd_name not in self.commands:
+            module, _, qualname = self.lazy_commands[cmd_name]["task"].partition(":")
+            cls: Any = importlib.import_module(module)
+            for attr in qualname.split("."):
+                cls = getattr(cls, attr)
+            if cmd_name not in self.commands:
+                # Task not decorated with `Cli` on this group
+                Cli(self, cmd_name)(cls)
+        return self.commands[cmd_name]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            if "params" in self.lazy_commands[cmd_name]:
+                return _LazyCommand(self, cmd_name, self.lazy_commands[cmd_name])
+            return self._loadCommand(cmd_name)
+        return self.commands.get(cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        # Same as `click.MultiCommand.format_commands()`, without importing lazy commands
+        rows = []
+        limit = formatter.width - 6 - max([len(x) for x in self.list_commands(ctx)], default=0)
+        for name in self.list_commands(ctx):
+            command = self.commands.get(name)
+            if command is None:
+                rows.append((name, self.lazy_commands[name]["help"]))
+            elif not command.hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    @staticmethod
+    def writeManifest(group: click.Group, path: str) -> None:
+        """Writes the manifest of the commands of a group created by `Cli` (and of its lazy commands), to be used
+        by a `LazyGroup`.
+
+        Usage:
+        ```
+        python -c "from mymodule.cli import cli; from simpletasks.cli import LazyGroup; LazyGroup.writeManifest(cli, 'commands.json')"
+        ```
+
+        Args:
+        - group (click.Group): Group whose tasks are imported
+        - path (str): Path of the JSON manifest
+        """
+        manifest = dict(getattr(group, "lazy_commands", {}))
+        for name, command in group.commands.items():
+            task = getattr(command, "task", None)
+            if task is None:
+                continue
+            if "<locals>" in task.__qualname__:
+                raise ValueError("Task {} cannot be imported by path".format(task.__qualname__))
+            ctx = click.Context(command, info_name=name)
+            manifest[name] = {
+                "task": "{}:{}".format(task.__module__, task.__qualname__),
+                "help": command.get_short_help_str(),
+                "usage": " ".join(command.collect_usage_pieces(ctx)),
+                "description": command.help or "",
+                "params": [list(x) for x in (p.get_help_record(ctx) for p in command.get_params(ctx)) if x],
+            }
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable
+
+from .graph import _TKey, taskPath
+
+
+class CostHistory:
+    """Durations of tasks measured during previous runs, persisted in a JSON file.
+
+    Used by `Orchestrator` to estimate the cost of tasks not having a `cost` hint.
+
+    Usage:
+    ```
+    history = CostHistory("costs.json")
+    history.record(MyTask, 12.3)
+    history.save()
+    ```
+    """
+
+    def __init__(self, path: str, smoothing: float = 0.5) -> None:
+        """Loads the history from `path` (if the file exists).
+
+        Args:
+        - path (str): Path of the JSON file
+        - smoothing (float, optional): Weight of the last measure in the estimated cost. Defaults to 0.5.
+        """
+        self.path = path
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.durations: Dict[str, float] = {}
+
+        if os.path.exists(path):
+            with open(path) as f:
+                self.durations = json.load(f)
+
+    def costs(self, tasks: Iterable[_TKey]) -> Dict[_TKey, float]:
+        """Returns the estimated costs of the tasks that have already been measured.
+
+        Args:
+        - tasks (Iterable[_TKey]): Tasks
+
+        Returns:
+        - Dict[_TKey, float]: Estimated cost (in seconds) of each task
+        """
+        return {task: self.durations[taskPath(task)] for task in tasks if taskPath(task) in self.durations}
+
+    def record(self, task: _TKey, duration: float) -> None:
+        """Records the duration of a task (thread-safe).
+
+        Args:
+        - task (_TKey): Task
+        - duration (float): Duration of the task (in seconds)
+        """
+        key = taskPath(task)
+        with self.lock:
+            if key in self.durations:
+                duration = self.smoothing * duration + (1 - self.smoothing) * self.durations[key]
+            self.durations[key] = duration
+
+    def save(self) -> None:
+        with self.lock:
+            with open(self.path, "w") as f:
+                json.dump(self.durations, f, indent=2, sort_keys=True)
@@ -0,0 +1,361 @@
+import collections
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Set, Tuple, Type, Union
+
+from .task import Task
+
+_TTask = Type[Task]
+_Args = Dict[str, Any]
+_Hints = Dict[str, Any]
+Tasks = Dict[_TTask, Union[Tuple[Sequence[_TTask], _Args], Tuple[Sequence[_TTask], _Args, _Hints]]]
+
+
+class TaskKey:
+    """Key of a task submitted while an `Orchestrator` runs (see `Orchestrator.submit()`): its class, and a
+    name distinguishing it from other tasks of the same class (e.g. the partition it processes).
+
+    Can be used wherever a task class is used as a key: it is named `Class[name]` and instantiates the class.
+    """
+
+    def __init__(self, task: _TTask, name: str) -> None:
+        self.task = task
+        self.name = name
+        self.__name__ = "{}[{}]".format(task.__name__, name)
+
+    def __call__(self, **kwargs: Any) -> Task:
+        return self.task(**kwargs)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, TaskKey) and self.task is other.task and self.name == other.name
+
+    def __hash__(self) -> int:
+        return hash((self.task, self.name))
+
+    def __repr__(self) -> str:
+        return "TaskKey({}, {!r})".format(self.task.__name__, self.name)
+
+
+_TKey = Union[_TTask, TaskKey]
+
+
+def taskClass(task: _TKey) -> _TTask:
+    """Returns the class of a task, for keys of submitted tasks too."""
+    return task.task if isinstance(task, TaskKey) else task
+
+
+def taskPath(task: _TKey) -> str:
+    """Returns the dotted path of a task class (module and qualified name), e.g. `mymodule.MyTask`, followed
+    by the name of submitted tasks, e.g. `mymodule.MyTask[2020-01-01]`."""
+    if isinstance(task, TaskKey):
+        return "{}[{}]".format(taskPath(task.task), task.name)
+    return "{}.{}".format(task.__module__, task.__qualname__)
+
+
+# Options of orchestrators not passed to their subtasks
+ORCHESTRATOR_OPTIONS = {"journal_dir", "resume", "metrics", "trace"}
+
+
+def buildArgs(args: Mapping[str, Any], taskArgs: Mapping[str, Any], loggernamespace: str) -> _Args:
+    """Builds the options of a subtask, from the options of its parent and its own options.
+
+    Values are not copied: they are shared by all the subtasks (see `Task.copy_options`).
+
+    Args:
+    - args (Mapping[str, Any]): Options of the parent task (shared by all subtasks)
+    - taskArgs (Mapping[str, Any]): Options specific to the subtask (take precedence over `args`)
+    - loggernamespace (str): Logger namespace of the subtask, if not already provided in options
+
+    Returns:
+    - _Args: Options to instantiate the subtask with
+    """
+    res = dict(args)
+    res.update(taskArgs)
+    res.setdefault("loggernamespace", loggernamespace)
+    return res
+
+
+class TaskGraph:
+    """Dependency graph of tasks, used by `Orchestrator` to know which tasks can be started.
+
+    A successor index and a counter of unfinished predecessors are computed once for each task, so
+    completing a task only touches its direct successors, and picking the next ready task is O(log n).
+
+    When `priority` is set, ready tasks are picked by decreasing length of the longest path from them to the
+    end of the graph (critical path), weighting each task by its cost. Otherwise they are picked in the order
+    they became ready.
+
+    Usage:
+    ```
+    graph = TaskGraph(tasks)
+    task = graph.popReady()
+    ...
+    graph.complete(task)
+    ```
+    """
+
+    DEFAULT_COST = 1.0
+
+    def __init__(
+        self, tasks: Tasks, priority: bool = False, costs: Optional[Dict[_TKey, float]] = None
+    ) -> None:
+        """Builds the graph.
+
+        Predecessors that are not part of `tasks` are counted but will never complete: their successors
+        will remain in the graph forever (see `remaining`).
+
+        Args:
+        - tasks (Tasks): Map of tasks, see `Orchestrator.tasks`
+        - priority (bool, optional): Pick ready tasks on the critical path first. Defaults to False.
+        - costs (Dict[_TKey, float], optional): Costs of tasks not having a `cost` hint (e.g. learnt from
+        previous runs). Defaults to `DEFAULT_COST` for all tasks.
+        """
+        self.args: Dict[_TKey, _Args] = {}
+        self.hints: Dict[_TKey, _Hints] = {}
+        self.predecessors: Dict[_TKey, Sequence[_TKey]] = {}
+        self.successors: Dict[_TKey, List[_TKey]] = {}
+        self.indegree: Dict[_TKey, int] = {}
+        self.rank: Dict[_TKey, float] = {}
+        self.results: Dict[_TKey, Any] = {}
+        self._consumers: Dict[_TKey, int] = {}
+        self.ready: List[Tuple[float, int, _TKey]] = []
+        self.blocked: Dict[Any, List[Tuple[float, int, _TKey]]] = {}  # Rejected by `popReady()`, by group
+        self.readyAt: Dict[_TKey, float] = {}  # Time (timestamp) at which tasks became ready
+        self.completed: Set[_TKey] = set()
+        self.priority = priority
+        self._counter = itertools.count()
+
+        task: _TKey
+        for task, value in tasks.items():
+            predecessors, args = value[0], value[1]
+            self.args[task] = args
+            self.predecessors[task] = predecessors
+            self.hints[task] = value[2] if len(value) > 2 else {}  # type: ignore
+            self.indegree[task] = len(predecessors)
+            for predecessor in predecessors:
+                self.successors.setdefault(predecessor, []).append(task)
+
+        if priority:
+            self._computeRanks(costs or {})
+
+        for task, indegree in self.indegree.items():
+            if indegree == 0:
+                self._pushReady(task)
+
+    def _computeRanks(self, costs: Dict[_TKey, float]) -> None:
+        # Topological order (tasks that can never be started are left out)
+        indegree = dict(self.indegree)
+        order: Deque[_TKey] = collections.deque(task for task, value in indegree.items() if value == 0)
+        ordered = []
+        while order:
+            task = order.popleft()
+            ordered.append(task)
+            for successor in self.successors.get(task, []):
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    order.append(successor)
+
+        for task in reversed(ordered):
+            cost = self.hints[task].get("cost", costs.get(task, self.DEFAULT_COST))
+            self.rank[task] = cost + max(
+                [self.rank.get(x, 0.0) for x in self.successors.get(task, [])], default=0.0
+            )
+
+    def add(
+        self,
+        task: _TKey,
+        predecessors: Sequence[_TKey],
+        args: _Args,
+        hints: Optional[_Hints] = None,
+        cost: Optional[float] = None,
+    ) -> None:
+        """Adds a task to the graph after it was built (e.g. while tasks are running).
+
+        Predecessors already completed are not waited for, and their results are not available to the task.
+        With `priority`, the rank of the task is its own cost: ranks of its predecessors are not updated.
+
+        Args:
+        - task (_TKey): Task to add
+        - predecessors (Sequence[_TKey]): Predecessors of the task, already in the graph
+        - args (_Args): Options of the task
+        - hints (_Hints, optional): Scheduling hints, see `Orchestrator.tasks`. Defaults to None.
+        - cost (float, optional): Cost of the task if it has no `cost` hint. Defaults to `DEFAULT_COST`.
+
+        Raises:
+        - ValueError: If the task is already in the graph, or a predecessor is not
+        """
+        if task in self.args:
+            raise ValueError("Task {} is already in the graph".format(task.__name__))
+        for predecessor in predecessors:
+            if predecessor not in self.args:
+                raise ValueError(
+                    "Unknown predecessor {} of task {}".format(predecessor.__name__, task.__name__)
+                )
+
+        pending = [x for x in predecessors if x not in self.completed]
+        self.args[task] = args
+        # Results of completed predecessors are kept for their declared successors only
+        self.predecessors[task] = pending
+        self.hints[task] = hints or {}
+        self.indegree[task] = len(pending)
+        for predecessor in pending:
+            self.successors.setdefault(predecessor, []).append(task)
+        if self.priority:
+            self.rank[task] = self.hints[task].get("cost", cost if cost is not None else self.DEFAULT_COST)
+
+        if not pending:
+            self._pushReady(task)
+
+    def _pushReady(self, task: _TKey) -> None:
+        self.readyAt[task] = time.time()
+        heapq.heappush(self.ready, (-self.rank.get(task, 0.0), next(self._counter), task))
+
+    def popReady(
+        self, accept: Optional[Callable[[_TKey], bool]] = None, group: Optional[Callable[[_TKey], Any]] = None
+    ) -> Optional[_TKey]:
+        """Removes a task ready to be started from the graph.
+
+        Tasks rejected by `accept` stay ready, and are set aside in groups: tasks of the same group must be
+        accepted or rejected together (e.g. tasks needing the same resources), so only the first task of each
+        group is checked again by the next calls, instead of all rejected tasks.
+
+        Args:
+        - accept (Callable[[_TKey], bool], optional): Filter of the tasks that can be started now (e.g. if
+        enough resources are available), the other ones stay ready. Defaults to all tasks.
+        - group (Callable[[_TKey], Any], optional): Group of a task rejected by `accept`. Defaults to
+        one group per task.
+
+        Returns:
+        - Optional[_TKey]: Task having all its predecessors completed, or None if there is none
+        """
+        # First task of each group of rejected tasks, by priority
+        groups = sorted((entries[0], key) for key, entries in list(self.blocked.items()) if self._clean(key))
+        i = 0
+        while True:
+            while self.ready and self.ready[0][2] not in self.indegree:
+                # Already marked as completed
+                heapq.heappop(self.ready)
+
+            if i < len(groups) and (not self.ready or groups[i][0] < self.ready[0]):
+                key = groups[i][1]
+                i += 1
+                entries = self.blocked[key]
+                if accept is None or accept(entries[0][2]):
+                    entry = heapq.heappop(entries)
+                    if not entries:
+                        del self.blocked[key]
+                    del self.indegree[entry[2]]
+                    return entry[2]
+                continue
+
+            if not self.ready:
+                return None
+            entry = heapq.heappop(self.ready)
+            task = entry[2]
+            if accept is None or accept(task):
+                del self.indegree[task]
+                return task
+            heapq.heappush(self.blocked.setdefault(group(task) if group else task, []), entry)
+
+    def _clean(self, key: Any) -> bool:
+        """Removes tasks already marked as completed from a group of rejected tasks, and returns whether the
+        group still has tasks."""
+        entries = self.blocked[key]
+        while entries and entries[0][2] not in self.indegree:
+            heapq.heappop(entries)
+        if not entries:
+            del self.blocked[key]
+        return bool(entries)
+
+    def complete(self, task: _TKey) -> None:
+        """Marks a task as completed, making its successors ready if it was their last predecessor.
+
+        Args:
+        - task (_TKey): Completed task
+        """
+        self.completed.add(task)
+        for successor in self.successors.get(task, []):
+            if successor not in self.indegree:
+                # Skipped
+                continue
+            self.indegree[successor] -= 1
+            if self.indegree[successor] == 0:
+                self._pushReady(successor)
+
+    def storeResult(self, task: _TKey, result: Any) -> None:
+        """Keeps the result of a completed task until all its successors are started (see `takeInputs()`).
+
+        Results of tasks without successors left to start (e.g. all skipped) are not kept.
+
+        Args:
+        - task (_TKey): Completed task
+        - result (Any): Result of the task
+        """
+        consumers = sum(1 for successor in self.successors.get(task, []) if successor in self.indegree)
+        if consumers > 0:
+            self.results[task] = result
+            self._consumers[task] = consumers
+
+    def takeInputs(self, task: _TKey) -> Dict[_TKey, Any]:
+        """Returns the results of the predecessors of a task being started.
+
+        Results are released once taken by all the successors of their task.
+
+        Args:
+        - task (_TKey): Task being started
+
+        Returns:
+        - Dict[_TKey, Any]: Results of the predecessors (failed predecessors are missing)
+        """
+        inputs = {}
+        for predecessor in self.predecessors.get(task, []):
+            if predecessor in self.results:
+                inputs[predecessor] = self.results[predecessor]
+                self._consumers[predecessor] -= 1
+                if self._consumers[predecessor] == 0:
+                    del self.results[predecessor]
+                    del self._consumers[predecessor]
+        return inputs
+
+    def markCompleted(self, task: _TKey) -> None:
+        """Removes a task from the graph without starting it, and marks it as completed.
+
+        Args:
+        - task (_TKey): Task already completed (e.g. in a previous run)
+        """
+        del self.indegree[task]
+        self.readyAt.pop(task, None)
+        self.complete(task)
+
+    def skip(self, task: _TKey) -> List[_TKey]:
+        """Removes all tasks depending (directly or transitively) on a task from the graph.
+
+        Args:
+        - task (_TKey): Task whose descendants must not be started (typically because it failed)
+
+        Returns:
+        - List[_TKey]: Tasks removed from the graph
+        """
+        skipped = []
+        stack = [task]
+        while stack:
+            for successor in self.successors.get(stack.pop(), []):
+                if successor in self.indegree:
+                    del self.indegree[successor]
+                    self.takeInputs(successor)
+                    skipped.append(successor)
+                    stack.append(successor)
+        return skipped
+
+    @property
+    def remaining(self) -> List[_TKey]:
+        """Tasks not started yet (either ready, or waiting for predecessors).
+
+        Returns:
+        - List[_TKey]: Tasks not started yet
+        """
+        return list(self.indegree.keys())
+
+    def __len__(self) -> int:
+        return len(self.indegree)
@@ -0,0 +1,105 @@
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+from typing import Any, Set, Tuple
+
+from .cache import ResultCache
+from .graph import _TKey, taskPath
+
+
+class Journal:
+    """Append-only JSONL file recording the tasks of an `Orchestrator` run as they finish.
+
+    Each line is a record such as:
+    ```
+    {"task": "mymodule.MyTask", "status": "completed", "time": "2020-01-01T00:00:00"}
+    ```
+
+    When a run is interrupted, the journal can be read again to only run the tasks that did not complete.
+    Results of completed tasks can be stored along the journal (in a directory named after the run), so the
+    tasks depending on them still get them when the run is resumed.
+    """
+
+    def __init__(self, directory: str, run_id: str) -> None:
+        """Opens the journal of a run (created if needed).
+
+        Args:
+        - directory (str): Directory of journals
+        - run_id (str): Identifier of the run, see `newRunId()`
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.run_id = run_id
+        self.path = os.path.join(directory, run_id + ".jsonl")
+        self.lock = threading.Lock()
+        # Results are kept as long as the journal, never evicted
+        self.results = ResultCache(
+            os.path.join(directory, run_id), max_size=sys.maxsize, max_age=float("inf")
+        )
+
+    @staticmethod
+    def newRunId() -> str:
+        return "{:%Y%m%d-%H%M%S}-{}".format(datetime.datetime.now(), uuid.uuid4().hex[:8])
+
+    def append(self, task: _TKey, status: str) -> None:
+        """Records the end of a task (thread-safe). The record is flushed to disk immediately.
+
+        Args:
+        - task (_TKey): Task
+        - status (str): Either "completed" or "failed"
+        """
+        record = {"task": taskPath(task), "status": status, "time": datetime.datetime.now().isoformat()}
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _resultKey(task: _TKey) -> str:
+        return hashlib.sha256(taskPath(task).encode()).hexdigest()
+
+    def storeResult(self, task: _TKey, result: Any) -> None:
+        """Stores the result of a completed task, to be loaded when the run is resumed. Results that cannot be
+        pickled are not stored.
+
+        Args:
+        - task (_TKey): Task
+        - result (Any): Result of the task
+        """
+        self.results.set(self._resultKey(task), result)
+
+    def loadResult(self, task: _TKey) -> Tuple[bool, Any]:
+        """Loads the result of a task completed in the run.
+
+        Args:
+        - task (_TKey): Task
+
+        Returns:
+        - Tuple[bool, Any]: Whether the result was stored, and the result
+        """
+        return self.results.get(self._resultKey(task))
+
+    def completed(self) -> Set[str]:
+        """Reads the tasks completed in the run.
+
+        Returns:
+        - Set[str]: Dotted paths of the completed tasks
+        """
+        if not os.path.exists(self.path):
+            raise ValueError("No journal for run {}".format(self.run_id))
+
+        res = set()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Last line may be truncated if the process was killed while writing it
+                    continue
+                if record["status"] == "completed":
+                    res.add(record["task"])
+        return res
@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, ClassVar, Dict, Optional, Sequence, Type, TypeVar
+
+X = TypeVar("X")
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of calls, shared by all the threads (and coroutines) of the process.
+
+    Tokens are added at `rate` per second, up to `burst` tokens. Each call takes a token, waiting for it if
+    the bucket is empty. Waiting calls are served in order.
+
+    Usage:
+    ```
+    limiter = RateLimiter.get("my-api", rate=10)  # Same instance for all tasks using "my-api"
+    res = self.execute(lambda: api.get(url), limiter=limiter)
+    ```
+    """
+
+    _registry: ClassVar[Dict[str, "RateLimiter"]] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        """Initializes a full bucket.
+
+        Args:
+        - rate (float): Number of calls per second
+        - burst (float, optional): Maximum number of calls without waiting. Defaults to `rate` (at least 1).
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive: {}".format(rate))
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    @classmethod
+    def get(cls, name: str, rate: float, burst: Optional[float] = None) -> "RateLimiter":
+        """Returns the limiter named `name`, creating it on first call (later calls do not change its rate).
+
+        Args:
+        - name (str): Name of the limiter, e.g. of the backend it protects
+        - rate (float): Number of calls per second
+        - burst (float, optional): Maximum number of calls without waiting. Defaults to `rate` (at least 1).
+
+        Returns:
+        - RateLimiter: Limiter shared by the process
+        """
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls(rate, burst)
+            return cls._registry[name]
+
+    def _refill(self) -> None:
+        """Not thread-safe, must be guarded"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, tokens: float) -> float:
+        # Takes tokens (possibly in advance) and returns the delay before they are available
+        with self.lock:
+            self._refill()
+            self._tokens -= tokens
+            return max(-self._tokens / self.rate, 0.0)
+
+    def tryAcquire(self, tokens: float = 1) -> bool:
+        """Takes tokens if they are available now.
+
+        Args:
+        - tokens (float, optional): Number of tokens. Defaults to 1.
+
+        Returns:
+        - bool: Whether tokens were taken
+        """
+        with self.lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens: float = 1, sleep: Callable[[float], None] = time.sleep) -> float:
+        """Takes tokens, waiting until they are available.
+
+        Args:
+        - tokens (float, optional): Number of tokens. Defaults to 1.
+        - sleep (Callable[[float], None], optional): Function to wait. Defaults to `time.sleep`.
+
+        Returns:
+        - float: Time waited (in seconds)
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            sleep(delay)
+        return delay
+
+    async def acquireAsync(self, tokens: float = 1) -> float:
+        """Takes tokens, waiting until they are available without blocking the event loop.
+
+        Args:
+        - tokens (float, optional): Number of tokens. Defaults to 1.
+
+        Returns:
+        - float: Time waited (in seconds)
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a backend while its circuit breaker is open."""
+
+    pass
+
+
+class CircuitBreaker:
+    """Circuit breaker stopping calls to a failing backend, shared by all the threads (and coroutines) of the
+    process.
+
+    After `threshold` consecutive failures, the circuit opens: calls fail immediately with `CircuitOpen` for
+    `reset_timeout` seconds. Then a single trial call is let through (the circuit is "half-open"): the circuit
+    closes if it succeeds and opens again if it fails.
+
+    Usage:
+    ```
+    breaker = CircuitBreaker.get("my-api", threshold=5, reset_timeout=30)
+    res = self.executeOrRetry(lambda: api.get(url), breaker=breaker)
+    ```
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    _registry: ClassVar[Dict[str, "CircuitBreaker"]] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        reset_timeout: float = 30,
+        failure_on: Sequence[Type[Exception]] = (Exception,),
+    ) -> None:
+        """Initializes a closed circuit.
+
+        Args:
+        - threshold (int, optional): Number of consecutive failures opening the circuit. Defaults to 5.
+        - reset_timeout (float, optional): Duration the circuit stays open before a trial call (in seconds). Defaults to 30.
+        - failure_on (Sequence[Type[Exception]], optional): Exceptions counted as failures of the backend, others count as successes. Defaults to all exceptions.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failure_on = tuple(failure_on)
+        self.lock = threading.Lock()
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @classmethod
+    def get(
+        cls,
+        name: str,
+        threshold: int = 5,
+        reset_timeout: float = 30,
+        failure_on: Sequence[Type[Exception]] = (Exception,),
+    ) -> "CircuitBreaker":
+        """Returns the circuit breaker named `name`, creating it on first call (later calls do not change its
+        parameters). See `__init__()` for the parameters."""
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls(threshold, reset_timeout, failure_on)
+            return cls._registry[name]
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if self._trial or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def before(self) -> None:
+        """To call before calling the backend.
+
+        Raises:
+        - CircuitOpen: If the circuit is open, or half-open with a trial call in progress
+        """
+        with self.lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if self._trial or remaining > 0:
+                raise CircuitOpen(
+                    "Circuit open after {} failures, retry in {:.0f} seconds".format(
+                        self.failures, max(remaining, 0)
+                    )
+                )
+            self._trial = True
+
+    def after(self, exception: Optional[Exception] = None) -> None:
+        """To call after calling the backend.
+
+        Args:
+        - exception (Exception, optional): Exception raised by the call, if any. Defaults to None.
+        """
+        with self.lock:
+            self._trial = False
+            if exception is None or not isinstance(exception, self.failure_on):
+                self.failures = 0
+                self._opened_at = None
+                return
+            self.failures += 1
+            if self._opened_at is not None or self.failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+    def _cancel(self) -> None:
+        # Call interrupted (e.g. cancelled coroutine): let another trial call through
+        with self.lock:
+            self._trial = False
+
+    def call(self, func: Callable[[], X]) -> X:
+        """Calls `func` through the circuit breaker.
+
+        Raises:
+        - CircuitOpen: If the circuit is open
+
+        Returns:
+        - X: Returned value from the function
+        """
+        self.before()
+        try:
+            res = func()
+        except Exception as e:
+            self.after(e)
+            raise e
+        except BaseException:
+            self._cancel()
+            raise
+        self.after()
+        return res
+
+    async def callAsync(self, func: Callable[[], Awaitable[X]]) -> X:
+        """Awaits the coroutine returned by `func` through the circuit breaker.
+
+        Raises:
+        - CircuitOpen: If the circuit is open
+
+        Returns:
+        - X: Returned value from the coroutine
+        """
+        self.before()
+        try:
+            res = await func()
+        except Exception as e:
+            self.after(e)
+            raise e
+        except BaseException:
+            self._cancel()
+            raise
+        self.after()
+        return res
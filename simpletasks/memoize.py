@@ -0,0 +1,293 @@
+import collections
+import hashlib
+import pickle
+import threading
+import time
+import types
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .cache import ResultCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .task import Task
+
+_lock = threading.Lock()  # Guards the creation of caches and the counters of tasks
+
+
+class MemoCache:
+    """Thread-safe in-memory cache of values, bounded in number of entries (least recently used entries are
+    evicted first) and optionally in age.
+
+    Entries evicted because the cache is full can be spilled to disk instead of being dropped (see
+    `ResultCache`): they are loaded back on their next use. Values that cannot be pickled are dropped.
+    """
+
+    def __init__(
+        self, maxsize: int = 128, ttl: Optional[float] = None, spill_dir: Optional[str] = None
+    ) -> None:
+        """Initializes an empty cache.
+
+        Args:
+        - maxsize (int, optional): Maximum number of entries in memory. Defaults to 128.
+        - ttl (float, optional): Duration after which entries expire (in seconds). Defaults to never.
+        - spill_dir (str, optional): Directory where evicted entries are spilled. Defaults to dropping them.
+        """
+        if maxsize < 1:
+            raise ValueError("Size of the cache must be positive: {}".format(maxsize))
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "collections.OrderedDict[Any, Tuple[float, Any]]" = collections.OrderedDict()
+        self._spill = ResultCache(spill_dir, max_age=ttl) if spill_dir else None
+        self._spilled: Set[str] = set()  # Keys on disk (the directory may be shared with other caches)
+        self._token = uuid.uuid4().hex
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _diskKey(self, key: Any) -> str:
+        h = hashlib.sha256(self._token.encode())
+        try:
+            h.update(pickle.dumps(key))
+        except Exception:
+            h.update(repr(key).encode())
+        return h.hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.monotonic() - created >= self.ttl
+
+    def _load(self, key: Any) -> Optional[Tuple[float, Any]]:
+        """Not thread-safe, must be guarded"""
+        if self._spill is None:
+            return None
+        diskkey = self._diskKey(key)
+        if diskkey not in self._spilled:
+            return None
+        self._spilled.discard(diskkey)
+        found, entry = self._spill.get(diskkey)
+        self._spill.delete(diskkey)
+        if not found:
+            return None
+        # Creation time is stored in wall-clock time on disk
+        created, value = entry
+        return time.monotonic() - (time.time() - created), value
+
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        """Gets a value from the cache.
+
+        Args:
+        - key (Any): Key (hashable)
+
+        Returns:
+        - Tuple[bool, Any]: Whether the value was found, and the value
+        """
+        with self.lock:
+            entry = self._entries.pop(key, None) or self._load(key)
+            if entry is None or self._expired(entry[0]):
+                self.misses += 1
+                return False, None
+            self._entries[key] = entry  # Most recently used
+            self._evict()
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        """Stores a value in the cache, then evicts entries if needed.
+
+        Args:
+        - key (Any): Key (hashable)
+        - value (Any): Value
+        """
+        with self.lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Not thread-safe, must be guarded"""
+        while len(self._entries) > self.maxsize:
+            key, (created, value) = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._spill is not None and not self._expired(created):
+                diskkey = self._diskKey(key)
+                self._spill.set(diskkey, (time.time() - (time.monotonic() - created), value))
+                self._spilled.add(diskkey)
+
+    def clear(self) -> None:
+        """Removes all entries, including the ones spilled to disk."""
+        with self.lock:
+            self._entries.clear()
+            if self._spill is not None:
+                for diskkey in self._spilled:
+                    self._spill.delete(diskkey)
+            self._spilled.clear()
+
+
+class _TaskMemo:
+    """Caches (with scope "instance") and counters of the memoized methods of a task."""
+
+    def __init__(self) -> None:
+        self.caches: Dict[str, MemoCache] = {}
+        self.counters: Dict[str, List[int]] = {}  # Hits and misses
+
+
+_RUN_CACHES: List[MemoCache] = []  # Caches with scope "run", cleared when no task is running
+_running = 0
+
+
+class Memoized:
+    """Method of a task whose results are cached by arguments, see `memoize()`."""
+
+    SCOPES = ("instance", "class", "run")
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        scope: str = "instance",
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        self.func = func
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.scope = scope
+        self.spill_dir = spill_dir
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+        self._caches: Dict[type, MemoCache] = {}  # With scope "class"
+        self._run_cache: Optional[MemoCache] = None  # With scope "run"
+        if scope == "run":
+            self._run_cache = self._new()
+            _RUN_CACHES.append(self._run_cache)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        if instance is None:
+            return self
+        return types.MethodType(self, instance)
+
+    def _new(self) -> MemoCache:
+        return MemoCache(self.maxsize, self.ttl, self.spill_dir)
+
+    @staticmethod
+    def _memo(task: "Task") -> _TaskMemo:
+        """Not thread-safe, must be guarded"""
+        memo = task._memo
+        if memo is None:
+            memo = task._memo = _TaskMemo()
+        return memo
+
+    def cache(self, task: "Task") -> MemoCache:
+        """Returns the cache used by `task` (depending on the scope).
+
+        Args:
+        - task (Task): Task
+
+        Returns:
+        - MemoCache: Cache
+        """
+        if self._run_cache is not None:
+            return self._run_cache
+        with _lock:
+            if self.scope == "class":
+                if task.__class__ not in self._caches:
+                    self._caches[task.__class__] = self._new()
+                return self._caches[task.__class__]
+            memo = self._memo(task)
+            if self.name not in memo.caches:
+                memo.caches[self.name] = self._new()
+            return memo.caches[self.name]
+
+    def __call__(self, task: "Task", *args: Any, **kwargs: Any) -> Any:
+        key: Any = args
+        if kwargs:
+            key = (args, tuple(sorted(kwargs.items())))
+        cache = self.cache(task)
+        found, res = cache.get(key)
+
+        with _lock:
+            counters = self._memo(task).counters.setdefault(self.name, [0, 0])
+            counters[0 if found else 1] += 1
+        if found:
+            return res
+
+        res = self.func(task, *args, **kwargs)
+        cache.set(key, res)
+        return res
+
+
+def memoize(
+    func: Optional[Callable[..., Any]] = None,
+    maxsize: int = 128,
+    ttl: Optional[float] = None,
+    scope: str = "instance",
+    spill_dir: Optional[str] = None,
+) -> Any:
+    """Decorator caching the results of a method of a task by arguments (which must be hashable). Results may
+    be computed twice if several threads call the method with the same arguments at the same time.
+
+    Usage:
+    ```
+    class MyTask(Task):
+        @Task.memoize
+        def compute(self, n: int) -> int:
+            ...
+
+        @Task.memoize(maxsize=1024, ttl=3600, scope="class")
+        def lookup(self, code: str) -> str:
+            ...
+    ```
+
+    Args:
+    - func (Callable[..., Any], optional): Method, when used without arguments
+    - maxsize (int, optional): Maximum number of results in memory, least recently used are evicted first. Defaults to 128.
+    - ttl (float, optional): Duration after which results expire (in seconds). Defaults to never.
+    - scope (str, optional): "instance" (results shared by calls on the same task), "class" (shared by tasks of the same class) or "run" (shared by all tasks until no task is running anymore, e.g. subtasks of a `Pipeline`). Defaults to "instance".
+    - spill_dir (str, optional): Directory where results evicted from memory are stored until used again (results must be picklable). Defaults to dropping them.
+
+    Raises:
+    - ValueError: Unknown scope
+
+    Returns:
+    - Any: Memoized method, or decorator when called with arguments only
+    """
+    if scope not in Memoized.SCOPES:
+        raise ValueError("Unknown scope: {}".format(scope))
+
+    def _decorator(func: Callable[..., Any]) -> Memoized:
+        return Memoized(func, maxsize, ttl, scope, spill_dir)
+
+    return _decorator(func) if func is not None else _decorator
+
+
+def _onStart(task: "Task") -> None:
+    global _running
+    with _lock:
+        _running += 1
+
+
+def _onEnd(task: "Task", *args: Any) -> None:
+    """Logs the counters of the memoized methods called by the task, and clears the caches with scope "run"
+    at the end of the last running task."""
+    global _running
+    with _lock:
+        memo = task._memo
+        counters = []
+        if memo is not None:
+            counters, memo.counters = sorted(memo.counters.items()), {}
+        _running -= 1
+        ended = _running <= 0
+        _running = max(_running, 0)
+    for name, (hits, misses) in counters:
+        task.logger.info("Memoized {}: {} hits, {} misses".format(name, hits, misses))
+    if ended:
+        for cache in _RUN_CACHES:
+            cache.clear()
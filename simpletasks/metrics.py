@@ -0,0 +1,236 @@
+import collections
+import contextlib
+import json
+import logging
+import sys
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+try:
+    import resource
+
+    _has_resource = True
+except ImportError:
+    # Not available on Windows
+    _has_resource = False
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .task import Task
+
+logger = logging.getLogger(__name__)
+
+# CPU time of the current thread, of the whole process before Python 3.7
+_threadTime = getattr(time, "thread_time", time.process_time)
+
+
+def _peakRss() -> int:
+    """Returns the peak resident set size of the process, in bytes (0 if unknown)."""
+    if not _has_resource:
+        return 0  # pragma: no cover
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # In bytes on macOS, in kilobytes elsewhere
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class TaskMetrics:
+    """Measures of a run of a task."""
+
+    def __init__(
+        self,
+        name: str,
+        task: str,
+        status: str,
+        start: float,
+        wall: float,
+        cpu: float,
+        peak_rss_delta: int,
+        queue_wait: float,
+    ) -> None:
+        """Initializes the measures.
+
+        Args:
+        - name (str): Logger namespace of the task, e.g. `simpletasks.MyOrchestrator.MySubTask`
+        - task (str): Dotted path of the class of the task
+        - status (str): Either "completed" or "failed"
+        - start (float): Start time (timestamp)
+        - wall (float): Duration (in seconds)
+        - cpu (float): CPU time of the thread running the task (in seconds, CPU time of the process before
+        Python 3.7)
+        - peak_rss_delta (int): Growth of the peak resident set size of the process during the run (in bytes)
+        - queue_wait (float): Time between the task being ready (predecessors completed) and its start (in seconds)
+        """
+        self.name = name
+        self.task = task
+        self.status = status
+        self.start = start
+        self.wall = wall
+        self.cpu = cpu
+        self.peak_rss_delta = peak_rss_delta
+        self.queue_wait = queue_wait
+
+    def asDict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class MetricsRegistry:
+    """In-process registry of the measures of all runs of tasks (see `Task.METRICS`).
+
+    `Task.run()` measures the wall time, the CPU time, the growth of the peak RSS and the time spent in the
+    queue of an `Orchestrator` of every task, so subtasks of `Pipeline` and `Orchestrator` are measured too.
+
+    Hooks can be registered to be notified of runs:
+    ```
+    Task.METRICS.on_start.append(lambda task: ...)
+    Task.METRICS.on_finish.append(lambda task, metrics: ...)
+    Task.METRICS.on_error.append(lambda task, metrics, exception: ...)
+    ```
+
+    Hooks are called in the thread (and process) running the task. Exceptions raised by hooks are logged and
+    ignored.
+
+    When tasks are given the `metrics` option (see `CliParams.metrics()`), a summary is logged at the end of
+    the run and the measures are written to this file.
+    """
+
+    MAX_RECORDS = 100000  # Oldest measures are dropped after this number of runs
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.records: Deque[TaskMetrics] = collections.deque(maxlen=self.MAX_RECORDS)
+        self.on_start: List[Callable[["Task"], None]] = []
+        self.on_finish: List[Callable[["Task", TaskMetrics], None]] = []
+        self.on_error: List[Callable[["Task", TaskMetrics, Exception], None]] = []
+
+    @staticmethod
+    def _call(hooks: Iterable[Callable[..., None]], *args: Any) -> None:
+        for hook in hooks:
+            try:
+                hook(*args)
+            except Exception as e:
+                logger.warning("Metrics hook {} failed: {}".format(hook, e))
+
+    @contextlib.contextmanager
+    def measure(self, task: "Task") -> Iterator[Callable[[], ContextManager[None]]]:
+        """Measures the run of a task, calls hooks and records the measures.
+
+        Usage:
+        ```
+        with registry.measure(task) as paused:
+            task.do()
+            with paused():
+                # Not measured
+                ...
+        ```
+
+        Args:
+        - task (Task): Task
+
+        Returns:
+        - Iterator[Callable[[], ContextManager[None]]]: Function returning a context manager excluding its
+        duration from the measures (e.g. while the task waits for the consumer of its items)
+        """
+        self._call(self.on_start, task)
+        start = time.time()
+        wall = time.monotonic()
+        cpu = _threadTime()
+        rss = _peakRss()
+        excluded = [0.0, 0.0]  # Wall and CPU time excluded
+
+        @contextlib.contextmanager
+        def _paused() -> Iterator[None]:
+            pausedWall, pausedCpu = time.monotonic(), _threadTime()
+            try:
+                yield
+            finally:
+                excluded[0] += time.monotonic() - pausedWall
+                excluded[1] += _threadTime() - pausedCpu
+
+        def _record(status: str) -> TaskMetrics:
+            res = TaskMetrics(
+                name=task.loggernamespace,
+                task="{}.{}".format(task.__class__.__module__, task.__class__.__qualname__),
+                status=status,
+                start=start,
+                wall=time.monotonic() - wall - excluded[0],
+                cpu=_threadTime() - cpu - excluded[1],
+                peak_rss_delta=_peakRss() - rss,
+                queue_wait=max(start - task.queued_at, 0.0) if task.queued_at is not None else 0.0,
+            )
+            self.record(res)
+            return res
+
+        try:
+            yield _paused
+        except Exception as e:
+            self._call(self.on_error, task, _record("failed"), e)
+            raise
+        self._call(self.on_finish, task, _record("completed"))
+
+    def record(self, metrics: TaskMetrics) -> None:
+        with self.lock:
+            self.records.append(metrics)
+
+    def since(self, start: float) -> List[TaskMetrics]:
+        """Returns the measures of the runs started after `start` (timestamp)."""
+        with self.lock:
+            return [x for x in self.records if x.start >= start]
+
+    def clear(self) -> List[TaskMetrics]:
+        """Removes all measures from the registry.
+
+        Returns:
+        - List[TaskMetrics]: Removed measures
+        """
+        with self.lock:
+            res = list(self.records)
+            self.records.clear()
+            return res
+
+    def summary(self, records: Optional[List[TaskMetrics]] = None) -> str:
+        """Formats measures as a table, sorted by decreasing wall time.
+
+        Args:
+        - records (List[TaskMetrics], optional): Measures to show. Defaults to all the measures of the registry.
+
+        Returns:
+        - str: Table
+        """
+        if records is None:
+            records = self.since(0)
+        width = max([len(x.name) for x in records] + [4])
+        lines = [
+            "{:<{}} {:>9} {:>10} {:>10} {:>10} {:>12}".format(
+                "task", width, "status", "wall (s)", "cpu (s)", "wait (s)", "rss (MiB)"
+            )
+        ]
+        for x in sorted(records, key=lambda x: x.wall, reverse=True):
+            lines.append(
+                "{:<{}} {:>9} {:>10.3f} {:>10.3f} {:>10.3f} {:>12.1f}".format(
+                    x.name, width, x.status, x.wall, x.cpu, x.queue_wait, x.peak_rss_delta / 1024**2
+                )
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str, records: Optional[List[TaskMetrics]] = None) -> None:
+        """Writes measures to a JSON file.
+
+        Args:
+        - path (str): Path of the file
+        - records (List[TaskMetrics], optional): Measures to write. Defaults to all the measures of the registry.
+        """
+        if records is None:
+            records = self.since(0)
+        with open(path, "w") as f:
+            json.dump([x.asDict() for x in records], f, indent=2)
@@ -1,15 +1,66 @@
 import abc
-import copy
+import concurrent.futures
 import logging
+import pickle
 import queue
 import threading
-from typing import Any, Dict, List, Optional, Tuple, Type
+import time
+import types
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
+from .asynctask import AsyncTask
+from .costs import CostHistory
+from .graph import (
+    ORCHESTRATOR_OPTIONS,
+    Tasks,
+    TaskGraph,
+    TaskKey,
+    _Args,
+    _Hints,
+    _TKey,
+    _TTask,
+    buildArgs,
+    taskPath,
+)
+from .journal import Journal
+from .metrics import TaskMetrics
 from .task import Task
+from .trace import TraceRecorder
 
-_TTask = Type[Task]
-_Args = Dict[str, Any]
-Tasks = Dict[_TTask, Tuple[List[_TTask], _Args]]
+if TYPE_CHECKING:  # pragma: no cover
+    from .broker import Broker
+
+
+def _runTask(
+    task: _TKey,
+    args: _Args,
+    inputs: Dict[_TKey, Any],
+    queued_at: Optional[float] = None,
+    waiter: Optional[Callable[[float], None]] = None,
+    submitter: Optional[Callable[..., _TKey]] = None,
+) -> Any:
+    """Runs a task - defined at module level so it can be sent to a process pool."""
+    t = task(**args)
+    t.inputs = inputs
+    t.queued_at = queued_at
+    t.waiter = waiter
+    t.submitter = submitter
+    if isinstance(t, AsyncTask):
+        return t.runSync()
+    else:
+        return t.run()
+
+
+def _runTaskInProcess(
+    task: _TKey, args: _Args, inputs: Dict[_TKey, Any], queued_at: float
+) -> Tuple[Any, Optional[Exception], List[TaskMetrics]]:
+    """Runs a task in a worker process, and returns its result or exception along with the measures recorded
+    in the process (to be recorded in the registry of the parent process)."""
+    Task.METRICS.clear()
+    try:
+        return _runTask(task, args, inputs, queued_at), None, Task.METRICS.clear()
+    except Exception as e:
+        return None, e, Task.METRICS.clear()
 
 
 class Orchestrator(Task):
@@ -29,17 +80,68 @@ class Orchestrator(Task):
         }
         num_threads = 3
     ```
+
+    The results of the predecessors of a task are available in `self.inputs`, keyed by their class. Results
+    are kept in memory until all the tasks depending on them are started.
+
+    By default tasks are executed in threads. For CPU-bound tasks, `executor = "process"` executes them in a
+    pool of `num_threads` processes instead: tasks must then be defined at module level, and their options
+    as well as their results and exceptions must be picklable.
+
+    With `executor = "broker"`, tasks are published to `broker` (e.g. `SQLiteBroker`) and run by worker
+    processes, possibly on other hosts (see `BrokerWorker`), with the same constraints as processes. At most
+    `num_threads` tasks are published at a time. Tasks not completed after `broker_timeout` fail (and are
+    removed from the broker), so a dead worker does not block the run.
+
+    Ready tasks are started by decreasing length of the longest path from them to the end of the graph
+    (`scheduling = "critical_path"`, weighted by the `cost` hint of tasks), so long chains are not delayed by
+    short independent tasks. Costs of tasks without hints can be learnt from previous runs by setting
+    `cost_history` to the path of a JSON file. `scheduling = "fifo"` starts them in the order they became ready.
+
+    While a task waits between retries (see `Task.sleep()` and `Task.executeOrRetry()`), its thread gives its
+    slot back and another thread is started if needed, so other ready tasks can run meanwhile. The task waits
+    for a free slot to resume, before any new task is started.
+
+    Tasks can declare the resources they need with the `resources` hint, e.g. `{"memory_gb": 8, "db_conn": 1}`:
+    when capacities are set in `resources`, a task is only started once enough of each resource is available,
+    and ready tasks with lower priority but smaller needs are started meanwhile. Resources without capacity are
+    not limited.
+
+    Tasks can be added while running with `submit()`, e.g. by a running subtask (see `Task.submit()`) fanning
+    out over work it discovers, such as one task per input file.
+
+    When the `journal_dir` option is provided (see `CliParams.journal_dir()`), tasks are recorded in a journal
+    of the run as they finish. If the run is interrupted, passing its identifier in the `resume` option (see
+    `CliParams.resume()`) only runs the tasks that did not complete. Results of completed tasks having
+    successors are stored along the journal, so the tasks started when resuming still get them in `inputs`: if
+    a result could not be stored (e.g. it cannot be pickled), a warning is logged and it is missing.
+
+    When the `trace` option is provided (see `CliParams.trace()`), a timeline of the run is written to this
+    file (see `TraceRecorder`) and the utilization of the threads is logged.
     """
 
+    executor = "thread"  # Either "thread", "process" or "broker"
+    broker: Optional["Broker"] = None  # Broker to publish tasks to with `executor = "broker"`
+    # Maximum duration of a task run by a broker worker (in seconds), after which it fails with a TimeoutError,
+    # e.g. if its worker died. None to wait forever.
+    broker_timeout: Optional[float] = 24 * 3600
+    profiled = False  # Only subtasks are profiled
+    scheduling = "critical_path"  # Either "critical_path" or "fifo"
+    cost_history: Optional[str] = None  # Path of the JSON file storing durations of previous runs
+    resources: Optional[Dict[str, float]] = None  # Capacities of resources, see `resources` hint of `tasks`
+
     @property
     @abc.abstractmethod
     def tasks(self) -> Tasks:
         """Map of tasks to execute.
 
         Keys are the types of the tasks to execute.
-        Values are a tuple of 2 items:
+        Values are a tuple of 2 or 3 items:
         - List of predecessors
         - Map of options for the task (if any)
+        - Map of scheduling hints (optional):
+            - `cost` (float): estimated duration of the task, used to find the critical path
+            - `resources` (Dict[str, float]): quantities of resources used by the task while running
 
         Returns:
         - Tasks: Map of tasks.
@@ -59,35 +161,284 @@ class Orchestrator(Task):
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
 
-        self._queue = {key: copy.deepcopy(value) for key, value in self.tasks.items()}
-        self._args = copy.deepcopy(kwargs)
+        if self.scheduling not in ("critical_path", "fifo"):
+            raise ValueError("Unknown scheduling: {}".format(self.scheduling))
+        self._history = CostHistory(self.cost_history) if self.cost_history else None
+        self._queue = TaskGraph(
+            self.tasks,
+            priority=self.scheduling == "critical_path",
+            costs=self._history.costs(self.tasks.keys()) if self._history else None,
+        )
+        self._capacities: Dict[str, float] = dict(self.resources or {})
+        self._available = dict(self._capacities)
+        self._needs: Dict[_TKey, Dict[str, float]] = {}
+        for task, hints in self._queue.hints.items():
+            self._addNeeds(task, hints)
+
+        # Shared by all subtasks (see `buildArgs()`)
+        self._args: Mapping[str, Any] = types.MappingProxyType(
+            {k: v for k, v in kwargs.items() if k not in ORCHESTRATOR_OPTIONS}
+        )
         self.fail_on_exception = self.options.get("fail_on_exception", True)
+        self.keep_going = self.options.get("keep_going", False)
 
-        self.exceptions: List[Tuple[_TTask, Exception]] = []
-        self.q: queue.Queue[Optional[Tuple[_TTask, _Args]]] = queue.Queue()
+        self.exceptions: List[Tuple[_TKey, Exception]] = []
+        self.completed: Set[_TKey] = set()
+        self.failed: Set[_TKey] = set()
+        self.skipped: Set[_TKey] = set()
+        self.q: queue.Queue[Optional[Tuple[_TKey, _Args, Dict[_TKey, Any], float]]] = queue.Queue()
         self.lock = threading.Lock()
+        self._running = 0
+        self._sleeping = 0  # Tasks waiting between retries, or for a slot to resume
+        self._resuming = 0  # Tasks waiting for a slot to resume
+        self._workers = 0
+        self._threads: List[threading.Thread] = []
+        self._slots = threading.Condition(self.lock)  # Notified when a slot is given back
+
+        if self.executor not in ("thread", "process", "broker"):
+            raise ValueError("Unknown executor: {}".format(self.executor))
+        if self.executor == "broker" and self.broker is None:
+            raise ValueError("No broker to publish tasks to")
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._trace: Optional[TraceRecorder] = None
+
+        self._journal: Optional[Journal] = None
+        journal_dir = self.options.get("journal_dir", None)
+        resume = self.options.get("resume", None)
+        if journal_dir:
+            self._journal = Journal(journal_dir, resume or Journal.newRunId())
+        elif resume:
+            raise ValueError("Cannot resume run {} without journal_dir".format(resume))
+        self._resumed: Optional[Set[str]] = None  # Tasks completed in the resumed run
+
+    def _addNeeds(self, task: _TKey, hints: _Hints) -> None:
+        needs = {k: v for k, v in hints.get("resources", {}).items() if k in self._capacities}
+        for resource, quantity in needs.items():
+            if quantity > self._capacities[resource]:
+                raise ValueError(
+                    "Task {} needs {} {}, more than the capacity {}".format(
+                        task.__name__, quantity, resource, self._capacities[resource]
+                    )
+                )
+        if needs:
+            self._needs[task] = needs
+
+    def _resume(self) -> None:
+        assert self._journal is not None
+        completed = self._resumed = self._journal.completed()
+        restored = []
+        for task in self._queue.remaining:
+            if taskPath(task) in completed:
+                self.logger.info(
+                    "Task {} already completed in run {}".format(task.__name__, self._journal.run_id)
+                )
+                self._queue.markCompleted(task)
+                self.completed.add(task)
+                restored.append(task)
+
+        # Only once all completed tasks are marked, so results are kept for successors left to start only
+        for task in restored:
+            if not any(x in self._queue.indegree for x in self._queue.successors.get(task, [])):
+                continue
+            found, result = self._journal.loadResult(task)
+            if found:
+                self._queue.storeResult(task, result)
+            else:
+                self.logger.warning(
+                    "Result of task {} not available in run {}, tasks depending on it will not get it".format(
+                        task.__name__, self._journal.run_id
+                    )
+                )
+
+    def submit(
+        self,
+        task: _TTask,
+        args: Optional[_Args] = None,
+        after: Sequence[_TKey] = (),
+        name: Optional[str] = None,
+        hints: Optional[_Hints] = None,
+    ) -> _TKey:
+        """Adds a task to run (thread-safe), before or while running.
+
+        Submitted tasks receive the options of the orchestrator like other tasks. Their predecessors must
+        already be in the graph: predecessors already completed are not waited for, and their results are not
+        available in `inputs`. In `keep_going` mode, a task depending on a failed task is skipped.
+
+        Usage:
+        ```
+        for path in paths:
+            keys.append(self.submit(ProcessFile, {"path": path}, name=path))
+        self.submit(MergeFiles, after=keys)
+        ```
+
+        Args:
+        - task (_TTask): Class of the task
+        - args (_Args, optional): Options specific to the task. Defaults to None.
+        - after (Sequence[_TKey], optional): Tasks to wait for before starting the task. Defaults to none.
+        - name (str, optional): Name distinguishing the task from other tasks of the same class. Defaults to
+        None: the class is the key of the task, and must not be in the graph already.
+        - hints (_Hints, optional): Scheduling hints, see `tasks`. Defaults to None.
+
+        Raises:
+        - ValueError: If the task is already in the graph, or one of `after` is not
+
+        Returns:
+        - _TKey: Key of the task, to use in `after` of other tasks and in `inputs`
+        """
+        key: _TKey = task if name is None else TaskKey(task, name)
+        with self.lock:
+            hints = hints or {}
+            self._addNeeds(key, hints)
+            cost = None
+            if self._history is not None:
+                cost = self._history.costs([key]).get(key, None)
+            self._queue.add(key, after, args or {}, hints, cost)
+            self.logger.info("Submitted task {}".format(key.__name__))
+
+            failed = [x for x in after if x in self.failed or x in self.skipped]
+            if self._resumed is not None and taskPath(key) in self._resumed:
+                assert self._journal is not None
+                self.logger.info(
+                    "Task {} already completed in run {}".format(key.__name__, self._journal.run_id)
+                )
+                self._queue.markCompleted(key)
+                self.completed.add(key)
+            elif self.fail_on_exception and self.keep_going and failed:
+                self.logger.warning(
+                    "Skipping task {} depending on {}".format(key.__name__, failed[0].__name__)
+                )
+                self.skipped.update(self._queue.skip(failed[0]))
+            if self._workers > 0:
+                # Otherwise not running yet
+                self._findNextTasks()
+        return key
 
     def _findNextTasks(self) -> None:
         """ Not thread-safe, must be guarded """
-        if self.fail_on_exception and len(self.exceptions) > 0:
-            # TODO: we could pick up all tasks not depending on the one that failed
+        if self.fail_on_exception and not self.keep_going and len(self.exceptions) > 0:
             self.logger.debug("Failure - not picking up any new tasks")
             return
 
-        availableTasks = list(filter(lambda x: len(self._queue[x][0]) == 0, self._queue))
-        if not availableTasks:
-            return
+        # Only start as many tasks as there are idle threads, so the next ones are picked by priority
+        while self._running + self._resuming < self.num_threads:
+            task = self._queue.popReady(self._fits, self._needsKey) if self._needs else self._queue.popReady()
+            if task is None:
+                break
+            for resource, quantity in self._needs.get(task, {}).items():
+                self._available[resource] -= quantity
 
-        for task in availableTasks:
-            args = copy.deepcopy(self._args)
-            args.update(self._queue[task][1])
-            args.update({"loggernamespace": self.loggernamespace + "." + task.__name__})
-            args.update(self._args)
-            args.update(self._queue[task][1])
-            del self._queue[task]
+            args = buildArgs(self._args, self._queue.args[task], self.loggernamespace + "." + task.__name__)
 
             self.logger.info("Adding task {} into queue".format(task.__name__))
-            self.q.put((task, args))
+            self._running += 1
+            queued_at = self._queue.readyAt.pop(task, time.time())
+            self.q.put((task, args, self._queue.takeInputs(task), queued_at))
+
+    def _fits(self, task: _TKey) -> bool:
+        return all(quantity <= self._available[k] for k, quantity in self._needs.get(task, {}).items())
+
+    def _needsKey(self, task: _TKey) -> Any:
+        # Tasks needing the same resources fit or not together
+        return tuple(sorted(self._needs.get(task, {}).items()))
+
+    def _onCompleted(self, task: _TKey, result: Any, failure: Optional[Exception]) -> None:
+        for resource, quantity in self._needs.get(task, {}).items():
+            self._available[resource] += quantity
+
+        if self._journal is not None:
+            if failure is None and self._queue.successors.get(task):
+                # Before the record, so the result of a task recorded as completed is available
+                self._journal.storeResult(task, result)
+            self._journal.append(task, "failed" if failure else "completed")
+
+        if failure is None:
+            self.completed.add(task)
+            self._queue.storeResult(task, result)
+            self._queue.complete(task)
+            return
+
+        self.exceptions.append((task, failure))
+        self.failed.add(task)
+        if self.fail_on_exception and self.keep_going:
+            skipped = self._queue.skip(task)
+            if skipped:
+                self.logger.warning(
+                    "Skipping tasks depending on {}: {}".format(
+                        task.__name__, ";".join([x.__name__ for x in skipped])
+                    )
+                )
+                self.skipped.update(skipped)
+        else:
+            self._queue.complete(task)
+
+    def _execute(self, task: _TKey, args: _Args, inputs: Dict[_TKey, Any], queued_at: float) -> Any:
+        if self.executor == "thread":
+            return _runTask(task, args, inputs, queued_at, self._waiter(), self.submit)
+
+        if self._pool is not None:
+            res, failure, records = self._pool.submit(
+                _runTaskInProcess, task, args, inputs, queued_at
+            ).result()
+        else:
+            assert self.broker is not None
+            job = self.broker.publish(pickle.dumps((task, args, inputs, queued_at)))
+            self.logger.debug("Published task {} as job {}".format(task.__name__, job))
+            res, failure, records = pickle.loads(self.broker.wait(job, self.broker_timeout))
+        for record in records:
+            Task.METRICS.record(record)
+        if failure is not None:
+            raise failure
+        return res
+
+    def _spawnWorker(self) -> None:
+        """Not thread-safe, must be guarded"""
+        t = threading.Thread(
+            target=self._worker, name="{}-{}".format(self.__class__.__name__, len(self._threads))
+        )
+        self._workers += 1
+        self._threads.append(t)
+        t.start()
+
+    def _wait(self, seconds: float) -> None:
+        """Waits in the thread of a task, giving its slot back to other ready tasks meanwhile."""
+        with self._slots:
+            self._running -= 1
+            self._sleeping += 1
+            self._slots.notify_all()
+            if self._workers - self._sleeping < self.num_threads:
+                self._spawnWorker()
+            self._findNextTasks()
+
+        try:
+            time.sleep(seconds)
+        finally:
+            with self._slots:
+                self._resuming += 1
+                while self._running >= self.num_threads:
+                    self._slots.wait()
+                self._resuming -= 1
+                self._sleeping -= 1
+                self._running += 1
+
+    def _waiter(self) -> Callable[[float], None]:
+        """Returns the function waiting in the task run by the current worker thread. Only the worker thread
+        gives the slot of the task back: other threads of the task (e.g. of `Task.map()`) wait without giving
+        it back, as the task still runs meanwhile."""
+        owner = threading.get_ident()
+        depth = 0  # Nested waits of the worker thread
+
+        def _waiter(seconds: float) -> None:
+            nonlocal depth
+            if threading.get_ident() != owner or depth > 0:
+                time.sleep(seconds)
+                return
+            depth += 1
+            try:
+                self._wait(seconds)
+            finally:
+                depth -= 1
+
+        return _waiter
 
     def _worker(self) -> None:
         while True:
@@ -99,45 +450,95 @@ class Orchestrator(Task):
             if self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug("Starting task {} using arguments: {}".format(item[0].__name__, item[1]))
 
+            res = None
+            failure: Optional[Exception] = None
+            started = time.time()
+            start = time.monotonic()
             try:
-                t = item[0](**(item[1]))
-                res = t.run()
+                res = self._execute(*item)
                 self.logger.info("Completed task {}: {}".format(item[0].__name__, res))
             except Exception as e:
                 self.logger.info("Failed task {}: {}".format(item[0].__name__, e))
-                self.exceptions.append((item[0], e))
-
-            with self.lock:
-                for predecessors in self._queue.values():
-                    if item[0] in predecessors[0]:
-                        predecessors[0].remove(item[0])
+                failure = e
+            if self._history is not None:
+                self._history.record(item[0], time.monotonic() - start)
+            if self._trace is not None:
+                self._trace.record(
+                    item[0].__name__,
+                    threading.current_thread().name,
+                    item[3],
+                    started,
+                    time.time(),
+                    "failed" if failure else "completed",
+                )
 
+            with self._slots:
+                self._running -= 1
+                self._slots.notify_all()
+                self._onCompleted(item[0], res, failure)
                 self._findNextTasks()
                 self.logger.debug("{} tasks remaining in queue".format(self.q.qsize()))
 
                 self.q.task_done()
 
+                # Stop threads started while tasks were waiting, once they have resumed
+                if self._workers - self._sleeping > self.num_threads:
+                    self._workers -= 1
+                    break
+
+            # Release inputs and result while waiting for the next task
+            item = res = None
+
     def do(self) -> None:
-        threads = []
+        if self._journal is not None:
+            self.logger.info("Journal of run {}: {}".format(self._journal.run_id, self._journal.path))
+            if self.options.get("resume", None):
+                self._resume()
 
-        for _ in range(self.num_threads):
-            t = threading.Thread(target=self._worker)
-            t.start()
-            threads.append(t)
+        if self.executor == "process":
+            self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_threads)
+
+        if self.options.get("trace", None):
+            self._trace = TraceRecorder(self.num_threads)
 
         with self.lock:
+            for _ in range(self.num_threads):
+                self._spawnWorker()
             self._findNextTasks()
 
         self.q.join()
-        for _ in range(self.num_threads):
-            self.q.put(None)
+        with self.lock:
+            for _ in range(self._workers):
+                self.q.put(None)
+            threads, self._threads, self._workers = self._threads, [], 0
         for t in threads:
             t.join()
 
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+        if self._history is not None:
+            self._history.save()
+
+        if self._trace is not None:
+            self._trace.stop()
+            self._trace.dump(self.options["trace"])
+            self.logger.info(self._trace.summary())
+            self._trace = None
+
         if len(self._queue) > 0:
             self.logger.critical(
-                "Done but some tasks remaining: {}".format(";".join([x.__name__ for x in self._queue.keys()]))
+                "Done but some tasks remaining: {}".format(
+                    ";".join([x.__name__ for x in self._queue.remaining])
+                )
+            )
+
+        self.logger.info(
+            "Completed {} tasks, {} failed, {} skipped".format(
+                len(self.completed), len(self.failed), len(self.skipped)
             )
+        )
 
         if self.exceptions:
             for task, exception in self.exceptions:
@@ -0,0 +1,106 @@
+import datetime
+from typing import Dict, List, Tuple, Type
+
+from .graph import Tasks, _TKey
+from .orchestrator import Orchestrator
+from .task import Task
+
+
+class DatePartitions(Orchestrator):
+    """Task running another task once per date of a range (each with its own `date` option), concurrently.
+
+    Usage: via `CliParams.date_range()` and `CliParams.parallel()` for commands created with `Cli`, or:
+    ```
+    DatePartitions.of(MyTask)(date_range=(start, end), parallel=4, dryrun=False).run()
+    ```
+
+    Partitions are independent: by default a failed partition does not stop the other ones (`keep_going`),
+    and the dates of failed partitions are logged at the end of the run. With a journal (see
+    `CliParams.journal_dir()`), resuming the run (see `CliParams.resume()`) only runs the partitions that did
+    not complete.
+
+    Accepted kwargs, on top of the options of `Orchestrator` (passed to every partition):
+    - date_range (Tuple[datetime.date, datetime.date]): first and last dates (included)
+    - parallel (int): number of partitions running concurrently, defaults to 1
+    """
+
+    task: Type[Task]  # Task to run for each date, see `of()`
+    tasks: Tasks = {}  # Partitions are submitted when initialized
+    num_threads = 1
+
+    @classmethod
+    def of(cls, task: Type[Task]) -> Type["DatePartitions"]:
+        """Returns a subclass running `task` for each date.
+
+        Args:
+        - task (Type[Task]): Task to run for each date
+
+        Returns:
+        - Type[DatePartitions]: Class named after the task, e.g. `MyTaskPartitions`
+        """
+        return type(task.__name__ + "Partitions", (cls,), {"task": task})
+
+    @staticmethod
+    def dates(start: datetime.date, end: datetime.date) -> List[datetime.date]:
+        """Returns the dates from `start` to `end` (included)."""
+        return [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+
+    def __init__(self, **kwargs) -> None:
+        start, end = kwargs.pop("date_range")
+        if end < start:
+            raise ValueError("Date range ends before it starts: {} > {}".format(start, end))
+        self.num_threads = kwargs.pop("parallel", None) or 1
+        kwargs.setdefault("keep_going", True)
+        super().__init__(**kwargs)
+
+        self.partitions: Dict[datetime.date, _TKey] = {}
+        for date in self.dates(start, end):
+            self.partitions[date] = self.submit(self.task, {"date": date}, name=date.isoformat())
+
+    def statuses(self) -> Dict[datetime.date, str]:
+        """Returns the status of each partition: "completed", "failed", "skipped" or "pending"."""
+        res = {}
+        for date, key in self.partitions.items():
+            if key in self.completed:
+                res[date] = "completed"
+            elif key in self.failed:
+                res[date] = "failed"
+            elif key in self.skipped:
+                res[date] = "skipped"
+            else:
+                res[date] = "pending"
+        return res
+
+    def do(self) -> None:
+        try:
+            super().do()
+        finally:
+            statuses = self.statuses()
+            incomplete = [date.isoformat() for date, status in statuses.items() if status != "completed"]
+            self.logger.info(
+                "Completed {} of {} partitions".format(len(statuses) - len(incomplete), len(statuses))
+            )
+            if incomplete:
+                self.logger.warning("Partitions not completed: {}".format(", ".join(incomplete)))
+                if self._journal is not None:
+                    self.logger.warning(
+                        "Resume run {} to only run these partitions".format(self._journal.run_id)
+                    )
+
+
+def parseDateRange(value: str) -> Tuple[datetime.date, datetime.date]:
+    """Parses a date range in format `YYYY-MM-DD:YYYY-MM-DD` (both dates included).
+
+    Raises:
+    - ValueError: If the format is invalid, or the range ends before it starts
+    """
+    start, sep, end = value.partition(":")
+    if not sep:
+        raise ValueError("Date range must be in format YYYY-MM-DD:YYYY-MM-DD")
+    res = (
+        datetime.datetime.strptime(start, "%Y-%m-%d").date(),
+        datetime.datetime.strptime(end, "%Y-%m-%d").date(),
+    )
+    if res[1] < res[0]:
+        raise ValueError("Date range ends before it starts")
+    return res
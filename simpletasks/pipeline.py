@@ -1,6 +1,7 @@
 import abc
-from typing import List, Type
+from typing import Any, Dict, List, Type
 
+from .asynctask import AsyncTask
 from .task import Task
 
 
@@ -17,8 +18,12 @@ class Pipeline(Task):
     class MyTask(Pipeline):
         tasks = [MySubTask1, MySubTask2]
     ```
+
+    The result of each task is available to the next one in `self.inputs`, keyed by the class of the task.
     """
 
+    profiled = False  # Only subtasks are profiled
+
     @property
     @abc.abstractmethod
     def tasks(self) -> List[Type[Task]]:
@@ -26,19 +31,30 @@ class Pipeline(Task):
 
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
-        self.args = kwargs
+        # Measures are reported by the pipeline, not by each task
+        self.args = {k: v for k, v in kwargs.items() if k != "metrics"}
         self.fail_on_exception = self.options.get("fail_on_exception", True)
 
+    def _run(self, task: Task) -> Any:
+        if isinstance(task, AsyncTask):
+            return task.runSync()
+        else:
+            return task.run()
+
     def do(self) -> None:
         exceptions = []
+        inputs: Dict[Type[Task], Any] = {}
         for t in self.tasks:
             args = self.args.copy()
             args.update({"loggernamespace": self.loggernamespace + "." + t.__name__})
+            subtask = t(**args)
+            # Only the result of the previous task is passed, so older results can be released
+            subtask.inputs, inputs = inputs, {}
             if self.fail_on_exception:
-                t(**args).run()
+                inputs = {t: self._run(subtask)}
             else:
                 try:
-                    t(**args).run()
+                    inputs = {t: self._run(subtask)}
                 except Exception as e:
                     exceptions.append((t, e))
 
@@ -0,0 +1,119 @@
+import collections
+import contextlib
+import cProfile
+import os
+import sys
+import threading
+from types import FrameType
+from typing import TYPE_CHECKING, Counter, Iterator, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .task import Task
+
+
+class SamplingProfiler:
+    """Low-overhead profiler sampling the stack of a thread at regular intervals.
+
+    Samples are taken from a separate thread (via `sys._current_frames()`) rather than from a signal handler,
+    as signals are only delivered to the main thread while tasks usually run in worker threads.
+
+    Stacks are written in the collapsed format used by flame graph tools (e.g. `flamegraph.pl`, speedscope):
+    ```
+    main (job.py:1);MyTask.do (job.py:10);compute (job.py:20) 42
+    ```
+    """
+
+    INTERVAL = 0.005  # Default interval between samples, in seconds
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval if interval is not None else self.INTERVAL
+        self.samples: Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _stack(frame: Optional[FrameType]) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(
+                "{} ({}:{})".format(
+                    getattr(code, "co_qualname", code.co_name),
+                    os.path.basename(code.co_filename),
+                    code.co_firstlineno,
+                )
+            )
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _sample(self, ident: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(ident)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    def start(self) -> None:
+        """Starts sampling the calling thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, args=(threading.get_ident(),), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write("{} {}\n".format(stack, count))
+
+
+@contextlib.contextmanager
+def profileTask(task: "Task") -> Iterator[None]:
+    """Profiles the run of a task if the `profile` option is provided (see `CliParams.profile()`).
+
+    Profiles are written to the directory given in the `profile` option, in a file named after the logger
+    namespace of the task: `.prof` files with cProfile (default), `.collapsed` files in "sampling" mode.
+
+    Args:
+    - task (Task): Task being run
+    """
+    directory = task.options.get("profile", None)
+    if not directory or not task.profiled:
+        yield
+        return
+
+    mode = task.options.get("profile_mode", None) or "cprofile"
+    if mode not in ("cprofile", "sampling"):
+        raise ValueError("Unknown profile mode: {}".format(mode))
+    os.makedirs(directory, exist_ok=True)
+
+    if mode == "sampling":
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = os.path.join(directory, task.loggernamespace + ".collapsed")
+            sampler.dump(path)
+            task.logger.info("Profile written to {}".format(path))
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Another profiler is already active in the thread (Python 3.12+)
+        task.logger.warning("Could not profile task: {}".format(e))
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(directory, task.loggernamespace + ".prof")
+        profiler.dump_stats(path)
+        task.logger.info("Profile written to {}".format(path))
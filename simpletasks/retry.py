@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, Sequence, Type, TypeVar
+
+X = TypeVar("X")
+
+
+class RetryPolicy:
+    """Policy to retry calls failing with an exception, with exponential backoff.
+
+    With `jitter` (default), each delay is drawn uniformly between 0 and the exponential delay ("full jitter"),
+    so tasks failing at the same time do not retry at the same time.
+
+    Usage:
+    ```
+    policy = RetryPolicy(maxretries=5, initialdelay=1, deadline=60, retry_on=(ConnectionError,))
+    res = self.executeOrRetry(lambda: api.get(url), policy=policy)
+    ```
+    """
+
+    def __init__(
+        self,
+        maxretries: int = 5,
+        initialdelay: float = 30,
+        multiplier: float = 1.5,
+        maxdelay: Optional[float] = None,
+        jitter: bool = True,
+        deadline: Optional[float] = None,
+        retry_on: Sequence[Type[Exception]] = (Exception,),
+    ) -> None:
+        """Initializes the policy.
+
+        Args:
+        - maxretries (int, optional): Maximum number of times to retry. Defaults to 5.
+        - initialdelay (float, optional): Delay before the first retry (in seconds). Defaults to 30.
+        - multiplier (float, optional): Factor applied to the delay after each retry. Defaults to 1.5.
+        - maxdelay (float, optional): Maximum delay between retries (in seconds). Defaults to no maximum.
+        - jitter (bool, optional): Draw delays randomly between 0 and the exponential delay. Defaults to True.
+        - deadline (float, optional): Maximum total duration of the call and its retries (in seconds), a retry that would end after the deadline is not attempted. Defaults to no deadline.
+        - retry_on (Sequence[Type[Exception]], optional): Exceptions to retry on, others are re-raised immediately. Defaults to all exceptions.
+        """
+        self.maxretries = maxretries
+        self.initialdelay = initialdelay
+        self.multiplier = multiplier
+        self.maxdelay = maxdelay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = tuple(retry_on)
+
+    def delay(self, failures: int) -> float:
+        """Returns the delay to wait after `failures` consecutive failures (in seconds)."""
+        delay = self.initialdelay * self.multiplier ** (failures - 1)
+        if self.maxdelay is not None:
+            delay = min(delay, self.maxdelay)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def _next(
+        self, exception: Exception, failures: int, start: float, logger: Optional[logging.Logger]
+    ) -> Optional[float]:
+        # Delay before the next retry, or None to give up
+        if not isinstance(exception, self.retry_on):
+            return None
+        if failures > self.maxretries:
+            if logger is not None:
+                logger.warning("Too many failures, abandonning")
+            return None
+
+        delay = self.delay(failures)
+        if self.deadline is not None and time.monotonic() + delay - start > self.deadline:
+            if logger is not None:
+                logger.warning("Deadline reached, abandonning")
+            return None
+
+        if logger is not None:
+            logger.warning(
+                "Failed {} times ({}), retrying in {:.0f} seconds...".format(failures, exception, delay)
+            )
+        return delay
+
+    def call(
+        self,
+        func: Callable[[], X],
+        logger: Optional[logging.Logger] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> X:
+        """Calls `func`, retrying it according to the policy.
+
+        Args:
+        - func (Callable[[], X]): Function to call
+        - logger (logging.Logger, optional): Logger to report failures to. Defaults to None.
+        - sleep (Callable[[float], None], optional): Function to wait between retries. Defaults to `time.sleep`.
+
+        Raises:
+        - e: Last exception raised if the call is not retried anymore
+
+        Returns:
+        - X: Returned value from the function
+        """
+        failures = 0
+        start = time.monotonic()
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                failures += 1
+                delay = self._next(e, failures, start, logger)
+                if delay is None:
+                    raise e
+                sleep(delay)
+
+    async def callAsync(self, func: Callable[[], Awaitable[X]], logger: Optional[logging.Logger] = None) -> X:
+        """Awaits the coroutine returned by `func`, retrying it according to the policy. Waits do not block the
+        event loop.
+
+        Args:
+        - func (Callable[[], Awaitable[X]]): Function to call
+        - logger (logging.Logger, optional): Logger to report failures to. Defaults to None.
+
+        Raises:
+        - e: Last exception raised if the call is not retried anymore
+
+        Returns:
+        - X: Returned value from the coroutine
+        """
+        failures = 0
+        start = time.monotonic()
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                failures += 1
+                delay = self._next(e, failures, start, logger)
+                if delay is None:
+                    raise e
+                await asyncio.sleep(delay)
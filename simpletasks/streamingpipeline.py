@@ -0,0 +1,187 @@
+import queue
+import threading
+from typing import Any, Iterator, List, Optional, Tuple, Type
+
+from .pipeline import Pipeline
+from .task import Task
+
+_END = object()
+
+
+class StreamAborted(RuntimeError):
+    """Raised in the stages of a `StreamingPipeline` when another stage failed."""
+
+    def __init__(self, stage: Type[Task]) -> None:
+        super().__init__("Stage {} failed".format(stage.__name__))
+        self.stage = stage
+
+
+class _Channel:
+    """Bounded queue between two stages running in different threads."""
+
+    def __init__(self, stage: Type[Task], maxsize: int, stop: threading.Event) -> None:
+        self.stage = stage
+        self.q: queue.Queue[Any] = queue.Queue(maxsize)
+        self.stop = stop
+
+    def put(self, item: Any) -> None:
+        # Blocks while the queue is full (backpressure), unless the pipeline is being stopped
+        while True:
+            if self.stop.is_set():
+                raise StreamAborted(self.stage)
+            try:
+                self.q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            if self.stop.is_set():
+                raise StreamAborted(self.stage)
+            try:
+                item = self.q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+
+
+class StreamingPipeline(Pipeline):
+    """Task to execute multiple tasks as stages of a stream, each stage consuming items as they are produced
+    by the previous one (experimental).
+
+    Definition:
+    ```
+    class Extract(Task):
+        def do(self) -> Iterator[Row]:
+            for row in read_rows():
+                yield row
+
+    class Transform(Task):
+        def do(self) -> Iterator[Row]:
+            for row in self.inputs[Extract]:
+                yield transform(row)
+
+    class Load(Task):
+        def do(self) -> None:
+            for row in self.inputs[Transform]:
+                write(row)
+
+    class MyTask(StreamingPipeline):
+        tasks = [Extract, Transform, Load]
+        threaded = True
+    ```
+
+    Each stage gets the items of the previous stage in `self.inputs`. If the last stage yields items, they are
+    consumed and their number is returned; otherwise the result of the last stage is returned.
+
+    By default, all stages run in the calling thread, one item at a time. With `threaded = True`, each stage
+    runs in its own thread and stages are connected by queues of `queue_size` items: when a queue is full, the
+    stage producing items waits (backpressure).
+
+    If any stage fails, the whole pipeline is stopped and the exception is re-raised.
+    """
+
+    threaded = False
+    queue_size = 100
+
+    def _stage(self, t: Type[Task], previous: Optional[Type[Task]], stream: Any) -> Task:
+        args = self.args.copy()
+        args.update({"loggernamespace": self.loggernamespace + "." + t.__name__})
+        task = t(**args)
+        task.inputs = {previous: stream} if previous is not None else {}
+        return task
+
+    def _iterate(self, task: Task, last: bool = False) -> Iterator[Any]:
+        """Runs a stage and iterates over its items, converting failures into `StreamAborted`.
+
+        If the last stage does not produce items (i.e. does not return an iterator), its result is returned.
+        """
+        try:
+            output = self._run(task)
+        except StreamAborted:
+            raise
+        except Exception as e:
+            # Already logged by `Task.run()`
+            raise StreamAborted(task.__class__) from e
+
+        if last and not isinstance(output, Iterator):
+            return output
+
+        try:
+            for item in output:
+                yield item
+        except StreamAborted:
+            raise
+        except Exception as e:
+            if not Task.DEBUGGING:
+                task.logger.critical("Got exception: {} {}".format(e.__class__.__name__, e), exc_info=e)
+            raise StreamAborted(task.__class__) from e
+
+    def _drain(self, task: Task) -> Any:
+        output = self._iterate(task, last=True)
+        count = 0
+        try:
+            while True:
+                next(output)
+                count += 1
+        except StopIteration as e:
+            # Result of the last stage if it does not produce items
+            return e.value if e.value is not None else count
+
+    def _produce(
+        self, task: Task, channel: _Channel, errors: List[Tuple[int, BaseException]], index: int
+    ) -> None:
+        try:
+            for item in self._iterate(task):
+                channel.put(item)
+            channel.put(_END)
+        except StreamAborted as e:
+            # Without a cause, the pipeline was stopped by another stage: not a failure of this one
+            if e.__cause__ is not None:
+                errors.append((index, e.__cause__))
+            channel.stop.set()
+
+    def do(self) -> Any:
+        if not self.threaded:
+            stream: Any = None
+            previous: Optional[Type[Task]] = None
+            for t in self.tasks[:-1]:
+                stream, previous = self._iterate(self._stage(t, previous, stream)), t
+            try:
+                return self._drain(self._stage(self.tasks[-1], previous, stream))
+            except StreamAborted as e:
+                raise e.__cause__ if e.__cause__ is not None else e
+
+        stop = threading.Event()
+        errors: List[Tuple[int, BaseException]] = []
+        threads = []
+        stream, previous = None, None
+        for index, t in enumerate(self.tasks[:-1]):
+            channel = _Channel(t, self.queue_size, stop)
+            thread = threading.Thread(
+                target=self._produce, args=(self._stage(t, previous, stream), channel, errors, index)
+            )
+            thread.start()
+            threads.append(thread)
+            stream, previous = channel, t
+
+        res: Any = None
+        try:
+            res = self._drain(self._stage(self.tasks[-1], previous, stream))
+        except StreamAborted as e:
+            if e.__cause__ is not None:
+                errors.append((len(self.tasks) - 1, e.__cause__))
+            stop.set()
+        finally:
+            # Stops upstream stages still producing items no stage will read (e.g. if a stage returned early)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            # Report the failure of the most upstream stage, others are consequences
+            raise min(errors, key=lambda x: x[0])[1]
+        return res
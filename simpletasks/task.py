@@ -1,8 +1,32 @@
 import abc
+import concurrent.futures
+import copy
 import datetime
+import inspect
 import logging
 import time
-from typing import Any, Callable, Iterable, Optional, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from .batch import Batch
+from .cache import ResultCache
+from .limits import CircuitBreaker, RateLimiter
+from .memoize import _TaskMemo, _onEnd, _onStart, memoize
+from .metrics import MetricsRegistry
+from .profiling import profileTask
+from .retry import RetryPolicy
 
 try:
     from tqdm import tqdm
@@ -12,6 +36,40 @@ except ImportError:
     _has_tqdm = False
 
 X = TypeVar("X")
+Y = TypeVar("Y")
+
+
+def _mapChunk(func: Callable[[X], Y], chunk: List[X]) -> List[Tuple[bool, Any]]:
+    # Module-level so it can be sent to worker processes
+    res: List[Tuple[bool, Any]] = []
+    for item in chunk:
+        try:
+            res.append((True, func(item)))
+        except Exception as e:
+            res.append((False, e))
+    return res
+
+
+class _Lazy(Generic[X]):
+    """Attribute of a task computed on first access and cached in a slot (`_` + name). Can be set explicitly."""
+
+    def __init__(self, func: Callable[[Any], X]) -> None:
+        self.func = func
+        self.__doc__ = func.__doc__
+        self.slot = "_" + func.__name__
+
+    def __get__(self, instance: Any, owner: Any = None) -> X:
+        if instance is None:
+            return self  # type: ignore
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+    def __set__(self, instance: Any, value: X) -> None:
+        setattr(instance, self.slot, value)
 
 
 class Task(metaclass=abc.ABCMeta):
@@ -29,11 +87,53 @@ class Task(metaclass=abc.ABCMeta):
     ```
     res = MyTask(dryrun=False, showprogress=True).run()
     ```
+
+    Options, logger and dates are only resolved when first accessed, so creating many tasks is cheap. Tasks use
+    `__slots__`: subclasses can declare `__slots__` too to avoid having a `__dict__`.
     """
 
+    __slots__ = (
+        "options",
+        "inputs",
+        "queued_at",
+        "waiter",
+        "submitter",
+        "_memo",
+        "_loggernamespace",
+        "_logger",
+        "_showprogress",
+        "_dryrun",
+        "_quick",
+        "_includearchives",
+        "_force",
+        "_verbose",
+        "_timestamp",
+        "_date",
+        "_cache_dir",
+    )
+
     DEBUGGING = False  # Set to True while debugging (prevents catching exceptions)
     TESTING = False  # Set to True while automated testing (can force dryrun in some tasks)
     LOGGER_NAMESPACE = ""
+    METRICS = MetricsRegistry()  # Measures of all runs of tasks, see `MetricsRegistry`
+
+    # Set to True to cache the results of `do()` on disk when the `cache_dir` option is provided (results must
+    # be picklable): a task run again with the same code, options and inputs (results of its predecessors in
+    # `Pipeline` and `Orchestrator`) returns the cached result. Tasks with inputs that cannot be pickled are
+    # not cached.
+    cacheable = False
+
+    # Set to False for tasks only running other tasks: when the `profile` option is provided, only the tasks they
+    # run are profiled (see CliParams.profile()).
+    profiled = True
+
+    # Options of tasks run by `Pipeline` and `Orchestrator` share their values (only the mapping is copied). Set
+    # to True for tasks modifying values of their options in place, to receive a deep copy of their options.
+    copy_options = False
+
+    # Decorator caching the results of a method by arguments, see `simpletasks.memoize.memoize()`. Hits and
+    # misses of the memoized methods called by a task are logged at the end of its run.
+    memoize = staticmethod(memoize)
 
     def __init__(self, **kwargs) -> None:
         """Initializes a task.
@@ -48,26 +148,73 @@ class Task(metaclass=abc.ABCMeta):
         - verbose (bool) - see CliParams.verbose()
         - date (datetime.date) - see CliParams.date()
         - timestamp (str) - timestamp in YYYY-MM-DD format, deprecated, use `date` instead
+        - cache_dir (str) - directory where results of `cacheable` tasks are stored - see CliParams.cache_dir()
+        - metrics (str) - file where measures of the run are written - see CliParams.metrics()
+        - profile (str) - directory where profiles of the run are written - see CliParams.profile()
+        - profile_mode (str) - either "cprofile" (default) or "sampling" - see CliParams.profile_mode()
         """
-        self.options = kwargs
-        self.loggernamespace = self.options.get(
-            "loggernamespace", Task.LOGGER_NAMESPACE + self.__class__.__name__
-        )
-        self.logger = logging.getLogger(self.loggernamespace)
+        self.options = copy.deepcopy(kwargs) if self.copy_options else kwargs
+
+        # Results of the predecessors of the task, keyed by their class or their `TaskKey` if submitted while
+        # running (set by `Pipeline` and `Orchestrator`)
+        self.inputs: Dict[Any, Any] = {}
+        # Time (timestamp) at which the task was ready to be started (set by `Orchestrator`)
+        self.queued_at: Optional[float] = None
+        # Function waiting between retries while giving back the worker slot (set by `Orchestrator`)
+        self.waiter: Optional[Callable[[float], None]] = None
+        # Function adding tasks to the running `Orchestrator` (set by `Orchestrator`)
+        self.submitter: Optional[Callable[..., Any]] = None
+        # Caches and counters of memoized methods (see `memoize()`)
+        self._memo: Optional[_TaskMemo] = None
+
+    @_Lazy
+    def loggernamespace(self) -> str:
+        return self.options.get("loggernamespace", Task.LOGGER_NAMESPACE + self.__class__.__name__)
+
+    @_Lazy
+    def logger(self) -> logging.Logger:
+        return logging.getLogger(self.loggernamespace)
+
+    @_Lazy
+    def showprogress(self) -> bool:
         if self.options.get("progress", None) is not None:
-            self.showprogress = self.options.get("progress")
+            return self.options["progress"]
         else:
             # Legacy
-            self.showprogress = self.options.get("showprogress", True)
-        self.dryrun = self.options.get("dryrun", False)
-        self.quick = self.options.get("quick", False)
-        self.includearchives = self.options.get("includearchives", False)
-        self.force = self.options.get("force", False)
-        self.verbose = self.options.get("verbose", False)
+            return self.options.get("showprogress", True)
+
+    @_Lazy
+    def dryrun(self) -> bool:
+        return self.options.get("dryrun", False)
+
+    @_Lazy
+    def quick(self) -> bool:
+        return self.options.get("quick", False)
+
+    @_Lazy
+    def includearchives(self) -> bool:
+        return self.options.get("includearchives", False)
 
+    @_Lazy
+    def force(self) -> bool:
+        return self.options.get("force", False)
+
+    @_Lazy
+    def verbose(self) -> bool:
+        return self.options.get("verbose", False)
+
+    @_Lazy
+    def timestamp(self) -> str:
         # TODO: remove this
-        self.timestamp = self.options.get("timestamp", None) or datetime.datetime.now().strftime("%Y-%m-%d")
-        self.date = self.options.get("date", None) or datetime.date.today()
+        return self.options.get("timestamp", None) or datetime.datetime.now().strftime("%Y-%m-%d")
+
+    @_Lazy
+    def date(self) -> datetime.date:
+        return self.options.get("date", None) or datetime.date.today()
+
+    @_Lazy
+    def cache_dir(self) -> Optional[str]:
+        return self.options.get("cache_dir", None)
 
     def progress(self, iterable: Iterable[X], total: int = None, desc: str = None) -> Iterable[X]:
         """Shows progress over an iterable `iterable` if progress option is used and if tqdm is available.
@@ -92,7 +239,13 @@ class Task(metaclass=abc.ABCMeta):
         else:
             return iterable
 
-    def execute(self, func: Callable[..., X], stubbedValue: X = None) -> Optional[X]:
+    def execute(
+        self,
+        func: Callable[..., X],
+        stubbedValue: X = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> Optional[X]:
         """Executes the callback `func` if not in dryrun mode and returns the value.
         If in dryrun mode, function is not called and `stubbedValue` is returned.
 
@@ -104,6 +257,11 @@ class Task(metaclass=abc.ABCMeta):
         Args:
         - func (Callable[..., X]): Function to call
         - stubbedValue (X, optional): Value to return in dryrun mode. Defaults to None.
+        - limiter (RateLimiter, optional): Rate limiter to wait for before calling (using `sleep()`). Defaults to None.
+        - breaker (CircuitBreaker, optional): Circuit breaker to call through. Defaults to None.
+
+        Raises:
+        - CircuitOpen: If the circuit breaker is open
 
         Returns:
         - Optional[X]: Returned value from the callback
@@ -112,20 +270,79 @@ class Task(metaclass=abc.ABCMeta):
         if self.dryrun:
             self.logger.info("Stubbed")
             return stubbedValue
-        else:
+
+        def _call() -> X:
+            if limiter is not None:
+                limiter.acquire(sleep=self.sleep)
             return func()
 
+        return breaker.call(_call) if breaker is not None else _call()
+
+    def sleep(self, seconds: float) -> None:
+        """Waits for `seconds`. When run by an `Orchestrator` (with threads), the worker slot of the task is
+        given back while waiting in the thread running the task, so other ready tasks can run meanwhile. Waits
+        in other threads of the task (e.g. of `map()`) keep the slot.
+
+        Args:
+        - seconds (float): Duration to wait (in seconds)
+        """
+        if self.waiter is not None:
+            self.waiter(seconds)
+        else:
+            time.sleep(seconds)
+
+    def submit(
+        self,
+        task: "Type[Task]",
+        args: Optional[Dict[str, Any]] = None,
+        after: Sequence[Any] = (),
+        name: Optional[str] = None,
+        hints: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Adds a task to the `Orchestrator` running this task (with threads), see `Orchestrator.submit()`.
+
+        The submitted task does not wait for this one unless it is in `after`: to process results of submitted
+        tasks, submit another task after them.
+
+        Usage:
+        ```
+        keys = [self.submit(ProcessFile, {"path": path}, name=path) for path in os.listdir(directory)]
+        self.submit(MergeFiles, after=keys)
+        ```
+
+        Args:
+        - task (Type[Task]): Class of the task
+        - args (Dict[str, Any], optional): Options specific to the task. Defaults to None.
+        - after (Sequence[Any], optional): Keys of the tasks to wait for before starting the task. Defaults to none.
+        - name (str, optional): Name distinguishing the task from other tasks of the same class. Defaults to None.
+        - hints (Dict[str, Any], optional): Scheduling hints, see `Orchestrator.tasks`. Defaults to None.
+
+        Raises:
+        - RuntimeError: If the task is not run by an `Orchestrator` with threads
+
+        Returns:
+        - Any: Key of the submitted task (its class, or a `TaskKey` if named)
+        """
+        if self.submitter is None:
+            raise RuntimeError("Tasks can only be submitted from a task run by an Orchestrator with threads")
+        return self.submitter(task, args, after, name, hints)
+
     def executeOrRetry(
         self,
         func: Callable[..., X],
         maxretries: int = 5,
         initialdelay: float = 30,
         stubbedValue: X = None,
+        policy: Optional[RetryPolicy] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
     ) -> Optional[X]:
         """Executes the callback `func` if not in dryrun mode and returns the value.
         If the call fails with any Exception, retries several times with exponential backoff.
         If the call still fails after `maxretries`, the last exception is re-raised.
 
+        Waits between retries use `sleep()`, so they do not hold a worker slot of an `Orchestrator`.
+
         If in dryrun mode, function is not called and `stubbedValue` is returned.
 
         Args:
@@ -133,6 +350,9 @@ class Task(metaclass=abc.ABCMeta):
         - maxretries (int, optional): Maximum number of times to retry. Defaults to 5.
         - initialdelay (float, optional): Initial delay to wait between retries (in seconds). Delay is multiplied by half between each retry. Defaults to 30.
         - stubbedValue (X, optional): Value to return in dryrun mode. Defaults to None.
+        - policy (RetryPolicy, optional): Policy to use instead of `maxretries` and `initialdelay`, e.g. to add jitter, a deadline or retry only on some exceptions. Defaults to None.
+        - limiter (RateLimiter, optional): Rate limiter to wait for before each call (see `execute()`). Defaults to None.
+        - breaker (CircuitBreaker, optional): Circuit breaker to call through (see `execute()`). Defaults to None.
 
         Raises:
         - e: Last exception raised if maximum retries is reached
@@ -140,23 +360,122 @@ class Task(metaclass=abc.ABCMeta):
         Returns:
         - Optional[X]: Returned value from the callback
         """
-        failures = 0
-        delay = initialdelay
-        while True:
-            try:
-                return self.execute(func, stubbedValue)
-            except Exception as e:
-                failures += 1
-                if failures > maxretries:
-                    self.logger.warning("Too many failures, abandonning")
-                    raise e
-
-                # Retry
-                self.logger.warning(
-                    "Failed {} times ({}), retrying in {:.0f} seconds...".format(failures, e, delay)
-                )
-                time.sleep(delay)
-                delay *= 1.5
+        if policy is None:
+            policy = RetryPolicy(maxretries=maxretries, initialdelay=initialdelay, jitter=False)
+        return policy.call(
+            lambda: self.execute(func, stubbedValue, limiter, breaker), logger=self.logger, sleep=self.sleep
+        )
+
+    def batch(
+        self,
+        flush: Callable[[List[X]], Y],
+        size: int = 100,
+        interval: Optional[float] = None,
+        stubbedValue: Y = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> "Batch[X, Y]":
+        """Returns a batch collecting items and calling `flush` with groups of items, e.g. to write rows in bulk
+        instead of one at a time. Each call is made through `execute()`: in dryrun mode, `flush` is not called
+        and `stubbedValue` is recorded instead.
+
+        A group is flushed when it has `size` items, or when an item is added more than `interval` seconds after
+        the first item of the group. The window is not enforced while no item is added: to flush a group waiting
+        for too long, call `Batch.flushDue()` regularly. Remaining items are flushed when leaving the `with`
+        block.
+
+        Usage:
+        ```
+        with self.batch(lambda rows: db.session.bulk_insert_mappings(Row, rows), size=500) as batch:
+            for row in rows:
+                batch.add(row)
+        ```
+
+        Args:
+        - flush (Callable[[List[X]], Y]): Function to call with each group of items
+        - size (int, optional): Maximum number of items per group. Defaults to 100.
+        - interval (float, optional): Age of the first item of a group after which the group is flushed, checked when an item is added or by `flushDue()` (in seconds). Defaults to no limit.
+        - stubbedValue (Y, optional): Value to record for each group in dryrun mode. Defaults to None.
+        - limiter (RateLimiter, optional): Rate limiter to wait for before each flush (see `execute()`). Defaults to None.
+        - breaker (CircuitBreaker, optional): Circuit breaker to call through (see `execute()`). Defaults to None.
+
+        Returns:
+        - Batch[X, Y]: Batch, with the returned values of `flush` in `results`
+        """
+        return Batch(self, flush, size, interval, stubbedValue, limiter, breaker)
+
+    def map(
+        self,
+        func: Callable[[X], Y],
+        iterable: Iterable[X],
+        workers: int = None,
+        mode: str = "thread",
+        chunksize: int = 1,
+        ordered: bool = True,
+        return_exceptions: bool = False,
+        stubbedValue: Y = None,
+        desc: str = None,
+    ) -> Iterable[Y]:
+        """Calls `func` on each item of `iterable` in a pool of threads or processes, and iterates over the
+        results. Progress is shown as results are consumed (see `progress()`).
+
+        If in dryrun mode, `func` is not called and `stubbedValue` is returned for each item (see `execute()`).
+
+        Usage:
+        ```
+        for res in self.map(sync_row, rows, workers=8):
+            do_stuff_with(res)
+        ```
+
+        Args:
+        - func (Callable[[X], Y]): Function to call on each item (must be picklable in "process" mode)
+        - iterable (Iterable[X]): Items
+        - workers (int, optional): Size of the pool. Defaults to the default of `concurrent.futures` executors.
+        - mode (str, optional): "thread" or "process". Defaults to "thread".
+        - chunksize (int, optional): Number of items sent at once to a worker. Defaults to 1.
+        - ordered (bool, optional): Returns results in the order of `iterable`, otherwise as they complete. Defaults to True.
+        - return_exceptions (bool, optional): Returns exceptions raised by `func` in place of results instead of raising the first one. Defaults to False.
+        - stubbedValue (Y, optional): Value to return for each item in dryrun mode. Defaults to None.
+        - desc (str, optional): Description for the progress bar. Defaults to None.
+
+        Raises:
+        - ValueError: Unknown mode
+        - e: First exception raised by `func` (unless `return_exceptions` is used)
+
+        Returns:
+        - Iterable[Y]: Results of `func`
+        """
+        executor: Type[concurrent.futures.Executor]
+        if mode == "thread":
+            executor = concurrent.futures.ThreadPoolExecutor
+        elif mode == "process":
+            executor = concurrent.futures.ProcessPoolExecutor
+        else:
+            raise ValueError("Unknown mode: {}".format(mode))
+
+        items = list(iterable)
+        if self.dryrun:
+            self.logger.info("Stubbed")
+            return self.progress([stubbedValue] * len(items), desc=desc)  # type: ignore
+
+        def _iterate() -> Iterable[Y]:
+            with executor(workers) as pool:
+                futures = [
+                    pool.submit(_mapChunk, func, items[i : i + chunksize])
+                    for i in range(0, len(items), chunksize)
+                ]
+                try:
+                    for future in futures if ordered else concurrent.futures.as_completed(futures):
+                        for success, value in future.result():
+                            if not success and not return_exceptions:
+                                raise value
+                            yield value
+                finally:
+                    # Do not run remaining items if iteration is stopped or failed
+                    for future in futures:
+                        future.cancel()
+
+        return self.progress(_iterate(), total=len(items), desc=desc)
 
     @abc.abstractmethod
     def do(self) -> Any:
@@ -173,12 +492,73 @@ class Task(metaclass=abc.ABCMeta):
         If an exception is raised during execution, its stack will be printed in the logger and the exception
         will be re-raised.
 
+        If the task is `cacheable`, a previous result is returned without calling `do()` if found in the cache.
+
+        The run is measured in `Task.METRICS`, and profiled if the `profile` option is provided.
+
+        If `do()` is a generator (e.g. a stage of a `StreamingPipeline`), a generator is returned: the run is
+        measured while its items are consumed, excluding the time spent by the consumer between items, and
+        the task is not cached.
+
         Raises:
         - e: Any exception raised by `do()`
 
         Returns:
         - Any: Any value returned by `do()`
         """
+        if inspect.isgeneratorfunction(self.do):
+            return self._runItems()
+
+        start = time.time()
+        try:
+            with Task.METRICS.measure(self), profileTask(self):
+                cache, key = self._cache()
+                if cache is None or key is None:
+                    return self._runUncached()
+
+                found, res = cache.get(key)
+                if found:
+                    self.logger.info("Using cached result")
+                    return res
+
+                res = self._runUncached()
+                cache.set(key, res)
+                return res
+        finally:
+            self._reportMetrics(start)
+
+    def _runItems(self) -> Iterator[Any]:
+        start = time.time()
+        try:
+            with Task.METRICS.measure(self) as paused, profileTask(self):
+                try:
+                    for item in self._runUncached():
+                        with paused():
+                            yield item
+                except GeneratorExit:
+                    # Consumer stopped before the last item
+                    return
+        finally:
+            self._reportMetrics(start)
+
+    def _cache(self) -> Tuple[Optional[ResultCache], Optional[str]]:
+        """Returns the cache of the results of the task and its key, if the task is cached."""
+        if not (self.cacheable and self.cache_dir and not self.dryrun):
+            return None, None
+        cache = ResultCache(self.cache_dir)
+        return cache, cache.key(self)
+
+    def _reportMetrics(self, start: float) -> None:
+        """Logs a summary of the runs started since `start` and writes them to the file given in the `metrics`
+        option (if any)."""
+        path = self.options.get("metrics", None)
+        if not path:
+            return
+        records = Task.METRICS.since(start)
+        self.logger.info("Metrics:\n{}".format(Task.METRICS.summary(records)))
+        Task.METRICS.dump(path, records)
+
+    def _runUncached(self) -> Any:
         if Task.DEBUGGING:
             return self.do()
         else:
@@ -187,3 +567,8 @@ class Task(metaclass=abc.ABCMeta):
             except Exception as e:
                 self.logger.critical("Got exception: {} {}".format(e.__class__.__name__, e), exc_info=e)
                 raise e
+
+
+Task.METRICS.on_start.append(_onStart)
+Task.METRICS.on_finish.append(_onEnd)
+Task.METRICS.on_error.append(_onEnd)
@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class _Span:
+    def __init__(self, name: str, thread: str, ready: float, start: float, end: float, status: str) -> None:
+        self.name = name
+        self.thread = thread
+        self.ready = ready
+        self.start = start
+        self.end = end
+        self.status = status
+
+
+class TraceRecorder:
+    """Records when the tasks of an `Orchestrator` run were ready, started and finished, and on which worker.
+
+    The timeline can be exported as Chrome Trace Event JSON, to be opened in `chrome://tracing` or
+    https://ui.perfetto.dev: each task is a span on the worker thread that ran it, and the time it waited for
+    a worker once ready is shown as a separate "waiting" span.
+
+    Usage: see `CliParams.trace()`, or:
+    ```
+    recorder = TraceRecorder(num_threads=4)
+    recorder.record("MyTask", "Worker-0", ready, start, end, "completed")
+    recorder.stop()
+    recorder.dump("trace.json")
+    ```
+    """
+
+    def __init__(self, num_threads: int) -> None:
+        """Starts recording.
+
+        Args:
+        - num_threads (int): Number of workers, used to compute the utilization
+        """
+        self.num_threads = num_threads
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.spans: List[_Span] = []
+        self.lock = threading.Lock()
+
+    def record(self, name: str, thread: str, ready: float, start: float, end: float, status: str) -> None:
+        """Records the run of a task (thread-safe).
+
+        Args:
+        - name (str): Name of the task
+        - thread (str): Name of the worker that ran the task
+        - ready (float): Time (timestamp) at which the task was ready to start
+        - start (float): Time (timestamp) at which the task started
+        - end (float): Time (timestamp) at which the task finished
+        - status (str): Either "completed" or "failed"
+        """
+        with self.lock:
+            # Tasks ready when the run started became ready when the graph was built
+            self.spans.append(_Span(name, thread, max(ready, self.start), start, end, status))
+
+    def stop(self) -> None:
+        self.end = time.time()
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    @property
+    def busy(self) -> float:
+        """Total time (in seconds) spent by workers running tasks."""
+        return sum(x.end - x.start for x in self.spans)
+
+    def utilization(self) -> float:
+        """Returns the share of `num_threads` x `duration` during which workers were running tasks."""
+        capacity = self.num_threads * self.duration
+        return self.busy / capacity if capacity > 0 else 0.0
+
+    def summary(self) -> str:
+        waits = [x.start - x.ready for x in self.spans]
+        return (
+            "Utilization: {:.1%} of {} threads over {:.3f} s (busy {:.3f} s, idle {:.3f} s), "
+            "{} tasks waited {:.3f} s in total for a worker (max {:.3f} s)"
+        ).format(
+            self.utilization(),
+            self.num_threads,
+            self.duration,
+            self.busy,
+            self.num_threads * self.duration - self.busy,
+            len(self.spans),
+            sum(waits),
+            max(waits, default=0.0),
+        )
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Returns the timeline as Chrome Trace Events (timestamps in microseconds since the start)."""
+
+        def _us(t: float) -> float:
+            return round((t - self.start) * 1e6, 3)
+
+        threads: Dict[str, int] = {}
+        res: List[Dict[str, Any]] = []
+        with self.lock:
+            spans = sorted(self.spans, key=lambda x: x.start)
+        for index, span in enumerate(spans):
+            if span.thread not in threads:
+                threads[span.thread] = len(threads) + 1
+                res.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": 1,
+                        "tid": threads[span.thread],
+                        "args": {"name": span.thread},
+                    }
+                )
+            tid = threads[span.thread]
+            args = {
+                "status": span.status,
+                "ready_us": _us(span.ready),
+                "wait_us": round((span.start - span.ready) * 1e6, 3),
+            }
+            res.append(
+                {
+                    "name": span.name,
+                    "cat": "task",
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": tid,
+                    "ts": _us(span.start),
+                    "dur": round((span.end - span.start) * 1e6, 3),
+                    "args": args,
+                }
+            )
+            if span.start > span.ready:
+                # Async events can overlap, unlike spans of a same thread
+                for ph, ts in (("b", span.ready), ("e", span.start)):
+                    res.append(
+                        {
+                            "name": span.name,
+                            "cat": "waiting",
+                            "ph": ph,
+                            "pid": 1,
+                            "tid": tid,
+                            "id": index,
+                            "ts": _us(ts),
+                        }
+                    )
+        return res
+
+    def dump(self, path: str) -> None:
+        """Writes the timeline to a Chrome Trace Event JSON file.
+
+        Args:
+        - path (str): Path of the file
+        """
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": self.events(),
+                    "displayTimeUnit": "ms",
+                    "otherData": {"utilization": self.utilization(), "num_threads": self.num_threads},
+                },
+                f,
+            )
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+
+from simpletasks.asyncorchestrator import AsyncOrchestrator
+from simpletasks.asynctask import AsyncTask
+from simpletasks.graph import Tasks
+from simpletasks.helpers import addTestLogger
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.DEBUG)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class Counter:
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    @classmethod
+    def enter(cls) -> None:
+        with cls.lock:
+            cls.running += 1
+            cls.peak = max(cls.peak, cls.running)
+
+    @classmethod
+    def exit(cls) -> None:
+        with cls.lock:
+            cls.running -= 1
+
+
+class AsyncNominalTask(AsyncTask):
+    async def do(self) -> bool:
+        Counter.enter()
+        await asyncio.sleep(0.1)
+        self.logger.info("Hello, from {}!".format(self.__class__.__name__))
+        Counter.exit()
+        return True
+
+
+class AsyncNominalTask2(AsyncNominalTask):
+    pass
+
+
+class AsyncNominalTask3(AsyncNominalTask):
+    pass
+
+
+class SyncNominalTask(Task):
+    def do(self) -> str:
+        Counter.enter()
+        time.sleep(0.1)
+        self.logger.info("Hello, from SyncNominalTask in {}!".format(threading.current_thread().name))
+        Counter.exit()
+        return "sync"
+
+
+class AsyncFailureTask(AsyncTask):
+    async def do(self) -> None:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("error")
+
+
+class AsyncOrch(AsyncOrchestrator):
+    tasks: Tasks = {
+        AsyncNominalTask: ([], {}),
+        AsyncNominalTask2: ([], {"foo": "bar"}),
+        AsyncNominalTask3: ([], {}),
+        SyncNominalTask: ([AsyncNominalTask, AsyncNominalTask2], {}),
+    }
+    max_concurrency = 2
+
+
+class AsyncOrchFailure(AsyncOrchestrator):
+    tasks: Tasks = {
+        AsyncFailureTask: ([], {}),
+        AsyncNominalTask: ([AsyncFailureTask], {}),
+        SyncNominalTask: ([], {}),
+    }
+    max_concurrency = 10
+
+
+class OrchWithAsync(Orchestrator):
+    tasks: Tasks = {
+        AsyncNominalTask: ([], {}),
+    }
+    num_threads = 1
+
+
+def test_async_orchestrator(configure, tmp_path) -> None:
+    Counter.peak = 0
+    # Options of the orchestrator only are not passed to subtasks
+    o = AsyncOrch(journal_dir=str(tmp_path / "journals"), trace=str(tmp_path / "trace.json"))
+    logger = addTestLogger(o)
+
+    o.runSync()
+
+    output = logger.getvalue()
+    assert (
+        "simpletasks.AsyncOrch - DEBUG - Starting task AsyncNominalTask2 using arguments: {'foo': 'bar', 'loggernamespace': 'simpletasks.AsyncOrch.AsyncNominalTask2'}"
+        in output
+    )
+    assert "simpletasks.AsyncOrch.AsyncNominalTask - INFO - Hello, from AsyncNominalTask!" in output
+    assert "simpletasks.AsyncOrch.AsyncNominalTask2 - INFO - Hello, from AsyncNominalTask2!" in output
+    assert "simpletasks.AsyncOrch.AsyncNominalTask3 - INFO - Hello, from AsyncNominalTask3!" in output
+    assert (
+        "simpletasks.AsyncOrch.SyncNominalTask - INFO - Hello, from SyncNominalTask in ThreadPool" in output
+    )
+    assert "simpletasks.AsyncOrch - INFO - Completed task SyncNominalTask: sync" in output
+    assert output.index("Completed task AsyncNominalTask2") < output.index("Starting task SyncNominalTask")
+    assert Counter.peak == 2
+
+
+def test_async_orchestrator_failure(configure) -> None:
+    o = AsyncOrchFailure()
+    logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.runSync()
+    assert str(e.value) == "Task failed"
+
+    output = logger.getvalue()
+    assert "simpletasks.AsyncOrchFailure - INFO - Failed task AsyncFailureTask: error" in output
+    assert "simpletasks.AsyncOrchFailure - INFO - Completed task SyncNominalTask: sync" in output
+    assert "Starting task AsyncNominalTask" not in output
+    assert (
+        "simpletasks.AsyncOrchFailure - CRITICAL - Done but some tasks remaining: AsyncNominalTask" in output
+    )
+    assert (
+        "simpletasks.AsyncOrchFailure - CRITICAL - Could not run AsyncFailureTask: RuntimeError error"
+        in output
+    )
+
+
+def test_async_orchestrator_keep_going(configure) -> None:
+    o = AsyncOrchFailure(keep_going=True)
+    logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.runSync()
+    assert str(e.value) == "Task failed"
+    assert o.completed == {SyncNominalTask}
+    assert o.failed == {AsyncFailureTask}
+    assert o.skipped == {AsyncNominalTask}
+
+    output = logger.getvalue()
+    assert "Skipping tasks depending on AsyncFailureTask: AsyncNominalTask" in output
+    assert "Done but some tasks remaining" not in output
+
+
+def test_async_in_orchestrator(configure) -> None:
+    o = OrchWithAsync()
+    logger = addTestLogger(o)
+
+    o.run()
+
+    output = logger.getvalue()
+    assert "simpletasks.OrchWithAsync.AsyncNominalTask - INFO - Hello, from AsyncNominalTask!" in output
+    assert "simpletasks.OrchWithAsync - INFO - Completed task AsyncNominalTask: True" in output
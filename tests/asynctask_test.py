@@ -0,0 +1,92 @@
+import asyncio
+import logging
+
+import pytest
+
+from simpletasks.asynctask import AsyncTask
+from simpletasks.helpers import addTestLogger
+from simpletasks.pipeline import Pipeline
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = False
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class NominalTask(AsyncTask):
+    async def foo(self) -> str:
+        await asyncio.sleep(0.01)
+        return "foo"
+
+    async def do(self) -> bool:
+        self.logger.info("Hello, from NominalTask!")
+        assert await self.executeAsync(self.foo, stubbedValue="bar") == ("bar" if self.dryrun else "foo")
+        return True
+
+
+class FailureTask(AsyncTask):
+    async def do(self) -> None:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("error")
+
+
+class NominalPipeline(Pipeline):
+    tasks = [NominalTask]
+
+
+def test_nominal(configure) -> None:
+    o = NominalTask()
+    logger = addTestLogger(o)
+
+    assert o.runSync()
+    assert logger.getvalue() == "simpletasks.NominalTask - INFO - Hello, from NominalTask!\n"
+
+
+def test_await(configure) -> None:
+    o = NominalTask(dryrun=True)
+    logger = addTestLogger(o)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(o.run())
+    finally:
+        loop.close()
+    assert (
+        logger.getvalue()
+        == "simpletasks.NominalTask - INFO - Hello, from NominalTask!\nsimpletasks.NominalTask - INFO - Stubbed\n"
+    )
+
+
+def test_failure(configure) -> None:
+    o = FailureTask()
+    logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.runSync()
+    assert str(e.value) == "error"
+    output = logger.getvalue()
+    assert output.startswith("simpletasks.FailureTask - CRITICAL - Got exception: RuntimeError error\n")
+    assert output.endswith("RuntimeError: error\n")
+
+
+def test_pipeline(configure) -> None:
+    o = NominalPipeline()
+    logger = addTestLogger(o)
+
+    o.run()
+    assert logger.getvalue() == "simpletasks.NominalPipeline.NominalTask - INFO - Hello, from NominalTask!\n"
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from typing import List
+
+import pytest
+
+from simpletasks.asynctask import AsyncTask
+from simpletasks.helpers import addTestLogger
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class BatchTask(Task):
+    def do(self) -> List[List[int]]:
+        flushes: List[List[int]] = []
+
+        def _flush(items: List[int]) -> int:
+            flushes.append(items)
+            return len(items)
+
+        with self.batch(_flush, size=3, stubbedValue=0) as batch:
+            batch.extend(range(7))
+            assert len(batch) == 1
+        assert batch.flushed == 7
+        self.options["results"] = batch.results
+        return flushes
+
+
+def test_batch(configure) -> None:
+    o = BatchTask()
+    assert o.run() == [[0, 1, 2], [3, 4, 5], [6]]
+    assert o.options["results"] == [3, 3, 1]
+
+    o = BatchTask(dryrun=True)
+    logger = addTestLogger(o)
+    assert o.run() == []
+    assert o.options["results"] == [0, 0, 0]
+    assert (
+        logger.getvalue()
+        == """simpletasks.BatchTask - INFO - Stubbed
+simpletasks.BatchTask - INFO - Stubbed
+simpletasks.BatchTask - INFO - Stubbed
+"""
+    )
+
+
+class IntervalTask(Task):
+    def do(self) -> List[List[int]]:
+        flushes: List[List[int]] = []
+        with self.batch(flushes.append, size=100, interval=0.1) as batch:
+            batch.add(0)
+            batch.add(1)
+            time.sleep(0.1)
+            batch.add(2)
+            batch.add(3)
+            # Not due yet
+            batch.flushDue()
+            assert len(batch) == 1
+            time.sleep(0.1)
+            # Flushed without adding an item
+            batch.flushDue()
+            assert len(batch) == 0
+            batch.add(4)
+        return flushes
+
+
+def test_batch_interval(configure) -> None:
+    assert IntervalTask().run() == [[0, 1, 2], [3], [4]]
+
+
+class FailingBatchTask(Task):
+    def do(self) -> None:
+        with self.batch(self.options["flushes"].append, size=2) as batch:
+            batch.extend(range(3))
+            raise RuntimeError("error")
+
+
+def test_batch_failure(configure) -> None:
+    flushes: List[List[int]] = []
+    o = FailingBatchTask(flushes=flushes)
+    logger = addTestLogger(o)
+    with pytest.raises(RuntimeError):
+        o.run()
+    # Pending items are not flushed
+    assert flushes == [[0, 1]]
+    assert "simpletasks.FailingBatchTask - WARNING - Not flushing 1 items after failure" in logger.getvalue()
+
+    with pytest.raises(ValueError):
+        o.batch(flushes.append, size=0)
+
+
+def test_batch_failing_flush(configure) -> None:
+    calls: List[List[int]] = []
+
+    def _flush(items: List[int]) -> None:
+        calls.append(items)
+        if len(calls) == 1:
+            raise RuntimeError("flush error")
+
+    o = BatchTask()
+    logger = addTestLogger(o)
+    batch = o.batch(_flush, size=2)
+    with pytest.raises(RuntimeError):
+        batch.extend(range(3))
+    # Items of the failed flush are kept, and flushed first
+    assert len(batch) == 2
+    batch.add(2)
+    batch.flush()
+    assert calls == [[0, 1], [0, 1], [2]]
+
+    # Items of a failed last flush are discarded with a warning
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        with o.batch(_flush, size=10) as batch:
+            batch.extend(range(3))
+    assert len(batch) == 0
+    assert "simpletasks.BatchTask - WARNING - Not flushing 3 items after failure" in logger.getvalue()
+
+
+class ThreadedBatchTask(Task):
+    def do(self) -> List[List[int]]:
+        flushes: List[List[int]] = []
+        with self.batch(flushes.append, size=10) as batch:
+            threads = [
+                threading.Thread(target=batch.extend, args=(range(i * 100, (i + 1) * 100),)) for i in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        return flushes
+
+
+def test_batch_threads(configure) -> None:
+    flushes = ThreadedBatchTask().run()
+    assert all(len(x) <= 10 for x in flushes)
+    assert sorted(x for flush in flushes for x in flush) == list(range(400))
+
+
+class AsyncBatchTask(AsyncTask):
+    async def do(self) -> List[List[int]]:
+        flushes: List[List[int]] = []
+
+        async def _flush(items: List[int]) -> int:
+            flushes.append(items)
+            return len(items)
+
+        async with self.batchAsync(_flush, size=2) as batch:
+            await batch.extend(range(5))
+        self.options["results"] = batch.results
+        return flushes
+
+
+def test_batch_async(configure) -> None:
+    o = AsyncBatchTask()
+    assert o.runSync() == [[0, 1], [2, 3], [4]]
+    assert o.options["results"] == [2, 2, 1]
+
+    o = AsyncBatchTask(dryrun=True)
+    assert o.runSync() == []
+    assert o.options["results"] == [None, None, None]
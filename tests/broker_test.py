@@ -0,0 +1,184 @@
+import logging
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+import pytest
+
+from simpletasks.broker import BrokerWorker, SQLiteBroker
+from simpletasks.graph import Tasks
+from simpletasks.helpers import addTestLogger
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+def test_sqlitebroker(tmp_path) -> None:
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    job1 = broker.publish(b"job1")
+    job2 = broker.publish(b"job2")
+
+    # Oldest job first, claimed only once
+    assert broker.claim("worker1") == (job1, b"job1")
+    assert broker.claim("worker2") == (job2, b"job2")
+    assert broker.claim("worker3") is None
+
+    assert broker.result(job1) is None
+    broker.complete(job1, b"result1")
+    assert broker.result(job1) == b"result1"
+    # Job is removed once its result is read
+    assert broker.result(job1) is None
+
+
+def test_sqlitebroker_lease(tmp_path) -> None:
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"), lease=0.1)
+    job = broker.publish(b"job")
+    assert broker.claim("worker1") == (job, b"job")
+    assert broker.claim("worker2") is None
+
+    # Worker1 died: job is claimed again after the lease
+    time.sleep(0.1)
+    assert broker.claim("worker2") == (job, b"job")
+
+
+class ComputeTask(Task):
+    def do(self) -> int:
+        return sum(range(self.options["n"]))
+
+
+class ComputeTask2(Task):
+    def do(self) -> int:
+        return self.inputs[ComputeTask] * 2
+
+
+class FailureTask(Task):
+    def do(self) -> None:
+        raise RuntimeError("error")
+
+
+class OrchBroker(Orchestrator):
+    tasks: Tasks = {
+        ComputeTask: ([], {"n": 10}),
+        ComputeTask2: ([ComputeTask], {}),
+        FailureTask: ([], {}),
+    }
+    num_threads = 2
+    executor = "broker"
+
+
+def _startWorkers(broker: SQLiteBroker, count: int) -> List[threading.Thread]:
+    threads = []
+    for i in range(count):
+        worker = BrokerWorker(broker, "worker{}".format(i))
+        worker.POLL_INTERVAL = 0.05
+        t = threading.Thread(target=worker.run, kwargs={"idle_timeout": 0.5})
+        t.start()
+        threads.append(t)
+    return threads
+
+
+def test_orchestrator_broker(configure, tmp_path, monkeypatch) -> None:
+    with pytest.raises(ValueError):
+        OrchBroker()
+
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    broker.POLL_INTERVAL = 0.05
+    monkeypatch.setattr(OrchBroker, "broker", broker)
+    o = OrchBroker(fail_on_exception=False)
+    task_logger = addTestLogger(o)
+
+    threads = _startWorkers(broker, 2)
+    with pytest.raises(RuntimeError) as e:
+        o.run()
+    assert str(e.value) == "Task failed"
+    for t in threads:
+        t.join()
+
+    output = task_logger.getvalue()
+    assert "simpletasks.OrchBroker - INFO - Completed task ComputeTask: 45" in output
+    assert "simpletasks.OrchBroker - INFO - Completed task ComputeTask2: 90" in output
+    assert "simpletasks.OrchBroker - CRITICAL - Could not run FailureTask: RuntimeError error" in output
+    assert o.completed == {ComputeTask, ComputeTask2}
+    assert len(o.exceptions) == 1
+    assert o.exceptions[0][0] is FailureTask
+    assert isinstance(o.exceptions[0][1], RuntimeError)
+
+
+def test_worker_invalid_job(tmp_path) -> None:
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    job = broker.publish(b"invalid")
+    assert BrokerWorker(broker).runOne()
+    res, failure, records = pickle.loads(broker.wait(job))
+    assert res is None
+    assert str(failure).startswith("Could not load job")
+
+
+@pytest.mark.slow
+def test_worker_process(configure, tmp_path) -> None:
+    path = str(tmp_path / "jobs.db")
+    broker = SQLiteBroker(path)
+    broker.POLL_INTERVAL = 0.05
+    job = broker.publish(pickle.dumps((ComputeTask, {"n": 5}, {}, time.monotonic())))
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run(
+        [sys.executable, "-m", "simpletasks.broker", path, "--max-jobs", "1"],
+        cwd=root,
+        check=True,
+        timeout=60,
+    )
+    assert pickle.loads(broker.wait(job))[:2] == (10, None)
+
+
+def test_orchestrator_broker_dead_worker(configure, tmp_path, monkeypatch) -> None:
+    broker = SQLiteBroker(str(tmp_path / "jobs.db"))
+    broker.POLL_INTERVAL = 0.05
+    monkeypatch.setattr(OrchBroker, "broker", broker)
+    monkeypatch.setattr(OrchBroker, "broker_timeout", 0.5)
+    monkeypatch.setattr(OrchBroker, "tasks", {ComputeTask: ([], {"n": 10})})
+    o = OrchBroker(fail_on_exception=False)
+    task_logger = addTestLogger(o)
+
+    def _die() -> None:
+        # Worker claiming the job and dying before completing it
+        while broker.claim("dead") is None:
+            time.sleep(0.05)
+
+    thread = threading.Thread(target=_die)
+    thread.start()
+    with pytest.raises(RuntimeError) as e:
+        o.run()
+    assert str(e.value) == "Task failed"
+    thread.join()
+
+    assert len(o.exceptions) == 1
+    assert o.exceptions[0][0] is ComputeTask
+    assert isinstance(o.exceptions[0][1], TimeoutError)
+    assert (
+        "simpletasks.OrchBroker - CRITICAL - Could not run ComputeTask: TimeoutError Job"
+        in task_logger.getvalue()
+    )
+    # Job is removed from the queue
+    assert broker.claim("worker") is None
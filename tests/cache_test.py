@@ -0,0 +1,170 @@
+import datetime
+import logging
+import os
+
+import pytest
+
+from simpletasks.asynctask import AsyncTask
+from simpletasks.cache import ResultCache
+from simpletasks.helpers import addTestLogger
+from simpletasks.pipeline import Pipeline
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = False
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class CachedTask(Task):
+    cacheable = True
+    calls = 0
+
+    def do(self) -> int:
+        CachedTask.calls += 1
+        self.logger.info("Computing")
+        return self.options.get("n", 0) * 2
+
+
+class UncachedTask(Task):
+    calls = 0
+
+    def do(self) -> None:
+        UncachedTask.calls += 1
+
+
+class CachedPipeline(Pipeline):
+    tasks = [CachedTask, UncachedTask]
+
+
+def test_cache(configure, tmp_path) -> None:
+    CachedTask.calls = 0
+    UncachedTask.calls = 0
+    cache_dir = str(tmp_path / "cache")
+
+    o = CachedPipeline(cache_dir=cache_dir, n=21)
+    logger = addTestLogger(o)
+    o.run()
+    assert CachedTask.calls == 1
+    assert UncachedTask.calls == 1
+    assert logger.getvalue() == "simpletasks.CachedPipeline.CachedTask - INFO - Computing\n"
+    assert len(os.listdir(cache_dir)) == 1
+
+    o = CachedPipeline(cache_dir=cache_dir, n=21, verbose=True)
+    logger = addTestLogger(o)
+    o.run()
+    assert CachedTask.calls == 1
+    assert UncachedTask.calls == 2
+    assert logger.getvalue() == "simpletasks.CachedPipeline.CachedTask - INFO - Using cached result\n"
+
+    assert CachedTask(cache_dir=cache_dir, n=21).run() == 42
+    assert CachedTask.calls == 1
+
+    # Different options
+    assert CachedTask(cache_dir=cache_dir, n=1).run() == 2
+    assert CachedTask(cache_dir=cache_dir, n=21, date=datetime.date(2020, 1, 1)).run() == 42
+    assert CachedTask.calls == 3
+
+    # Not cached
+    assert CachedTask(n=21).run() == 42
+    assert CachedTask(cache_dir=cache_dir, n=21, dryrun=True).run() == 42
+    assert CachedTask.calls == 5
+
+
+def test_cache_eviction(tmp_path) -> None:
+    cache = ResultCache(str(tmp_path), max_size=150)
+    cache.set("a", "a" * 100)
+    assert cache.get("a") == (True, "a" * 100)
+    cache.set("b", "b" * 100)
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, "b" * 100)
+
+    cache = ResultCache(str(tmp_path), max_age=-1)
+    assert cache.get("b") == (False, None)
+    cache.set("c", "c")
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_cache_delete(tmp_path) -> None:
+    cache = ResultCache(str(tmp_path))
+    cache.set("a", 1)
+    cache.delete("a")
+    assert cache.get("a") == (False, None)
+    # Already removed
+    cache.delete("a")
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_cache_unpicklable(tmp_path) -> None:
+    cache = ResultCache(str(tmp_path))
+    cache.set("a", lambda: None)
+    assert cache.get("a") == (False, None)
+    assert os.listdir(str(tmp_path)) == []
+
+
+class SourceTask(Task):
+    def do(self) -> int:
+        return self.options["value"]
+
+
+class CachedConsumerTask(Task):
+    cacheable = True
+
+    def do(self) -> int:
+        return self.inputs[SourceTask] * 10
+
+
+def test_cache_inputs(configure, tmp_path) -> None:
+    cache_dir = str(tmp_path / "cache")
+    o = CachedConsumerTask(cache_dir=cache_dir)
+    o.inputs = {SourceTask: 1}
+    assert o.run() == 10
+
+    # Results of predecessors are part of the key
+    o = CachedConsumerTask(cache_dir=cache_dir)
+    o.inputs = {SourceTask: 2}
+    assert o.run() == 20
+    assert len(os.listdir(cache_dir)) == 2
+
+    # Inputs that cannot be pickled: not cached
+    o = CachedConsumerTask(cache_dir=cache_dir)
+    o.inputs = {SourceTask: 3, UncachedTask: lambda: None}
+    assert o.run() == 30
+    assert len(os.listdir(cache_dir)) == 2
+
+
+class CachedAsyncTask(AsyncTask):
+    cacheable = True
+    calls = 0
+
+    async def do(self) -> int:
+        CachedAsyncTask.calls += 1
+        return self.options.get("n", 0) * 2
+
+
+def test_cache_async(configure, tmp_path) -> None:
+    CachedAsyncTask.calls = 0
+    cache_dir = str(tmp_path / "cache")
+    assert CachedAsyncTask(cache_dir=cache_dir, n=21).runSync() == 42
+    o = CachedAsyncTask(cache_dir=cache_dir, n=21)
+    logger = addTestLogger(o)
+    assert o.runSync() == 42
+    assert CachedAsyncTask.calls == 1
+    assert logger.getvalue() == "simpletasks.CachedAsyncTask - INFO - Using cached result\n"
+
+    assert CachedAsyncTask(cache_dir=cache_dir, n=21, dryrun=True).runSync() == 42
+    assert CachedAsyncTask.calls == 2
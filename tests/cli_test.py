@@ -1,5 +1,7 @@
 import datetime
+import json
 import logging
+import sys
 
 import pytest
 
@@ -9,12 +11,14 @@ try:
     import click
     from click.testing import CliRunner
 
-    from simpletasks.cli import Cli, CliParams
+    from simpletasks.cli import Cli, CliParams, LazyGroup
 
     @click.group()
     def cli():
         pass
 
+    lazy_cli = LazyGroup()
+
 
 except ImportError:
     pytest.skip("Skipping Cli tests - click not installed", allow_module_level=True)
@@ -62,6 +66,16 @@ def test_options(configure) -> None:
             CliParams.force(),
             CliParams.verbose(),
             CliParams.fail_on_exception(),
+            CliParams.keep_going(),
+            CliParams.cache_dir(),
+            CliParams.journal_dir(),
+            CliParams.resume(),
+            CliParams.metrics(),
+            CliParams.trace(),
+            CliParams.profile(),
+            CliParams.profile_mode(),
+            CliParams.date_range(),
+            CliParams.parallel(),
             CliParams.timestamp_deprecated(),
         ],
     )
@@ -101,3 +115,154 @@ def test_date(configure) -> None:
     result = runner.invoke(cli, ["date", "--date", "invalid-date"])
     assert result.exit_code == 2
     assert "Error: Invalid value for '--date': timestamp must be in format YYYY-MM-DD" in result.output
+
+
+def test_date_range(configure) -> None:
+    @Cli(
+        cli,
+        params=[
+            CliParams.date(),
+            CliParams.date_range(),
+            CliParams.parallel(),
+        ],
+    )
+    class DateRangeTask(Task):
+        def do(self) -> None:
+            assert "date_range" not in self.options and "parallel" not in self.options
+            click.echo(self.date.strftime("%Y-%m-%d"))
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["daterange", "--date-range", "2020-01-30:2020-02-02", "--parallel", "2"])
+    assert result.exit_code == 0
+    assert sorted(result.output.splitlines()) == ["2020-01-30", "2020-01-31", "2020-02-01", "2020-02-02"]
+
+    result = runner.invoke(cli, ["daterange", "--date", "2020-01-01"])
+    assert result.exit_code == 0
+    assert result.output == "2020-01-01\n"
+
+    result = runner.invoke(cli, ["daterange", "--date-range", "2020-01-02:2020-01-01"])
+    assert result.exit_code == 2
+    assert "Error: Invalid value for '--date-range': Date range ends before it starts" in result.output
+
+    result = runner.invoke(
+        cli, ["daterange", "--date-range", "2020-01-01:2020-01-02", "--date", "2020-01-01"]
+    )
+    assert result.exit_code == 2
+    assert "Error: --date and --date-range cannot be used together" in result.output
+
+    result = runner.invoke(cli, ["daterange", "--date", "2020-01-01", "--parallel", "2"])
+    assert result.exit_code == 2
+    assert "Error: --parallel can only be used with --date-range" in result.output
+
+
+LAZY_MODULE = """
+import click
+
+from simpletasks.task import Task
+from simpletasks.cli import Cli
+from tests.cli_test import lazy_cli
+
+
+@Cli(lazy_cli, "hello", params=[click.argument("name")])
+class HelloTask(Task):
+    def do(self) -> None:
+        click.echo("Hello, {}!".format(self.options["name"]))
+
+
+class UndecoratedTask(Task):
+    def do(self) -> None:
+        click.echo("Hello, from UndecoratedTask!")
+"""
+
+
+def test_lazy(configure, tmp_path, monkeypatch) -> None:
+    (tmp_path / "lazytasks.py").write_text(LAZY_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Module and commands are removed after the test
+    monkeypatch.setitem(sys.modules, "lazytasks", None)
+    del sys.modules["lazytasks"]
+    monkeypatch.setattr(lazy_cli, "commands", {})
+    monkeypatch.setattr(lazy_cli, "lazy_commands", {})
+    lazy_cli.addLazyCommand("hello", "lazytasks:HelloTask", help="Says hello")
+    lazy_cli.addLazyCommand("undecorated", "lazytasks:UndecoratedTask")
+
+    runner = CliRunner()
+    result = runner.invoke(lazy_cli, ["--help"])
+    assert result.exit_code == 0
+    assert "  hello        Says hello\n  undecorated\n" in result.output
+    assert "lazytasks" not in sys.modules
+
+    result = runner.invoke(lazy_cli, ["hello", "world"])
+    assert result.exit_code == 0
+    assert result.output == "Hello, world!\n"
+    assert "lazytasks" in sys.modules
+
+    # Created with default parameters of `Cli`
+    result = runner.invoke(lazy_cli, ["undecorated", "--no-progress", "--dryrun"])
+    assert result.exit_code == 0
+    assert result.output == "Hello, from UndecoratedTask!\n"
+
+    result = runner.invoke(lazy_cli, ["unknown"])
+    assert result.exit_code == 2
+
+
+@click.group()
+def manifest_cli():
+    pass
+
+
+@Cli(manifest_cli, help="Says hello")
+class ManifestTask(Task):
+    def do(self) -> None:
+        click.echo("Hello, from ManifestTask!")
+
+
+def test_manifest(configure, tmp_path) -> None:
+    path = str(tmp_path / "commands.json")
+    LazyGroup.writeManifest(manifest_cli, path)
+    with open(path) as f:
+        manifest = json.load(f)
+    assert manifest["manifest"]["task"] == "tests.cli_test:ManifestTask"
+    assert manifest["manifest"]["help"] == "Says hello"
+    assert manifest["manifest"]["usage"] == "[OPTIONS]"
+    assert ["--dryrun", "Do not make changes"] in manifest["manifest"]["params"]
+
+    group = LazyGroup(manifest=path)
+    runner = CliRunner()
+    result = runner.invoke(group, ["--help"])
+    assert "  manifest  Says hello\n" in result.output
+
+    result = runner.invoke(group, ["manifest"])
+    assert result.exit_code == 0
+    assert result.output == "Hello, from ManifestTask!\n"
+
+
+def test_lazy_help(configure, tmp_path, monkeypatch) -> None:
+    (tmp_path / "lazytasks.py").write_text(LAZY_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(sys.modules, "lazytasks", None)
+    del sys.modules["lazytasks"]
+    monkeypatch.setattr(lazy_cli, "commands", {})
+    monkeypatch.setattr(lazy_cli, "lazy_commands", {})
+    lazy_cli.addLazyCommand(
+        "hello",
+        "lazytasks:HelloTask",
+        help="Says hello",
+        params=[["--help", "Show this message and exit."]],
+        usage="[OPTIONS] NAME",
+        description="Says hello to NAME.",
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(lazy_cli, ["hello", "--help"])
+    assert result.exit_code == 0
+    assert "hello [OPTIONS] NAME\n" in result.output
+    assert "  Says hello to NAME.\n" in result.output
+    assert "  --help  Show this message and exit.\n" in result.output
+    # Help is shown without importing the task
+    assert "lazytasks" not in sys.modules
+
+    result = runner.invoke(lazy_cli, ["hello", "world"])
+    assert result.exit_code == 0
+    assert result.output == "Hello, world!\n"
+    assert "lazytasks" in sys.modules
@@ -0,0 +1,33 @@
+import json
+
+from simpletasks.costs import CostHistory
+from simpletasks.task import Task
+
+
+class Task1(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+class Task2(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+def test_history(tmp_path) -> None:
+    path = str(tmp_path / "costs.json")
+    history = CostHistory(path)
+    assert history.costs([Task1, Task2]) == {}
+
+    history.record(Task1, 10)
+    history.record(Task1, 20)
+    assert history.costs([Task1, Task2]) == {Task1: 15}
+    history.save()
+
+    with open(path) as f:
+        assert json.load(f) == {"tests.costs_test.Task1": 15}
+
+    history = CostHistory(path, smoothing=1)
+    assert history.costs([Task1, Task2]) == {Task1: 15}
+    history.record(Task1, 20)
+    assert history.costs([Task1, Task2]) == {Task1: 20}
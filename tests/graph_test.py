@@ -0,0 +1,265 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from simpletasks.graph import TaskGraph, TaskKey, Tasks, taskPath
+from simpletasks.task import Task
+
+
+class Task1(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+class Task2(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+class Task3(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+class Task4(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+def test_graph() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {"foo": "bar"}),
+        Task3: ([Task1], {}),
+        Task4: ([Task2, Task3], {}),
+    }
+    graph = TaskGraph(tasks)
+    assert len(graph) == 4
+    assert graph.args[Task2] == {"foo": "bar"}
+    assert graph.successors == {Task1: [Task3], Task2: [Task4], Task3: [Task4]}
+    assert graph.indegree == {Task1: 0, Task2: 0, Task3: 1, Task4: 2}
+
+    assert graph.popReady() is Task1
+    assert graph.popReady() is Task2
+    assert graph.popReady() is None
+    assert graph.remaining == [Task3, Task4]
+
+    graph.complete(Task2)
+    assert graph.popReady() is None
+    graph.complete(Task1)
+    assert graph.popReady() is Task3
+    graph.complete(Task3)
+    assert graph.popReady() is Task4
+    assert graph.popReady() is None
+    assert len(graph) == 0
+
+
+def test_graph_missing_predecessor() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task4: ([Task3], {}),
+    }
+    graph = TaskGraph(tasks)
+    assert graph.popReady() is Task1
+    graph.complete(Task1)
+    assert graph.popReady() is None
+    assert graph.remaining == [Task4]
+
+
+def test_graph_skip() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {}),
+        Task3: ([Task1], {}),
+        Task4: ([Task2, Task3], {}),
+    }
+    graph = TaskGraph(tasks)
+    assert graph.popReady() is Task1
+    assert graph.popReady() is Task2
+    assert graph.skip(Task1) == [Task3, Task4]
+    assert len(graph) == 0
+
+    graph.complete(Task2)
+    assert graph.popReady() is None
+
+
+def test_graph_priority() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {}, {"cost": 0.5}),
+        Task3: ([Task2], {}, {"cost": 2}),
+        Task4: ([], {}),
+    }
+    graph = TaskGraph(tasks)
+    assert graph.rank == {}
+    assert [graph.popReady() for _ in range(3)] == [Task1, Task2, Task4]
+
+    graph = TaskGraph(tasks, priority=True)
+    assert graph.rank == {Task1: 1.0, Task2: 2.5, Task3: 2.0, Task4: 1.0}
+    assert [graph.popReady() for _ in range(3)] == [Task2, Task1, Task4]
+
+    graph = TaskGraph(tasks, priority=True, costs={Task4: 10.0, Task3: 10.0})
+    assert graph.rank == {Task1: 1.0, Task2: 2.5, Task3: 2.0, Task4: 10.0}
+    assert [graph.popReady() for _ in range(3)] == [Task4, Task2, Task1]
+
+
+def test_graph_accept() -> None:
+    tasks: Tasks = {Task1: ([], {}), Task2: ([], {}), Task3: ([Task1], {})}
+    graph = TaskGraph(tasks)
+    assert graph.popReady(lambda x: x is not Task1) == Task2
+    assert graph.popReady(lambda x: False) is None
+    # Rejected tasks stay ready
+    assert graph.popReady() == Task1
+
+
+def test_graph_accept_groups() -> None:
+    graph = TaskGraph({})
+    needs: Dict[Any, int] = {}
+    for i in range(6):
+        graph.add(TaskKey(Task1, str(i)), [], {})
+        needs[TaskKey(Task1, str(i))] = i % 2 + 1
+    available = [0]
+    checked: List[Any] = []
+
+    def _fits(task: Any) -> bool:
+        checked.append(task)
+        return needs[task] <= available[0]
+
+    assert graph.popReady(_fits, needs.__getitem__) is None
+    assert len(graph.blocked) == 2
+    # Only the first task of each group is checked again
+    checked.clear()
+    assert graph.popReady(_fits, needs.__getitem__) is None
+    assert checked == [TaskKey(Task1, "0"), TaskKey(Task1, "1")]
+
+    # Rejected tasks are started in order once they fit
+    available[0] = 1
+    assert graph.popReady(_fits, needs.__getitem__) == TaskKey(Task1, "0")
+    assert graph.popReady(_fits, needs.__getitem__) == TaskKey(Task1, "2")
+    available[0] = 2
+    assert graph.popReady(_fits, needs.__getitem__) == TaskKey(Task1, "1")
+    graph.markCompleted(TaskKey(Task1, "3"))
+    assert [graph.popReady(_fits, needs.__getitem__) for _ in range(3)] == [
+        TaskKey(Task1, "4"),
+        TaskKey(Task1, "5"),
+        None,
+    ]
+    assert graph.blocked == {}
+
+
+def test_graph_add() -> None:
+    tasks: Tasks = {Task1: ([], {}), Task2: ([Task1], {})}
+    graph = TaskGraph(tasks, priority=True)
+    assert graph.popReady() is Task1
+    graph.complete(Task1)
+
+    first, second = TaskKey(Task3, "first"), TaskKey(Task3, "second")
+    assert first == TaskKey(Task3, "first") and first != second
+    assert first.__name__ == "Task3[first]"
+    assert taskPath(first) == "tests.graph_test.Task3[first]"
+    assert isinstance(first(), Task3)
+
+    # Completed predecessors are not waited for
+    graph.add(first, [Task1], {"n": 1}, {"cost": 3})
+    graph.add(second, [Task1, Task2], {"n": 2})
+    assert graph.rank[first] == 3 and graph.rank[second] == 1
+    assert graph.popReady() is first
+    assert graph.popReady() is Task2
+    assert graph.popReady() is None
+    graph.complete(Task2)
+    assert graph.popReady() is second
+    assert graph.args[second] == {"n": 2}
+
+    with pytest.raises(ValueError) as e:
+        graph.add(first, [], {})
+    assert str(e.value) == "Task Task3[first] is already in the graph"
+    with pytest.raises(ValueError) as e:
+        graph.add(Task4, [TaskKey(Task3, "third")], {})
+    assert str(e.value) == "Unknown predecessor Task3[third] of task Task4"
+
+
+def test_graph_mark_completed() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {}),
+        Task3: ([Task1], {}),
+        Task4: ([Task2, Task3], {}),
+    }
+    graph = TaskGraph(tasks)
+    graph.markCompleted(Task1)
+    graph.markCompleted(Task3)
+    assert graph.popReady() is Task2
+    assert graph.popReady() is None
+    graph.complete(Task2)
+    assert graph.popReady() is Task4
+    assert len(graph) == 0
+
+
+def test_graph_results() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {}),
+        Task3: ([Task1], {}),
+        Task4: ([Task1, Task2, Task3], {}),
+    }
+    graph = TaskGraph(tasks)
+    graph.storeResult(Task1, 1)
+    graph.storeResult(Task2, 2)
+    assert graph.results == {Task1: 1, Task2: 2}
+    assert graph.takeInputs(Task3) == {Task1: 1}
+    assert graph.results == {Task1: 1, Task2: 2}
+    graph.storeResult(Task3, 3)
+    assert graph.takeInputs(Task4) == {Task1: 1, Task2: 2, Task3: 3}
+    assert graph.results == {}
+
+    # No successors: not kept
+    graph.storeResult(Task4, 4)
+    assert graph.results == {}
+
+    # Results of skipped tasks are released
+    graph = TaskGraph(tasks)
+    graph.storeResult(Task2, 2)
+    graph.skip(Task1)
+    assert graph.results == {}
+
+
+def test_graph_results_skipped_successor() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {}),
+        Task3: ([Task1, Task2], {}),
+    }
+    graph = TaskGraph(tasks)
+    assert graph.popReady() is Task1
+    assert graph.popReady() is Task2
+    # Task2 failed before Task1 completed: Task3 will not consume the result of Task1
+    assert graph.skip(Task2) == [Task3]
+    graph.storeResult(Task1, "big")
+    graph.complete(Task1)
+    assert graph.results == {}
+    assert graph._consumers == {}
+
+
+def test_graph_results_added_task() -> None:
+    tasks: Tasks = {
+        Task1: ([], {}),
+        Task2: ([], {}),
+        Task3: ([Task1, Task2], {}),
+    }
+    graph = TaskGraph(tasks)
+    assert graph.popReady() is Task1
+    assert graph.popReady() is Task2
+    graph.storeResult(Task1, "result1")
+    graph.complete(Task1)
+
+    # Task added after Task1 completed does not take the result kept for Task3
+    late = TaskKey(Task4, "late")
+    graph.add(late, [Task1], {})
+    assert graph.popReady() is late
+    assert graph.takeInputs(late) == {}
+
+    graph.storeResult(Task2, "result2")
+    graph.complete(Task2)
+    assert graph.popReady() is Task3
+    assert graph.takeInputs(Task3) == {Task1: "result1", Task2: "result2"}
+    assert graph.results == {}
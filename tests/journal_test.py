@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from simpletasks.journal import Journal
+from simpletasks.task import Task
+
+
+class Task1(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+class Task2(Task):
+    def do(self) -> None:
+        pass  # pragma: no cover
+
+
+def test_journal(tmp_path) -> None:
+    run_id = Journal.newRunId()
+    journal = Journal(str(tmp_path / "journals"), run_id)
+    assert journal.path == str(tmp_path / "journals" / (run_id + ".jsonl"))
+
+    with pytest.raises(ValueError) as e:
+        journal.completed()
+    assert str(e.value) == "No journal for run {}".format(run_id)
+
+    journal.append(Task1, "completed")
+    journal.append(Task2, "failed")
+    with open(journal.path) as f:
+        lines = [json.loads(x) for x in f]
+    assert [(x["task"], x["status"]) for x in lines] == [
+        ("tests.journal_test.Task1", "completed"),
+        ("tests.journal_test.Task2", "failed"),
+    ]
+
+    # Truncated record
+    with open(journal.path, "a") as f:
+        f.write('{"task": "tests.journal_test.Task2", "sta')
+
+    assert Journal(str(tmp_path / "journals"), run_id).completed() == {"tests.journal_test.Task1"}
+
+
+def test_journal_results(tmp_path) -> None:
+    run_id = Journal.newRunId()
+    journal = Journal(str(tmp_path / "journals"), run_id)
+    assert journal.loadResult(Task1) == (False, None)
+    journal.storeResult(Task1, {"a": 1})
+    journal.storeResult(Task2, lambda: 1)
+
+    journal = Journal(str(tmp_path / "journals"), run_id)
+    assert journal.loadResult(Task1) == (True, {"a": 1})
+    # Result could not be pickled
+    assert journal.loadResult(Task2) == (False, None)
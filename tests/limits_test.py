@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import List, Optional
+
+import pytest
+
+from simpletasks.asynctask import AsyncTask
+from simpletasks.limits import CircuitBreaker, CircuitOpen, RateLimiter
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+def test_ratelimiter() -> None:
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.tryAcquire()
+    assert limiter.tryAcquire()
+    assert not limiter.tryAcquire()
+
+    waits: List[float] = []
+    limiter.acquire(sleep=waits.append)
+    limiter.acquire(sleep=waits.append)
+    # Waiting calls are served in order
+    assert waits == pytest.approx([0.1, 0.2], abs=0.01)
+
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+
+
+def test_ratelimiter_threads() -> None:
+    limiter = RateLimiter(rate=50, burst=1)
+    calls: List[float] = []
+
+    def _worker() -> None:
+        for _ in range(5):
+            limiter.acquire()
+            calls.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=_worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 20 calls at 50 per second, the first one without waiting
+    assert len(calls) == 20
+    assert time.monotonic() - start >= 19 / 50 - 0.01
+
+
+def test_ratelimiter_async() -> None:
+    limiter = RateLimiter(rate=20, burst=1)
+
+    async def _main() -> float:
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.acquireAsync() for _ in range(5)])
+        return time.monotonic() - start
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(_main()) >= 4 / 20 - 0.01
+    finally:
+        loop.close()
+
+
+def test_registry() -> None:
+    assert RateLimiter.get("test_registry", rate=1) is RateLimiter.get("test_registry", rate=2)
+    assert RateLimiter.get("test_registry", rate=2).rate == 1
+    assert CircuitBreaker.get("test_registry") is CircuitBreaker.get("test_registry")
+
+
+def _fail() -> None:
+    raise ConnectionError("down")
+
+
+def test_circuitbreaker() -> None:
+    breaker = CircuitBreaker(threshold=2, reset_timeout=0.1, failure_on=(ConnectionError,))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Other exceptions are not failures of the backend
+    with pytest.raises(ValueError):
+        breaker.call(lambda: int("x"))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: 42)
+
+    # Failed trial call
+    time.sleep(0.1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Successful trial call
+    time.sleep(0.1)
+    assert breaker.call(lambda: 42) == 42
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_circuitbreaker_trial() -> None:
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+
+    def _call() -> int:
+        # Only one trial call at a time
+        with pytest.raises(CircuitOpen):
+            breaker.call(lambda: 0)
+        return 42
+
+    assert breaker.call(_call) == 42
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class LimitedTask(Task):
+    def do(self) -> List[Optional[int]]:
+        breaker = self.options["breaker"]
+        res = []
+        for i in range(3):
+            try:
+                res.append(self.execute(lambda: i, limiter=self.options["limiter"], breaker=breaker))
+                self.execute(_fail, breaker=breaker)
+            except (ConnectionError, CircuitOpen) as e:
+                self.logger.info("{}: {}".format(e.__class__.__name__, e))
+        return res
+
+
+def test_execute(configure) -> None:
+    limiter = RateLimiter(rate=1000, burst=1)
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    assert LimitedTask(limiter=limiter, breaker=breaker).run() == [0]
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert LimitedTask(limiter=limiter, breaker=breaker, dryrun=True).run() == [None, None, None]
+
+
+class LimitedAsyncTask(AsyncTask):
+    async def do(self) -> List[Optional[int]]:
+        res = []
+        for i in range(5):
+
+            async def _call() -> int:
+                return i
+
+            res.append(await self.executeAsync(_call, limiter=self.options["limiter"]))
+        return res
+
+
+def test_execute_async(configure) -> None:
+    start = time.monotonic()
+    assert LimitedAsyncTask(limiter=RateLimiter(rate=20, burst=1)).runSync() == [0, 1, 2, 3, 4]
+    assert time.monotonic() - start >= 4 / 20 - 0.01
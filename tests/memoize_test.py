@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from simpletasks.helpers import addTestLogger
+from simpletasks.memoize import MemoCache
+from simpletasks.pipeline import Pipeline
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+def test_memocache() -> None:
+    cache = MemoCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    # "b" is the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+    cache = MemoCache(ttl=0.1)
+    cache.set("a", 1)
+    assert cache.get("a") == (True, 1)
+    time.sleep(0.1)
+    assert cache.get("a") == (False, None)
+
+    with pytest.raises(ValueError):
+        MemoCache(maxsize=0)
+
+
+def test_memocache_spill(tmp_path) -> None:
+    directory = str(tmp_path)
+    cache = MemoCache(maxsize=1, spill_dir=directory)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert len(cache) == 1
+    assert len(os.listdir(directory)) == 1
+
+    # "a" is loaded back from disk, "b" is spilled
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (True, 2)
+    assert len(os.listdir(directory)) == 1
+
+    cache.clear()
+    assert os.listdir(directory) == []
+    assert cache.get("a") == (False, None)
+
+
+CALLS: List[int] = []
+
+
+class MemoTask(Task):
+    @Task.memoize
+    def compute(self, n: int) -> int:
+        CALLS.append(n)
+        return n * 2
+
+    @Task.memoize(scope="class")
+    def lookup(self, n: int, factor: int = 1) -> int:
+        CALLS.append(n)
+        return n * factor
+
+    def do(self) -> List[int]:
+        return [self.compute(1), self.compute(2), self.compute(1), self.lookup(1), self.lookup(1, factor=3)]
+
+
+def test_memoize(configure) -> None:
+    CALLS.clear()
+    o = MemoTask()
+    logger = addTestLogger(o)
+    assert o.run() == [2, 4, 2, 1, 3]
+    assert CALLS == [1, 2, 1, 1]
+    assert (
+        logger.getvalue()
+        == """simpletasks.MemoTask - INFO - Memoized compute: 1 hits, 2 misses
+simpletasks.MemoTask - INFO - Memoized lookup: 0 hits, 2 misses
+"""
+    )
+
+    # Scope "instance": results of another task are not shared, unlike with scope "class"
+    CALLS.clear()
+    o = MemoTask()
+    logger = addTestLogger(o)
+    assert o.run() == [2, 4, 2, 1, 3]
+    assert CALLS == [1, 2]
+    assert "simpletasks.MemoTask - INFO - Memoized lookup: 2 hits, 0 misses" in logger.getvalue()
+    assert MemoTask.lookup.cache(o).hits == 2
+
+    with pytest.raises(ValueError):
+        Task.memoize(scope="unknown")
+
+
+class RunMemoTask(Task):
+    @Task.memoize(scope="run")
+    def compute(self, n: int) -> int:
+        CALLS.append(n)
+        return n * 2
+
+    def do(self) -> int:
+        return self.compute(self.options["n"])
+
+
+class RunMemoTask2(RunMemoTask):
+    pass
+
+
+class RunMemoPipeline(Pipeline):
+    tasks = [RunMemoTask, RunMemoTask2]
+
+
+def test_memoize_run(configure) -> None:
+    CALLS.clear()
+    # Results are shared by the tasks of the run
+    RunMemoPipeline(n=2).run()
+    assert CALLS == [2]
+
+    # Caches are cleared at the end of the run
+    RunMemoPipeline(n=2).run()
+    assert CALLS == [2, 2]
+
+
+class ThreadedMemoTask(Task):
+    @Task.memoize(maxsize=10)
+    def compute(self, n: int) -> int:
+        return n * 2
+
+    def do(self) -> Dict[int, int]:
+        res: Dict[int, int] = {}
+
+        def _worker() -> None:
+            for i in range(100):
+                res[i % 20] = self.compute(i % 20)
+
+        threads = [threading.Thread(target=_worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return res
+
+
+def test_memoize_threads(configure) -> None:
+    o = ThreadedMemoTask()
+    assert o.run() == {i: i * 2 for i in range(20)}
+    cache = ThreadedMemoTask.compute.cache(o)
+    assert len(cache) == 10
+    assert cache.hits + cache.misses == 400
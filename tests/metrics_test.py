@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import time
+from typing import List
+
+import pytest
+
+from simpletasks.helpers import addTestLogger
+from simpletasks.metrics import MetricsRegistry
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.pipeline import Pipeline
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = False
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+    Task.METRICS.clear()
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class SleepTask(Task):
+    def do(self) -> None:
+        time.sleep(0.1)
+
+
+class BusyTask(Task):
+    def do(self) -> int:
+        return sum(range(10**6))
+
+
+class FailureTask(Task):
+    def do(self) -> None:
+        raise RuntimeError("error")
+
+
+class MetricsPipeline(Pipeline):
+    tasks = [SleepTask, BusyTask]
+
+
+class MetricsOrchestrator(Orchestrator):
+    tasks = {
+        SleepTask: ([], {}),
+        BusyTask: ([], {}),
+    }
+    num_threads = 1
+
+
+class MetricsProcessOrchestrator(MetricsOrchestrator):
+    executor = "process"
+
+
+def test_measure(configure) -> None:
+    SleepTask().run()
+    BusyTask().run()
+
+    records = Task.METRICS.since(0)
+    assert [x.name for x in records] == ["simpletasks.SleepTask", "simpletasks.BusyTask"]
+    assert [x.task for x in records] == ["tests.metrics_test.SleepTask", "tests.metrics_test.BusyTask"]
+    assert [x.status for x in records] == ["completed", "completed"]
+    assert records[0].wall >= 0.1
+    assert records[0].cpu < 0.1
+    assert records[1].cpu > 0
+    assert records[0].queue_wait == 0
+
+
+def test_hooks(configure) -> None:
+    events: List[str] = []
+    registry = MetricsRegistry()
+    registry.on_start.append(lambda task: events.append("start " + task.__class__.__name__))
+    registry.on_finish.append(lambda task, metrics: events.append("finish " + metrics.status))
+    registry.on_error.append(lambda task, metrics, e: events.append("error {} {}".format(metrics.status, e)))
+
+    with registry.measure(SleepTask()):
+        pass
+    with pytest.raises(RuntimeError):
+        with registry.measure(FailureTask()):
+            raise RuntimeError("error")
+
+    assert events == ["start SleepTask", "finish completed", "start FailureTask", "error failed error"]
+    assert [x.status for x in registry.clear()] == ["completed", "failed"]
+    assert registry.since(0) == []
+
+
+def test_failing_hook(configure) -> None:
+    registry = MetricsRegistry()
+
+    def hook(task, metrics) -> None:
+        raise RuntimeError("error")
+
+    registry.on_finish.append(hook)
+    with registry.measure(SleepTask()):
+        pass
+    assert len(registry.since(0)) == 1
+
+
+def test_pipeline(configure) -> None:
+    MetricsPipeline().run()
+    assert [x.name for x in Task.METRICS.since(0)] == [
+        "simpletasks.MetricsPipeline.SleepTask",
+        "simpletasks.MetricsPipeline.BusyTask",
+        "simpletasks.MetricsPipeline",
+    ]
+
+
+def test_orchestrator(configure) -> None:
+    MetricsOrchestrator().run()
+    records = {x.name: x for x in Task.METRICS.since(0)}
+    assert set(records.keys()) == {
+        "simpletasks.MetricsOrchestrator.SleepTask",
+        "simpletasks.MetricsOrchestrator.BusyTask",
+        "simpletasks.MetricsOrchestrator",
+    }
+    # A single thread: the second task waited for the first one
+    waits = sorted(
+        [
+            records["simpletasks.MetricsOrchestrator.SleepTask"],
+            records["simpletasks.MetricsOrchestrator.BusyTask"],
+        ],
+        key=lambda x: x.queue_wait,
+    )
+    assert waits[1].queue_wait >= waits[0].wall
+
+
+def test_orchestrator_process(configure) -> None:
+    MetricsProcessOrchestrator().run()
+    assert {x.name for x in Task.METRICS.since(0)} == {
+        "simpletasks.MetricsProcessOrchestrator.SleepTask",
+        "simpletasks.MetricsProcessOrchestrator.BusyTask",
+        "simpletasks.MetricsProcessOrchestrator",
+    }
+
+
+def test_report(configure, tmpdir) -> None:
+    path = os.path.join(str(tmpdir), "metrics.json")
+    o = MetricsPipeline(metrics=path)
+    logger = addTestLogger(o)
+    o.run()
+
+    output = logger.getvalue().splitlines()
+    assert output[0] == "simpletasks.MetricsPipeline - INFO - Metrics:"
+    assert output[1].split() == ["task", "status", "wall", "(s)", "cpu", "(s)", "wait", "(s)", "rss", "(MiB)"]
+    # Sorted by decreasing wall time
+    assert [x.split()[0] for x in output[2:]] == [
+        "simpletasks.MetricsPipeline",
+        "simpletasks.MetricsPipeline.SleepTask",
+        "simpletasks.MetricsPipeline.BusyTask",
+    ]
+
+    with open(path) as f:
+        records = json.load(f)
+    assert [x["name"] for x in records] == [
+        "simpletasks.MetricsPipeline.SleepTask",
+        "simpletasks.MetricsPipeline.BusyTask",
+        "simpletasks.MetricsPipeline",
+    ]
+    assert set(records[0].keys()) == {
+        "name",
+        "task",
+        "status",
+        "start",
+        "wall",
+        "cpu",
+        "peak_rss_delta",
+        "queue_wait",
+    }
+
+
+def test_report_failure(configure, tmpdir) -> None:
+    path = os.path.join(str(tmpdir), "metrics.json")
+    with pytest.raises(RuntimeError):
+        FailureTask(metrics=path).run()
+
+    with open(path) as f:
+        records = json.load(f)
+    assert [x["status"] for x in records] == ["failed"]
@@ -1,10 +1,13 @@
 import io
 import logging
+import threading
 import time
+from typing import Callable, Dict, List
 
 import pytest
 
 from simpletasks.helpers import addTestLogger
+from simpletasks.graph import TaskKey
 from simpletasks.orchestrator import Orchestrator, Tasks
 from simpletasks.task import Task
 
@@ -86,6 +89,17 @@ class OrchDeadlock(Orchestrator):
     num_threads = 3
 
 
+class OrchKeepGoing(Orchestrator):
+    tasks: Tasks = {
+        NominalTask: ([], {}),
+        FailureTask: ([], {}),
+        NominalTask2: ([FailureTask], {}),
+        NominalTask3: ([NominalTask], {}),
+        NominalTask4: ([NominalTask2], {}),
+    }
+    num_threads = 2
+
+
 @pytest.mark.slow
 def test_orchestrator(configure) -> None:
     o = Orch(show_progress=False, dryrun=True, verbose=True)
@@ -221,6 +235,32 @@ Traceback (most recent call last):
     assert "simpletasks.Orch - CRITICAL - Could not run FailureTask: RuntimeError error" in output
 
 
+@pytest.mark.slow
+def test_orchestrator_keep_going(configure) -> None:
+    o = OrchKeepGoing(keep_going=True)
+    task_logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.run()
+    assert str(e.value) == "Task failed"
+    assert o.completed == {NominalTask, NominalTask3}
+    assert o.failed == {FailureTask}
+    assert o.skipped == {NominalTask2, NominalTask4}
+
+    output = task_logger.getvalue()
+    assert "simpletasks.OrchKeepGoing - INFO - Completed task NominalTask: True" in output
+    assert "simpletasks.OrchKeepGoing - INFO - Completed task NominalTask3: True" in output
+    assert (
+        "simpletasks.OrchKeepGoing - WARNING - Skipping tasks depending on FailureTask: NominalTask2;NominalTask4"
+        in output
+    )
+    assert "Starting task NominalTask2" not in output
+    assert "Starting task NominalTask4" not in output
+    assert "Done but some tasks remaining" not in output
+    assert "simpletasks.OrchKeepGoing - INFO - Completed 2 tasks, 1 failed, 2 skipped" in output
+    assert "simpletasks.OrchKeepGoing - CRITICAL - Could not run FailureTask: RuntimeError error" in output
+
+
 @pytest.mark.slow
 def test_orchestrator_deadlock(configure) -> None:
     o = OrchDeadlock()
@@ -244,3 +284,419 @@ def test_orchestrator_deadlock(configure) -> None:
     assert "simpletasks.OrchDeadlock - INFO - Completed task NominalTask2: True" in output
 
     assert "simpletasks.OrchDeadlock - CRITICAL - Done but some tasks remaining: NominalTask4" in output
+
+
+class ComputeTask(Task):
+    def do(self) -> int:
+        return sum(range(self.options["n"]))
+
+
+class ComputeTask2(Task):
+    def do(self) -> int:
+        return self.inputs[ComputeTask] * 2
+
+
+class OrchProcess(Orchestrator):
+    tasks: Tasks = {
+        ComputeTask: ([], {"n": 10}),
+        FailureTask: ([], {}),
+        NominalTask4: ([ComputeTask], {}),
+        ComputeTask2: ([ComputeTask], {}),
+    }
+    num_threads = 2
+    executor = "process"
+
+
+@pytest.mark.slow
+def test_orchestrator_process(configure) -> None:
+    o = OrchProcess(fail_on_exception=False)
+    task_logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.run()
+    assert str(e.value) == "Task failed"
+
+    output = task_logger.getvalue()
+    assert (
+        "simpletasks.OrchProcess - DEBUG - Starting task ComputeTask using arguments: {'fail_on_exception': False, 'n': 10, 'loggernamespace': 'simpletasks.OrchProcess.ComputeTask'}"
+        in output
+    )
+    assert "simpletasks.OrchProcess - INFO - Completed task ComputeTask: 45" in output
+    assert "simpletasks.OrchProcess - INFO - Completed task ComputeTask2: 90" in output
+    assert "simpletasks.OrchProcess - INFO - Completed task NominalTask4: True" in output
+    assert "simpletasks.OrchProcess - INFO - Failed task FailureTask: error" in output
+    assert "simpletasks.OrchProcess - CRITICAL - Could not run FailureTask: RuntimeError error" in output
+    assert len(o.exceptions) == 1
+    assert o.exceptions[0][0] is FailureTask
+    assert isinstance(o.exceptions[0][1], RuntimeError)
+
+
+class QuickTask(Task):
+    def do(self) -> bool:
+        return True
+
+
+class QuickTask2(QuickTask):
+    pass
+
+
+class QuickTask3(QuickTask):
+    pass
+
+
+class QuickTask4(QuickTask):
+    pass
+
+
+class OrchPriority(Orchestrator):
+    tasks: Tasks = {
+        QuickTask: ([], {}),
+        QuickTask2: ([], {}, {"cost": 1.5}),
+        QuickTask3: ([], {}),
+        QuickTask4: ([QuickTask3], {}),
+    }
+    num_threads = 1
+
+
+def test_orchestrator_priority(configure, tmp_path) -> None:
+    o = OrchPriority()
+    task_logger = addTestLogger(o)
+    o.run()
+
+    started = [x for x in task_logger.getvalue().splitlines() if "INFO - Starting task" in x]
+    assert started == [
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask3",
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask2",
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask",
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask4",
+    ]
+
+    OrchPriority.scheduling = "fifo"
+    OrchPriority.cost_history = str(tmp_path / "costs.json")
+    try:
+        o = OrchPriority()
+        task_logger = addTestLogger(o)
+        o.run()
+    finally:
+        OrchPriority.scheduling = "critical_path"
+        OrchPriority.cost_history = None
+
+    started = [x for x in task_logger.getvalue().splitlines() if "INFO - Starting task" in x]
+    assert started == [
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask",
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask2",
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask3",
+        "simpletasks.OrchPriority - INFO - Starting task QuickTask4",
+    ]
+    assert (tmp_path / "costs.json").exists()
+
+
+class FlakyTask(Task):
+    fail = True
+
+    def do(self) -> bool:
+        if FlakyTask.fail:
+            raise RuntimeError("flaky")
+        return True
+
+
+class OrchResume(Orchestrator):
+    tasks: Tasks = {
+        QuickTask: ([], {}),
+        FlakyTask: ([QuickTask], {}),
+        QuickTask2: ([FlakyTask], {}),
+        QuickTask3: ([QuickTask], {}),
+    }
+    num_threads = 2
+
+
+def test_orchestrator_resume(configure, tmp_path) -> None:
+    journal_dir = str(tmp_path / "journals")
+
+    FlakyTask.fail = True
+    o = OrchResume(journal_dir=journal_dir)
+    task_logger = addTestLogger(o)
+    with pytest.raises(RuntimeError):
+        o.run()
+    assert o._journal is not None
+    run_id = o._journal.run_id
+    output = task_logger.getvalue()
+    assert (
+        "simpletasks.OrchResume - INFO - Journal of run {}: {}/{}.jsonl".format(run_id, journal_dir, run_id)
+        in output
+    )
+    assert (
+        "simpletasks.OrchResume - DEBUG - Starting task QuickTask using arguments: {'loggernamespace': 'simpletasks.OrchResume.QuickTask'}"
+        in output
+    )
+
+    FlakyTask.fail = False
+    o = OrchResume(journal_dir=journal_dir, resume=run_id)
+    task_logger = addTestLogger(o)
+    o.run()
+    output = task_logger.getvalue()
+    assert (
+        "simpletasks.OrchResume - INFO - Task QuickTask already completed in run {}".format(run_id) in output
+    )
+    assert (
+        "simpletasks.OrchResume - INFO - Task QuickTask3 already completed in run {}".format(run_id) in output
+    )
+    started = [x for x in output.splitlines() if "INFO - Starting task" in x]
+    assert started == [
+        "simpletasks.OrchResume - INFO - Starting task FlakyTask",
+        "simpletasks.OrchResume - INFO - Starting task QuickTask2",
+    ]
+    assert o.completed == {QuickTask, QuickTask2, QuickTask3, FlakyTask}
+
+    with pytest.raises(ValueError) as e:
+        OrchResume(resume=run_id)
+    assert str(e.value) == "Cannot resume run {} without journal_dir".format(run_id)
+
+
+class SumTask(Task):
+    def do(self) -> int:
+        return self.options.get("n", 0) + sum(self.inputs.values())
+
+
+class SumTask2(SumTask):
+    pass
+
+
+class SumTask3(SumTask):
+    pass
+
+
+class SumTask4(SumTask):
+    pass
+
+
+class OrchInputs(Orchestrator):
+    tasks: Tasks = {
+        SumTask: ([], {"n": 1}),
+        SumTask2: ([], {"n": 10}),
+        SumTask3: ([SumTask], {"n": 100}),
+        SumTask4: ([SumTask2, SumTask3], {}),
+    }
+    num_threads = 2
+
+
+def test_orchestrator_inputs(configure) -> None:
+    o = OrchInputs()
+    task_logger = addTestLogger(o)
+    o.run()
+
+    output = task_logger.getvalue()
+    assert "simpletasks.OrchInputs - INFO - Completed task SumTask3: 101" in output
+    assert "simpletasks.OrchInputs - INFO - Completed task SumTask4: 111" in output
+    assert o._queue.results == {}
+
+
+class UnpicklableTask(Task):
+    def do(self) -> Callable[[], int]:
+        return lambda: 1
+
+
+class FlakyInputsTask(Task):
+    fail = True
+
+    def do(self) -> Dict[str, int]:
+        if FlakyInputsTask.fail:
+            raise RuntimeError("flaky")
+        return {x.__name__: v for x, v in self.inputs.items()}
+
+
+class OrchResumeInputs(Orchestrator):
+    tasks: Tasks = {
+        SumTask: ([], {"n": 1}),
+        UnpicklableTask: ([], {}),
+        SumTask3: ([SumTask], {"n": 100}),
+        FlakyInputsTask: ([SumTask, UnpicklableTask], {}),
+    }
+    num_threads = 2
+
+
+def test_orchestrator_resume_inputs(configure, tmp_path) -> None:
+    journal_dir = str(tmp_path / "journals")
+
+    FlakyInputsTask.fail = True
+    o = OrchResumeInputs(journal_dir=journal_dir)
+    with pytest.raises(RuntimeError):
+        o.run()
+    assert o._journal is not None
+    run_id = o._journal.run_id
+
+    # Results of tasks completed in the previous run are passed to the tasks started when resuming
+    FlakyInputsTask.fail = False
+    o = OrchResumeInputs(journal_dir=journal_dir, resume=run_id)
+    task_logger = addTestLogger(o)
+    o.run()
+    output = task_logger.getvalue()
+    assert "simpletasks.OrchResumeInputs - INFO - Completed task FlakyInputsTask: {'SumTask': 1}" in output
+    assert (
+        "simpletasks.OrchResumeInputs - WARNING - Result of task UnpicklableTask not available in run {}, tasks depending on it will not get it".format(
+            run_id
+        )
+        in output
+    )
+    assert o._queue.results == {}
+
+
+def test_orchestrator_unknown_executor(configure) -> None:
+    class OrchUnknown(Orchestrator):
+        tasks: Tasks = {}
+        num_threads = 1
+        executor = "foo"
+
+    with pytest.raises(ValueError) as e:
+        OrchUnknown()
+    assert str(e.value) == "Unknown executor: foo"
+
+    class OrchUnknownScheduling(Orchestrator):
+        tasks: Tasks = {}
+        num_threads = 1
+        scheduling = "foo"
+
+    with pytest.raises(ValueError) as e:
+        OrchUnknownScheduling()
+    assert str(e.value) == "Unknown scheduling: foo"
+
+
+class SharedOptionsTask(Task):
+    def do(self) -> bool:
+        self.options["config"]["seen"].append(self.__class__.__name__)
+        return True
+
+
+class CopiedOptionsTask(SharedOptionsTask):
+    copy_options = True
+
+
+class OrchOptions(Orchestrator):
+    tasks: Tasks = {
+        SharedOptionsTask: ([], {}),
+        CopiedOptionsTask: ([], {}),
+    }
+    num_threads = 2
+
+
+def test_orchestrator_options(configure) -> None:
+    config: Dict[str, List[str]] = {"seen": []}
+    o = OrchOptions(config=config)
+    o.run()
+
+    # Values of options are shared, unless the task asks for a copy
+    assert config == {"seen": ["SharedOptionsTask"]}
+    assert OrchOptions.tasks[SharedOptionsTask] == ([], {})
+
+
+USAGE = {"memory_gb": 0.0, "peak": 0.0}
+USAGE_LOCK = threading.Lock()
+
+
+class HeavyTask(Task):
+    memory_gb = 8.0
+
+    def do(self) -> None:
+        with USAGE_LOCK:
+            USAGE["memory_gb"] += self.memory_gb
+            USAGE["peak"] = max(USAGE["peak"], USAGE["memory_gb"])
+        time.sleep(0.2)
+        with USAGE_LOCK:
+            USAGE["memory_gb"] -= self.memory_gb
+
+
+class HeavyTask2(HeavyTask):
+    pass
+
+
+class LightTask(HeavyTask):
+    memory_gb = 1.0
+
+
+class LightTask2(LightTask):
+    pass
+
+
+class OrchResources(Orchestrator):
+    tasks: Tasks = {
+        HeavyTask: ([], {}, {"resources": {"memory_gb": 8}}),
+        HeavyTask2: ([], {}, {"resources": {"memory_gb": 8, "gpu": 1}}),
+        LightTask: ([], {}, {"resources": {"memory_gb": 1}}),
+        LightTask2: ([], {}, {"resources": {"memory_gb": 1}}),
+    }
+    num_threads = 4
+    resources = {"memory_gb": 10}
+
+
+@pytest.mark.slow
+def test_orchestrator_resources(configure) -> None:
+    o = OrchResources()
+    start = time.monotonic()
+    o.run()
+
+    # Heavy tasks ran one after the other, light tasks along with the first one
+    assert o.completed == set(OrchResources.tasks.keys())
+    assert USAGE["peak"] == 10
+    assert 0.4 <= time.monotonic() - start < 0.8
+
+    OrchResources.resources = {"memory_gb": 4}
+    try:
+        with pytest.raises(ValueError) as e:
+            OrchResources()
+        assert str(e.value) == "Task HeavyTask needs 8 memory_gb, more than the capacity 4"
+    finally:
+        OrchResources.resources = {"memory_gb": 10}
+
+
+class PartitionTask(Task):
+    def do(self) -> int:
+        if self.options["partition"] == 3 and self.options.get("fail_partition", False):
+            raise RuntimeError("partition 3")
+        return self.options["partition"] * 10
+
+
+class MergeTask(Task):
+    def do(self) -> None:
+        self.options["results"].append({key.__name__: value for key, value in self.inputs.items()})
+
+
+class ListTask(Task):
+    def do(self) -> None:
+        keys = [self.submit(PartitionTask, {"partition": i}, name=str(i)) for i in range(5)]
+        self.submit(MergeTask, after=keys)
+
+
+class OrchDynamic(Orchestrator):
+    tasks: Tasks = {ListTask: ([], {})}
+    num_threads = 3
+
+
+def test_orchestrator_submit(configure) -> None:
+    results: List[Dict[str, int]] = []
+    o = OrchDynamic(results=results)
+    o.run()
+    partitions = [TaskKey(PartitionTask, str(i)) for i in range(5)]
+    assert o.completed == {ListTask, MergeTask, *partitions}
+    assert results == [{"PartitionTask[{}]".format(i): i * 10 for i in range(5)}]
+
+    # Tasks can be submitted before running too
+    o = OrchDynamic(results=results)
+    o.submit(QuickTask, after=[ListTask])
+    with pytest.raises(ValueError):
+        o.submit(QuickTask)
+    with pytest.raises(ValueError):
+        o.submit(QuickTask2, after=[MergeTask])
+    o.run()
+    assert o.completed == {ListTask, MergeTask, QuickTask, *partitions}
+
+    with pytest.raises(RuntimeError):
+        ListTask().run()
+
+
+def test_orchestrator_submit_keep_going(configure) -> None:
+    o = OrchDynamic(results=[], fail_partition=True, keep_going=True)
+    with pytest.raises(RuntimeError):
+        o.run()
+    assert o.failed == {TaskKey(PartitionTask, "3")}
+    assert o.skipped == {MergeTask}
+    assert len(o.completed) == 5
@@ -0,0 +1,86 @@
+import datetime
+import logging
+
+import pytest
+
+from simpletasks.graph import TaskKey
+from simpletasks.helpers import addTestLogger
+from simpletasks.partitions import DatePartitions, parseDateRange
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class BackfillTask(Task):
+    failing = {datetime.date(2020, 1, 2)}
+
+    def do(self) -> None:
+        if self.date in BackfillTask.failing:
+            raise RuntimeError("no data")
+
+
+def test_parse_date_range() -> None:
+    assert parseDateRange("2020-01-30:2020-02-01") == (datetime.date(2020, 1, 30), datetime.date(2020, 2, 1))
+    assert DatePartitions.dates(datetime.date(2020, 1, 30), datetime.date(2020, 2, 1)) == [
+        datetime.date(2020, 1, 30),
+        datetime.date(2020, 1, 31),
+        datetime.date(2020, 2, 1),
+    ]
+    for value in ("2020-01-01", "2020-01-01:foo", "2020-01-02:2020-01-01"):
+        with pytest.raises(ValueError):
+            parseDateRange(value)
+
+
+def test_partitions(configure, tmp_path) -> None:
+    journal_dir = str(tmp_path / "journals")
+    task = DatePartitions.of(BackfillTask)
+    assert task.__name__ == "BackfillTaskPartitions"
+
+    o = task(
+        date_range=(datetime.date(2020, 1, 1), datetime.date(2020, 1, 4)), parallel=2, journal_dir=journal_dir
+    )
+    task_logger = addTestLogger(o)
+    with pytest.raises(RuntimeError):
+        o.run()
+    assert o.num_threads == 2
+    assert o.statuses() == {
+        datetime.date(2020, 1, 1): "completed",
+        datetime.date(2020, 1, 2): "failed",
+        datetime.date(2020, 1, 3): "completed",
+        datetime.date(2020, 1, 4): "completed",
+    }
+    assert o._journal is not None
+    run_id = o._journal.run_id
+    output = task_logger.getvalue()
+    assert "simpletasks.BackfillTaskPartitions - INFO - Completed 3 of 4 partitions\n" in output
+    assert "simpletasks.BackfillTaskPartitions - WARNING - Partitions not completed: 2020-01-02\n" in output
+
+    # Only the failed partition is run again
+    BackfillTask.failing = set()
+    o = task(
+        date_range=(datetime.date(2020, 1, 1), datetime.date(2020, 1, 4)),
+        journal_dir=journal_dir,
+        resume=run_id,
+    )
+    task_logger = addTestLogger(o)
+    o.run()
+    started = [x for x in task_logger.getvalue().splitlines() if "INFO - Starting task" in x]
+    assert started == ["simpletasks.BackfillTaskPartitions - INFO - Starting task BackfillTask[2020-01-02]"]
+    assert o.completed == {TaskKey(BackfillTask, "2020-01-0{}".format(i)) for i in range(1, 5)}
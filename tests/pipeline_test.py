@@ -46,6 +46,21 @@ class FailureTask(Task):
         raise RuntimeError("error")
 
 
+class InputTask(Task):
+    def do(self) -> int:
+        return sum(self.inputs.values()) + 1
+
+
+class InputTask2(InputTask):
+    pass
+
+
+class InputTask3(InputTask):
+    def do(self) -> int:
+        assert self.inputs == {InputTask2: 2}
+        return super().do()
+
+
 class NominalPipeline(Pipeline):
     tasks = [NominalTask, NominalTask2]
 
@@ -54,6 +69,10 @@ class FailurePipeline(Pipeline):
     tasks = [NominalTask, FailureTask, NominalTask2]
 
 
+class InputsPipeline(Pipeline):
+    tasks = [InputTask, InputTask2, InputTask3]
+
+
 def test_pipeline(configure) -> None:
     o = NominalPipeline()
     logger = addTestLogger(o)
@@ -69,6 +88,11 @@ simpletasks.NominalPipeline.NominalTask2 - INFO - Called with options={'loggerna
     )
 
 
+def test_inputs(configure) -> None:
+    o = InputsPipeline()
+    o.run()
+
+
 def test_failure(configure) -> None:
     o = FailurePipeline()
     logger = addTestLogger(o)
@@ -0,0 +1,109 @@
+import logging
+import os
+import pstats
+import time
+
+import pytest
+
+from simpletasks.helpers import addTestLogger
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.pipeline import Pipeline
+from simpletasks.profiling import SamplingProfiler
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = False
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+def busy_loop(duration: float) -> None:
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        pass
+
+
+class BusyTask(Task):
+    def do(self) -> None:
+        busy_loop(0.1)
+
+
+class BusyTask2(BusyTask):
+    pass
+
+
+class ProfilePipeline(Pipeline):
+    tasks = [BusyTask, BusyTask2]
+
+
+class ProfileOrchestrator(Orchestrator):
+    tasks = {
+        BusyTask: ([], {}),
+        BusyTask2: ([], {}),
+    }
+    num_threads = 2
+
+
+def test_cprofile(configure, tmpdir) -> None:
+    o = BusyTask(profile=str(tmpdir))
+    logger = addTestLogger(o)
+    o.run()
+
+    path = os.path.join(str(tmpdir), "simpletasks.BusyTask.prof")
+    assert logger.getvalue() == "simpletasks.BusyTask - INFO - Profile written to {}\n".format(path)
+    stats = pstats.Stats(path)
+    assert any(x[2] == "busy_loop" for x in stats.stats)  # type: ignore
+
+
+def test_sampling(configure, tmpdir) -> None:
+    BusyTask(profile=str(tmpdir), profile_mode="sampling").run()
+
+    with open(os.path.join(str(tmpdir), "simpletasks.BusyTask.collapsed")) as f:
+        lines = f.read().splitlines()
+    assert len(lines) > 0
+    assert any("BusyTask.do (profiling_test.py:" in x and "busy_loop (profiling_test.py:" in x for x in lines)
+    assert sum(int(x.rsplit(" ", 1)[1]) for x in lines) > 5
+
+
+def test_sampling_profiler(configure) -> None:
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_loop(0.05)
+    profiler.stop()
+    assert any("busy_loop" in x for x in profiler.samples)
+
+
+def test_unknown_mode(configure, tmpdir) -> None:
+    with pytest.raises(ValueError) as e:
+        BusyTask(profile=str(tmpdir), profile_mode="foo").run()
+    assert str(e.value) == "Unknown profile mode: foo"
+
+
+def test_pipeline(configure, tmpdir) -> None:
+    ProfilePipeline(profile=str(tmpdir)).run()
+    assert sorted(os.listdir(str(tmpdir))) == [
+        "simpletasks.ProfilePipeline.BusyTask.prof",
+        "simpletasks.ProfilePipeline.BusyTask2.prof",
+    ]
+
+
+def test_orchestrator(configure, tmpdir) -> None:
+    ProfileOrchestrator(profile=str(tmpdir), profile_mode="sampling").run()
+    assert sorted(os.listdir(str(tmpdir))) == [
+        "simpletasks.ProfileOrchestrator.BusyTask.collapsed",
+        "simpletasks.ProfileOrchestrator.BusyTask2.collapsed",
+    ]
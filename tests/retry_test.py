@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import List, Tuple
+
+import pytest
+
+from simpletasks.asynctask import AsyncTask
+from simpletasks.helpers import addTestLogger
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.retry import RetryPolicy
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = True
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class _Flaky:
+    def __init__(self, failures: int, exception: type = RuntimeError) -> None:
+        self.failures = failures
+        self.exception = exception
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exception("error")
+        return "ok"
+
+
+def test_delays() -> None:
+    policy = RetryPolicy(initialdelay=1, multiplier=2, maxdelay=5, jitter=False)
+    assert [policy.delay(i) for i in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    policy = RetryPolicy(initialdelay=1, multiplier=2)
+    for i in range(1, 6):
+        for _ in range(100):
+            assert 0 <= policy.delay(i) <= 2 ** (i - 1)
+
+
+def test_call() -> None:
+    sleeps: List[float] = []
+    policy = RetryPolicy(maxretries=3, initialdelay=1, jitter=False)
+
+    func = _Flaky(3)
+    assert policy.call(func, sleep=sleeps.append) == "ok"
+    assert func.calls == 4
+    assert sleeps == [1, 1.5, 2.25]
+
+    func = _Flaky(4)
+    with pytest.raises(RuntimeError):
+        policy.call(func, sleep=sleeps.append)
+    assert func.calls == 4
+
+
+def test_retry_on() -> None:
+    sleeps: List[float] = []
+    policy = RetryPolicy(initialdelay=0, retry_on=(ConnectionError,))
+
+    func = _Flaky(2, ConnectionError)
+    assert policy.call(func, sleep=sleeps.append) == "ok"
+
+    func = _Flaky(2, ValueError)
+    with pytest.raises(ValueError):
+        policy.call(func, sleep=sleeps.append)
+    assert func.calls == 1
+
+
+def test_deadline(caplog) -> None:
+    sleeps: List[float] = []
+    policy = RetryPolicy(maxretries=10, initialdelay=0.1, jitter=False, deadline=0.3)
+
+    def _sleep(delay: float) -> None:
+        sleeps.append(delay)
+        time.sleep(delay)
+
+    func = _Flaky(10)
+    with pytest.raises(RuntimeError):
+        # Only the first 2 delays fit in the deadline (0.1 + 0.15 + 0.225 > 0.3)
+        policy.call(func, logger=logging.getLogger("simpletasks.test_deadline"), sleep=_sleep)
+    assert sleeps == pytest.approx([0.1, 0.15])
+    assert caplog.records[-1].getMessage() == "Deadline reached, abandonning"
+
+
+class RetryAsyncTask(AsyncTask):
+    async def do(self) -> str:
+        self.calls = 0
+
+        async def _flaky() -> str:
+            self.calls += 1
+            if self.calls <= 2:
+                raise RuntimeError("error")
+            return "ok"
+
+        res = await self.executeOrRetryAsync(_flaky, initialdelay=0.1)
+        assert res is not None
+        return res
+
+
+def test_async(configure) -> None:
+    o = RetryAsyncTask()
+    logger = addTestLogger(o)
+    assert o.runSync() == "ok"
+    assert (
+        logger.getvalue()
+        == """simpletasks.RetryAsyncTask - WARNING - Failed 1 times (error), retrying in 0 seconds...
+simpletasks.RetryAsyncTask - WARNING - Failed 2 times (error), retrying in 0 seconds...
+"""
+    )
+
+    async def _fail() -> None:
+        raise ValueError("error")
+
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            loop.run_until_complete(RetryPolicy(retry_on=(RuntimeError,)).callAsync(_fail))
+    finally:
+        loop.close()
+
+
+RUNS: List[Tuple[str, float, float]] = []
+
+
+class RetryingTask(Task):
+    def failure(self) -> None:
+        if time.monotonic() - self.options["started"] < 0.5:
+            raise RuntimeError("error")
+
+    def do(self) -> None:
+        start = time.monotonic()
+        self.executeOrRetry(self.failure, initialdelay=0.3)
+        RUNS.append((self.__class__.__name__, start, time.monotonic()))
+
+
+class WaitingTask1(Task):
+    def do(self) -> None:
+        start = time.monotonic()
+        time.sleep(0.1)
+        RUNS.append((self.__class__.__name__, start, time.monotonic()))
+
+
+class WaitingTask2(WaitingTask1):
+    pass
+
+
+class RetryOrchestrator(Orchestrator):
+    tasks = {RetryingTask: ([], {}), WaitingTask1: ([], {}), WaitingTask2: ([], {})}
+    num_threads = 1
+    scheduling = "fifo"
+
+
+@pytest.mark.slow
+def test_orchestrator_releases_slot(configure) -> None:
+    RUNS.clear()
+    o = RetryOrchestrator(started=time.monotonic())
+    o.run()
+    assert o.completed == {RetryingTask, WaitingTask1, WaitingTask2}
+
+    # Other tasks ran one at a time while RetryingTask was waiting
+    assert [x[0] for x in RUNS] == ["WaitingTask1", "WaitingTask2", "RetryingTask"]
+    assert RUNS[1][1] >= RUNS[0][2]
+    assert RUNS[2][1] < RUNS[0][1]
+    assert o._workers == 0 and o._running == 0 and o._sleeping == 0
+
+
+ACTIVE: List[int] = [0, 0]  # Running tasks, maximum of running tasks
+ACTIVE_LOCK = threading.Lock()
+
+
+class _Active:
+    def __enter__(self) -> None:
+        with ACTIVE_LOCK:
+            ACTIVE[0] += 1
+            ACTIVE[1] = max(ACTIVE)
+
+    def __exit__(self, *args) -> None:
+        with ACTIVE_LOCK:
+            ACTIVE[0] -= 1
+
+
+class MapSleepingTask(Task):
+    def do(self) -> None:
+        with _Active():
+            list(self.map(lambda _: self.sleep(0.3), range(4), workers=4))
+
+
+class ShortTask1(Task):
+    def do(self) -> None:
+        with _Active():
+            time.sleep(0.05)
+
+
+class ShortTask2(ShortTask1):
+    pass
+
+
+class ShortTask3(ShortTask1):
+    pass
+
+
+class ShortTask4(ShortTask1):
+    pass
+
+
+class ShortTask5(ShortTask1):
+    pass
+
+
+class MapSleepOrchestrator(Orchestrator):
+    tasks = {
+        MapSleepingTask: ([], {}),
+        ShortTask1: ([], {}),
+        ShortTask2: ([], {}),
+        ShortTask3: ([], {}),
+        ShortTask4: ([], {}),
+        ShortTask5: ([], {}),
+    }
+    num_threads = 2
+    scheduling = "fifo"
+
+
+def test_orchestrator_map_sleep(configure) -> None:
+    ACTIVE[:] = [0, 0]
+    o = MapSleepOrchestrator()
+    o.run()
+    assert len(o.completed) == 6
+    # Waits in the threads of map() do not give the slot of the task back
+    assert ACTIVE[1] <= 2
+    assert o._workers == 0 and o._running == 0 and o._sleeping == 0
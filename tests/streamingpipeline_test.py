@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+
+from simpletasks.helpers import addTestLogger
+from simpletasks.streamingpipeline import StreamingPipeline
+from simpletasks.task import Task
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = False
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+loaded: List[int] = []
+
+
+class ExtractTask(Task):
+    def do(self) -> Iterator[int]:
+        for i in range(10):
+            yield i
+
+
+class TransformTask(Task):
+    def do(self) -> Iterator[int]:
+        for i in self.inputs[ExtractTask]:
+            yield i * 2
+
+
+class LoadTask(Task):
+    def do(self) -> int:
+        for i in self.inputs[TransformTask]:
+            loaded.append(i)
+        return len(loaded)
+
+
+class FailingExtractTask(Task):
+    def do(self) -> Iterator[int]:
+        yield 1
+        raise RuntimeError("error")
+
+
+class FailingTransformTask(Task):
+    def do(self) -> Iterator[int]:
+        for i in self.inputs[FailingExtractTask]:
+            yield i
+
+
+class FailingLoadTask(Task):
+    def do(self) -> None:
+        for i in self.inputs[TransformTask]:
+            if i > 4:
+                raise RuntimeError("load error")
+
+
+class EtlPipeline(StreamingPipeline):
+    tasks = [ExtractTask, TransformTask, LoadTask]
+
+
+class ThreadedEtlPipeline(EtlPipeline):
+    threaded = True
+
+
+class YieldingPipeline(StreamingPipeline):
+    tasks = [ExtractTask, TransformTask]
+
+
+class UpstreamFailurePipeline(StreamingPipeline):
+    threaded = True
+    tasks = [FailingExtractTask, FailingTransformTask]
+
+
+class DownstreamFailurePipeline(StreamingPipeline):
+    threaded = True
+    tasks = [ExtractTask, TransformTask, FailingLoadTask]
+
+
+def test_streaming(configure) -> None:
+    del loaded[:]
+    assert EtlPipeline().run() == 10
+    assert loaded == [i * 2 for i in range(10)]
+
+
+def test_threaded(configure) -> None:
+    del loaded[:]
+    assert ThreadedEtlPipeline().run() == 10
+    assert loaded == [i * 2 for i in range(10)]
+
+
+def test_count(configure) -> None:
+    assert YieldingPipeline().run() == 10
+
+
+produced: List[int] = []
+consumed = threading.Event()
+
+
+class SlowProducerTask(Task):
+    def do(self) -> Iterator[int]:
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+
+class SlowConsumerTask(Task):
+    def do(self) -> int:
+        # Producer is blocked once the queue is full
+        it = iter(self.inputs[SlowProducerTask])
+        first = next(it)
+        consumed.wait(1)
+        return first + sum(it)
+
+
+class BackpressurePipeline(StreamingPipeline):
+    threaded = True
+    queue_size = 2
+    tasks = [SlowProducerTask, SlowConsumerTask]
+
+
+def test_backpressure(configure) -> None:
+    del produced[:]
+    consumed.clear()
+
+    o = BackpressurePipeline()
+    t = threading.Thread(target=lambda: setattr(o, "result", o.run()))
+    t.start()
+    while len(produced) < 4:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    # 1 item consumed, 2 items in the queue, 1 item waiting to be put
+    assert len(produced) == 4
+    consumed.set()
+    t.join()
+    assert o.result == sum(range(10))  # type: ignore
+
+
+def test_upstream_failure(configure) -> None:
+    o = UpstreamFailurePipeline()
+    logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.run()
+    assert str(e.value) == "error"
+
+    output = logger.getvalue()
+    assert output.startswith(
+        """simpletasks.UpstreamFailurePipeline.FailingExtractTask - CRITICAL - Got exception: RuntimeError error
+Traceback (most recent call last):
+"""
+    )
+    assert output.endswith("""RuntimeError: error
+""")
+
+
+def test_downstream_failure(configure) -> None:
+    o = DownstreamFailurePipeline()
+    logger = addTestLogger(o)
+
+    with pytest.raises(RuntimeError) as e:
+        o.run()
+    assert str(e.value) == "load error"
+
+    output = logger.getvalue()
+    assert output.startswith(
+        """simpletasks.DownstreamFailurePipeline.FailingLoadTask - CRITICAL - Got exception: RuntimeError load error
+Traceback (most recent call last):
+"""
+    )
+
+
+class FirstItemTask(Task):
+    def do(self) -> int:
+        for i in self.inputs[ExtractTask]:
+            return i
+        return -1
+
+
+class FirstTransformedTask(Task):
+    def do(self) -> int:
+        for i in self.inputs[TransformFirstTask]:
+            return i
+        return -1
+
+
+class TransformFirstTask(Task):
+    def do(self) -> Iterator[int]:
+        for i in self.inputs[ExtractTask]:
+            yield i * 2
+            return
+
+
+class EarlyReturnPipeline(StreamingPipeline):
+    tasks = [ExtractTask, FirstItemTask]
+    threaded = True
+    queue_size = 1
+
+
+class EarlyReturnMiddlePipeline(StreamingPipeline):
+    tasks = [ExtractTask, TransformFirstTask, FirstTransformedTask]
+    threaded = True
+    queue_size = 1
+
+
+def test_early_return(configure) -> None:
+    for pipeline, expected in ((EarlyReturnPipeline, 0), (EarlyReturnMiddlePipeline, 0)):
+        res: List[int] = []
+        thread = threading.Thread(target=lambda: res.append(pipeline().run()))
+        thread.start()
+        # Upstream stages are stopped instead of waiting for their items to be read
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert res == [expected]
+
+
+class SlowExtractTask(Task):
+    def do(self) -> Iterator[int]:
+        for i in range(5):
+            time.sleep(0.02)
+            yield i
+
+
+class SlowLoadTask(Task):
+    def do(self) -> int:
+        count = 0
+        for _ in self.inputs[SlowExtractTask]:
+            time.sleep(0.1)
+            count += 1
+        return count
+
+
+class SlowEtlPipeline(StreamingPipeline):
+    tasks = [SlowExtractTask, SlowLoadTask]
+
+
+class ThreadedSlowEtlPipeline(SlowEtlPipeline):
+    threaded = True
+
+
+def test_stage_metrics(configure) -> None:
+    for pipeline in (SlowEtlPipeline, ThreadedSlowEtlPipeline):
+        start = time.time()
+        assert pipeline().run() == 5
+        records = {x.name.rsplit(".", 1)[-1]: x for x in Task.METRICS.since(start)}
+        # Stages producing items are measured while producing them, not while their consumer works
+        assert 0.1 <= records["SlowExtractTask"].wall < 0.3
+        assert records["SlowExtractTask"].status == "completed"
+        assert records["SlowLoadTask"].wall >= 0.5
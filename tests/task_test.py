@@ -248,3 +248,96 @@ def test_debugging(configure) -> None:
         o.run()
     assert str(e.value) == "error"
     assert logger.getvalue() == ""
+
+
+def square(x: int) -> int:
+    if x < 0:
+        raise ValueError("negative: {}".format(x))
+    return x * x
+
+
+class MapTask(Task):
+    def __init__(self, items=range(10), **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.items = items
+        self.kwargs = kwargs
+
+    def do(self) -> list:
+        return list(
+            self.map(
+                square,
+                self.items,
+                workers=4,
+                mode=self.kwargs.get("mode", "thread"),
+                chunksize=self.kwargs.get("chunksize", 1),
+                ordered=self.kwargs.get("ordered", True),
+                return_exceptions=self.kwargs.get("return_exceptions", False),
+                stubbedValue=-1,
+            )
+        )
+
+
+def test_map(configure) -> None:
+    assert MapTask(progress=False).run() == [x * x for x in range(10)]
+    assert MapTask(progress=True, chunksize=3).run() == [x * x for x in range(10)]
+    assert sorted(MapTask(progress=False, ordered=False).run()) == [x * x for x in range(10)]
+
+
+def test_map_process(configure) -> None:
+    assert MapTask(progress=False, mode="process", chunksize=4).run() == [x * x for x in range(10)]
+
+
+def test_map_unknown_mode(configure) -> None:
+    with pytest.raises(ValueError) as e:
+        MapTask(progress=False, mode="foo").run()
+    assert str(e.value) == "Unknown mode: foo"
+
+
+def test_map_dryrun(configure) -> None:
+    o = MapTask(progress=False, dryrun=True)
+    logger = addTestLogger(o)
+
+    assert o.run() == [-1] * 10
+    assert logger.getvalue() == "simpletasks.MapTask - INFO - Stubbed\n"
+
+
+def test_map_exceptions(configure) -> None:
+    o = MapTask(items=[1, -2, 3, -4], progress=False)
+    logger = addTestLogger(o)
+    with pytest.raises(ValueError) as e:
+        o.run()
+    assert str(e.value) == "negative: -2"
+    assert logger.getvalue().startswith(
+        "simpletasks.MapTask - CRITICAL - Got exception: ValueError negative: -2\n"
+    )
+
+    res = MapTask(items=[1, -2, 3, -4], progress=False, return_exceptions=True).run()
+    assert res[0] == 1 and res[2] == 9
+    assert isinstance(res[1], ValueError) and str(res[1]) == "negative: -2"
+    assert isinstance(res[3], ValueError) and str(res[3]) == "negative: -4"
+
+
+class SlotsTask(Task):
+    __slots__ = ()
+
+    def do(self) -> None:
+        pass
+
+
+def test_lazy_options(configure) -> None:
+    o = NominalTask(dryrun=True, progress=False)
+    assert o.dryrun
+    assert not o.showprogress
+    assert not o.force
+
+    # Can be overridden
+    o.dryrun = False
+    o.date = datetime.date(2020, 1, 1)
+    assert not o.dryrun
+    assert o.date == datetime.date(2020, 1, 1)
+    assert o.options == {"dryrun": True, "progress": False}
+
+    slots = SlotsTask()
+    assert slots.logger.name == "simpletasks.SlotsTask"
+    with pytest.raises(AttributeError):
+        slots.foo = 1  # type: ignore
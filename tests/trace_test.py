@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import time
+
+import pytest
+
+from simpletasks.helpers import addTestLogger
+from simpletasks.orchestrator import Orchestrator
+from simpletasks.task import Task
+from simpletasks.trace import TraceRecorder
+
+
+@pytest.fixture(scope="function")
+def configure():
+    DEBUGGING_old = Task.DEBUGGING
+    TESTING_old = Task.TESTING
+    LOGGER_NAMESPACE_old = Task.LOGGER_NAMESPACE
+
+    Task.DEBUGGING = False
+    Task.TESTING = False
+    Task.LOGGER_NAMESPACE = "simpletasks."
+    logger = logging.getLogger("simpletasks")
+    logger.setLevel(logging.INFO)
+
+    yield Task
+
+    Task.DEBUGGING = DEBUGGING_old
+    Task.TESTING = TESTING_old
+    Task.LOGGER_NAMESPACE = LOGGER_NAMESPACE_old
+
+
+class SleepTask(Task):
+    def do(self) -> None:
+        time.sleep(0.1)
+
+
+class SleepTask2(SleepTask):
+    pass
+
+
+class SleepTask3(SleepTask):
+    pass
+
+
+class TraceOrchestrator(Orchestrator):
+    tasks = {
+        SleepTask: ([], {}),
+        SleepTask2: ([], {}),
+        SleepTask3: ([SleepTask], {}),
+    }
+    num_threads = 2
+
+
+def test_recorder(configure) -> None:
+    recorder = TraceRecorder(num_threads=2)
+    start = recorder.start
+    recorder.record("A", "Worker-0", start, start, start + 2, "completed")
+    recorder.record("B", "Worker-1", start, start + 1, start + 2, "failed")
+    recorder.end = start + 4
+
+    assert recorder.busy == 3
+    assert recorder.utilization() == 3 / 8
+    assert recorder.summary() == (
+        "Utilization: 37.5% of 2 threads over 4.000 s (busy 3.000 s, idle 5.000 s), "
+        "2 tasks waited 1.000 s in total for a worker (max 1.000 s)"
+    )
+
+    assert recorder.events() == [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "Worker-0"}},
+        {
+            "name": "A",
+            "cat": "task",
+            "ph": "X",
+            "pid": 1,
+            "tid": 1,
+            "ts": 0,
+            "dur": 2e6,
+            "args": {"status": "completed", "ready_us": 0, "wait_us": 0},
+        },
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": 2, "args": {"name": "Worker-1"}},
+        {
+            "name": "B",
+            "cat": "task",
+            "ph": "X",
+            "pid": 1,
+            "tid": 2,
+            "ts": 1e6,
+            "dur": 1e6,
+            "args": {"status": "failed", "ready_us": 0, "wait_us": 1e6},
+        },
+        {"name": "B", "cat": "waiting", "ph": "b", "pid": 1, "tid": 2, "id": 1, "ts": 0},
+        {"name": "B", "cat": "waiting", "ph": "e", "pid": 1, "tid": 2, "id": 1, "ts": 1e6},
+    ]
+
+
+def test_orchestrator(configure, tmpdir) -> None:
+    path = os.path.join(str(tmpdir), "trace.json")
+    o = TraceOrchestrator(trace=path)
+    logger = addTestLogger(o)
+    o.run()
+
+    assert "simpletasks.TraceOrchestrator - INFO - Utilization: " in logger.getvalue()
+
+    with open(path) as f:
+        trace = json.load(f)
+    spans = {x["name"]: x for x in trace["traceEvents"] if x["ph"] == "X"}
+    assert set(spans.keys()) == {"SleepTask", "SleepTask2", "SleepTask3"}
+    assert all(x["dur"] >= 0.1e6 for x in spans.values())
+    # Started once SleepTask completed
+    assert spans["SleepTask3"]["ts"] >= spans["SleepTask"]["ts"] + spans["SleepTask"]["dur"]
+    threads = {x["args"]["name"] for x in trace["traceEvents"] if x["ph"] == "M"}
+    assert threads == {"TraceOrchestrator-0", "TraceOrchestrator-1"}
+    # 0.3 s of work over 0.2 s with 2 threads
+    assert 0.6 < trace["otherData"]["utilization"] <= 1